@@ -0,0 +1,138 @@
+"""
+Query API Load Test
+Drives scripts/api.py over keep-alive connections with a fixed mix of
+queries and reports requests/s and latency percentiles. Start the API
+first (or pass --spawn to run it in a subprocess on --port).
+
+Usage:
+  python benchmarks/api_load.py --spawn --seconds 5 --connections 16
+  python benchmarks/api_load.py --port 8900 --etag   # send If-None-Match
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+API_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "api.py")
+
+QUERIES = [
+    "/offers",
+    "/offers?source=BirBank",
+    "/offers?source=BirBank&page=2&per_page=20",
+    "/offers?source=PASHA%20Bank",
+    "/offers?partner=PMD%20Group",
+    "/offers?max_rate=10",
+    "/offers?rate_tier=16.5&source=BirBank",
+    "/offers?bbox=40.3,49.7,40.5,50.0",
+    "/offers?region=Bak%C4%B1",
+    "/best?name=PMD%20Group&price=150000",
+]
+
+
+async def _request(reader, writer, path: str, etag: bytes | None) -> tuple[int, bytes | None]:
+    req = f"GET {path} HTTP/1.1\r\nHost: localhost\r\n".encode("ascii")
+    if etag:
+        req += b"If-None-Match: " + etag + b"\r\n"
+    writer.write(req + b"\r\n")
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    status = int(lines[0].split()[1])
+    length, new_etag = 0, None
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"etag":
+            new_etag = value.strip()
+    if length:
+        await reader.readexactly(length)
+    return status, new_etag
+
+
+async def _worker(host, port, deadline, use_etag, latencies, statuses, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags: dict[str, bytes] = {}
+    n = offset
+    try:
+        while time.perf_counter() < deadline:
+            path = QUERIES[n % len(QUERIES)]
+            n += 1
+            start = time.perf_counter()
+            status, etag = await _request(reader, writer, path, etags.get(path) if use_etag else None)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if etag:
+                etags[path] = etag
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, seconds: float, connections: int, use_etag: bool) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(
+        _worker(host, port, deadline, use_etag, latencies, statuses, i)
+        for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+    return {
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": pct(0.50),
+        "p99_ms": pct(0.99),
+        "statuses": statuses,
+    }
+
+
+async def _wait_for(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test for scripts/api.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--etag", action="store_true", help="revalidate with If-None-Match")
+    parser.add_argument("--spawn", action="store_true", help="start scripts/api.py for the run")
+    args = parser.parse_args()
+
+    proc = None
+    if args.spawn:
+        proc = subprocess.Popen([sys.executable, API_SCRIPT, "--host", args.host,
+                                 "--port", str(args.port)], stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(_wait_for(args.host, args.port))
+        report = asyncio.run(run(args.host, args.port, args.seconds, args.connections, args.etag))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    print(f"[OK] {report['requests']:,} requests, {report['requests_per_s']:,} req/s, "
+          f"p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms, statuses {report['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
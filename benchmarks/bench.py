@@ -0,0 +1,346 @@
+"""
+Pipeline Benchmark Suite
+Reads: benchmarks/fixtures/*  (see record_fixtures.py), data/*.csv
+Compares against: benchmarks/baseline.json
+
+Stages timed
+------------
+birbank.flatten      json.loads + birbank.flatten_partners
+pashabank.parse      BeautifulSoup + pashabank.parse_partners
+xalqbank.parse       BeautifulSoup + xalqbank.parse_partners
+abbhome.parse        abbhome.extract_next_data + abbhome.parse_partners
+combine.main         all four source CSVs → data.csv
+charts.chart_NN_*    each generate_charts chart function
+
+Each stage runs at 1×, 10× and 100× the recorded input (partner cards /
+responseDto entries / CSV rows replicated). Wall time is the best of
+--repeat runs; peak memory comes from one extra run under tracemalloc, so
+tracing overhead never pollutes the timings. Stages that return records
+also report throughput (records/s).
+
+--fixtures points the parse stages at another corpus, e.g. one made by
+synthetic.py; baseline comparison is skipped for such ad-hoc runs.
+
+A stage regresses when its time or peak memory exceeds the baseline by more
+than --threshold (default 25 %). Timings below MIN_TIME_S are too noisy to
+judge and are only reported. Any regression makes the run exit with status 1.
+Baselines are machine-specific: refresh with --update-baseline after an
+intentional change or on new hardware.
+
+Usage:
+  python benchmarks/bench.py [--scales 1,10,100] [--stage combine]
+                             [--repeat 3] [--threshold 0.25]
+                             [--update-baseline] [--json report.json]
+                             [--fixtures DIR]
+"""
+
+import argparse
+import contextlib
+import copy
+import csv
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import abbhome  # noqa: E402
+import birbank  # noqa: E402
+import combine  # noqa: E402
+import dataio  # noqa: E402
+import generate_charts  # noqa: E402
+import instrument  # noqa: E402
+import pashabank  # noqa: E402
+import xalqbank  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+DATA_DIR = os.path.join(BENCH_DIR, "..", "data")
+
+# Benchmark runs of combine.main() must not overwrite data/metrics/.
+instrument.METRICS_DIR = ""
+
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_THRESHOLD = 0.25
+MIN_TIME_S = 0.005
+
+# Scratch space for scaled inputs and chart output; set by run_suite().
+WORK_DIR: str | None = None
+
+SOURCE_CSVS = ["pashabank.csv", "abbhome.csv", "xalqbank.csv", "birbank.csv"]
+
+CHART_FUNCS = [
+    generate_charts.chart_01_network_size,
+    generate_charts.chart_02_birbank_rate_tiers,
+    generate_charts.chart_03_birbank_downpayment,
+    generate_charts.chart_04_rate_vs_downpayment,
+    generate_charts.chart_05_top_developers,
+    generate_charts.chart_06_digital_presence,
+    generate_charts.chart_07_geographic,
+    generate_charts.chart_08_geo_density,
+]
+
+
+def _fixture(name: str) -> str:
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+# ---------------------------------------------------------------------------
+# Scaled inputs (built once per scale, outside the timed region)
+# ---------------------------------------------------------------------------
+
+def _replicate_children(html: str, find_container, find_items, k: int) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    container = find_container(soup)
+    items = find_items(container)
+    for _ in range(k - 1):
+        for item in items:
+            container.append(copy.copy(item))
+    return str(soup)
+
+
+def scaled_birbank(k: int) -> str:
+    payload = json.loads(_fixture("birbank.json"))
+    payload["data"]["responseDto"] = payload["data"]["responseDto"] * k
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def scaled_pashabank(k: int) -> str:
+    return _replicate_children(
+        _fixture("pashabank.html"),
+        lambda s: s.find(id="partners-list"),
+        lambda c: c.find_all("div", class_="col-lg-12", recursive=False),
+        k,
+    )
+
+
+def scaled_xalqbank(k: int) -> str:
+    return _replicate_children(
+        _fixture("xalqbank.html"),
+        lambda s: s.find("div", class_="loan__item").parent,
+        lambda c: c.find_all("div", class_="loan__item", recursive=False),
+        k,
+    )
+
+
+def scaled_abbhome(k: int) -> str:
+    html = _fixture("abbhome.html")
+    soup = BeautifulSoup(html, "html.parser")
+    tag = soup.find("script", id="__NEXT_DATA__")
+    data = json.loads(tag.string)
+    page_props = data["props"]["pageProps"]
+    page_props["partners"] = page_props["partners"] * k
+    tag.string = json.dumps(data, ensure_ascii=False)
+    return str(soup)
+
+
+def scaled_data_dir(k: int) -> str:
+    """Temp dir holding every source CSV with its rows repeated k times."""
+    tmp = tempfile.mkdtemp(prefix=f"data_{k}x_", dir=WORK_DIR)
+    for name in SOURCE_CSVS:
+        with open(os.path.join(DATA_DIR, name), encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            rows = list(reader)
+        with open(os.path.join(tmp, name), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for _ in range(k):
+                writer.writerows(rows)
+    return tmp
+
+
+# ---------------------------------------------------------------------------
+# Stages: name → (setup(k) -> arg, run(arg))
+# ---------------------------------------------------------------------------
+
+def _run_combine(data_dir: str) -> None:
+    combine.DATA_DIR = data_dir
+    combine.OUTPUT = os.path.join(data_dir, "data.csv")
+    combine.main()
+
+
+def _setup_chart_rows(k: int) -> list[dict]:
+    data_dir = scaled_data_dir(k)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _run_combine(data_dir)
+    return dataio.read_csv(os.path.join(data_dir, "data.csv"))
+
+
+STAGES = {
+    "birbank.flatten": (
+        scaled_birbank,
+        lambda raw: birbank.flatten_partners(json.loads(raw)["data"]["responseDto"]),
+    ),
+    "pashabank.parse": (
+        scaled_pashabank,
+        lambda html: pashabank.parse_partners(BeautifulSoup(html, "html.parser")),
+    ),
+    "xalqbank.parse": (
+        scaled_xalqbank,
+        lambda html: xalqbank.parse_partners(BeautifulSoup(html, "html.parser")),
+    ),
+    "abbhome.parse": (
+        scaled_abbhome,
+        lambda html: abbhome.parse_partners(abbhome.extract_next_data(html)),
+    ),
+    "combine.main": (scaled_data_dir, _run_combine),
+}
+for _fn in CHART_FUNCS:
+    STAGES[f"charts.{_fn.__name__}"] = (_setup_chart_rows, _fn)
+
+
+def measure(run, arg, repeat: int) -> dict:
+    sink = io.StringIO()
+    best = float("inf")
+    records = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sink):
+            out = run(arg)
+        best = min(best, time.perf_counter() - start)
+        if isinstance(out, list):
+            records = len(out)
+        sink.seek(0)
+        sink.truncate()
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(sink):
+            run(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    res = {"time_s": round(best, 6), "peak_kb": round(peak / 1024, 1)}
+    if records is not None:
+        res["records"] = records
+    return res
+
+
+def run_suite(stages: list[str], scales: list[int], repeat: int) -> dict:
+    global WORK_DIR
+    with tempfile.TemporaryDirectory(prefix="bench_") as WORK_DIR:
+        generate_charts.CHART_DIR = WORK_DIR
+        return _run_stages(stages, scales, repeat)
+
+
+def _run_stages(stages: list[str], scales: list[int], repeat: int) -> dict:
+    setup_cache: dict[tuple, object] = {}
+
+    results: dict[str, dict] = {}
+    for name in stages:
+        setup, run = STAGES[name]
+        results[name] = {}
+        for k in scales:
+            key = (setup, k)
+            if key not in setup_cache:
+                setup_cache[key] = setup(k)
+            res = measure(run, setup_cache[key], repeat)
+            results[name][f"{k}x"] = res
+            rate = ""
+            if "records" in res and res["time_s"]:
+                rate = f"  {res['records'] / res['time_s']:>12,.0f} rec/s"
+            print(f"  {name:<38} {k:>4}×  {res['time_s'] * 1000:>10.2f} ms"
+                  f"  {res['peak_kb']:>10.1f} KiB{rate}")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    base_stages = baseline.get("stages", {})
+    for name, by_scale in results.items():
+        for scale, res in by_scale.items():
+            base = base_stages.get(name, {}).get(scale)
+            if not base:
+                continue
+            if (base["time_s"] >= MIN_TIME_S
+                    and res["time_s"] > base["time_s"] * (1 + threshold)):
+                regressions.append(
+                    f"{name} {scale}: time {base['time_s'] * 1000:.2f} → "
+                    f"{res['time_s'] * 1000:.2f} ms "
+                    f"(+{100 * (res['time_s'] / base['time_s'] - 1):.0f}%)")
+            if base["peak_kb"] and res["peak_kb"] > base["peak_kb"] * (1 + threshold):
+                regressions.append(
+                    f"{name} {scale}: peak {base['peak_kb']:.0f} → {res['peak_kb']:.0f} KiB "
+                    f"(+{100 * (res['peak_kb'] / base['peak_kb'] - 1):.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark parse/flatten/combine/chart stages.")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)))
+    parser.add_argument("--stage", action="append", default=[],
+                        help="only stages whose name starts with this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown / memory growth as a fraction (default 0.25)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", dest="json_out", help="write the full report here")
+    parser.add_argument("--fixtures", help="parse-stage inputs from this directory instead")
+    args = parser.parse_args()
+
+    global FIXTURE_DIR
+    if args.fixtures:
+        FIXTURE_DIR = args.fixtures
+
+    scales = [int(s) for s in args.scales.split(",") if s]
+    stages = [s for s in STAGES if not args.stage or s.startswith(tuple(args.stage))]
+    if not stages:
+        print(f"[ERROR] No stage matches {args.stage}")
+        sys.exit(2)
+
+    print(f"[INFO] {len(stages)} stage(s) × scales {scales}, best of {args.repeat}\n")
+    results = run_suite(stages, scales, args.repeat)
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "stages": results,
+    }
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[OK] Report → {os.path.abspath(args.json_out)}")
+
+    if args.fixtures:
+        return
+
+    if args.update_baseline:
+        baseline = {"stages": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline["machine"] = report["machine"]
+        for name, by_scale in results.items():
+            baseline.setdefault("stages", {}).setdefault(name, {}).update(by_scale)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n[OK] Baseline updated → {os.path.abspath(args.baseline)}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("\n[WARN] No baseline yet – run with --update-baseline to create one.")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n[FAIL] {len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\n[OK] No regressions over {args.threshold:.0%} against baseline.")
+
+
+if __name__ == "__main__":
+    main()
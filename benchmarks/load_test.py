@@ -0,0 +1,112 @@
+"""
+End-to-end Fetch Load Test (offline)
+Starts benchmarks/mock_server.py in-process, points http_client at it and
+runs every scraper's fetch + parse path, plus the ABB Home detail crawl,
+for --rounds rounds. Reports wall time, fetch throughput, per-host
+scheduler stats (retries, throttles, adapted rate/concurrency) and what
+the server actually saw.
+
+Usage:
+  python benchmarks/load_test.py --rounds 20 --latency 50 --throttle-rate 0.05
+  python benchmarks/load_test.py --synthetic 2000,10 --error-rate 0.02
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+import abbhome  # noqa: E402
+import abbhome_projects  # noqa: E402
+import birbank  # noqa: E402
+import http_client  # noqa: E402
+import pashabank  # noqa: E402
+import xalqbank  # noqa: E402
+from mock_server import MockBankServer, MockConfig  # noqa: E402
+
+
+def one_round(detail_workers: int) -> int:
+    """Fetch + parse every source once; return records produced."""
+    records = len(birbank.flatten_partners(birbank.fetch_partners()))
+    for module, url in ((pashabank, pashabank.PARTNERS_URL), (xalqbank, xalqbank.PAGE_URL)):
+        soup = module.fetch_page(url)
+        records += len(module.parse_partners(soup)) if soup else 0
+    next_data = abbhome.fetch_next_data(abbhome.PAGE_URL)
+    partners = abbhome.parse_partners(next_data) if next_data else []
+    records += len(partners)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        crawler = abbhome_projects.ProjectCrawler(
+            workers=detail_workers, rate=1000,
+            checkpoint_path=os.path.join(tmp, "checkpoint.jsonl"))
+        rows, _ = crawler.crawl([{k: str(v) for k, v in p.items()} for p in partners], {})
+    return records + len(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline load test against the mock banks.")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--synthetic", metavar="N,M")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    parser.add_argument("--detail-workers", type=int, default=4)
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        synthetic=tuple(int(x) for x in args.synthetic.split(",")) if args.synthetic else None,
+        latency_ms=args.latency, jitter_ms=args.jitter, bandwidth_kbps=args.bandwidth,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+    )
+    server = MockBankServer(config).start()
+    http_client.set_base_url(server.base_url)
+    print(f"[INFO] Mock banks on {server.base_url}, {args.rounds} round(s)")
+
+    records = 0
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(args.rounds):
+                records += one_round(args.detail_workers)
+    finally:
+        elapsed = time.perf_counter() - start
+        server_stats = server.stats
+        server.stop()
+        http_client.set_base_url(None)
+
+    requests_seen = sum(sum(c.values()) for c in server_stats["paths"].values())
+    report = {
+        "rounds": args.rounds,
+        "elapsed_s": round(elapsed, 3),
+        "records": records,
+        "requests": requests_seen,
+        "requests_per_s": round(requests_seen / elapsed, 1) if elapsed else 0,
+        "bytes_sent": server_stats["bytes_sent"],
+        "hosts": http_client.SCHEDULER.summary(),
+    }
+    print(f"[OK] {records:,} records, {requests_seen:,} requests in {elapsed:.2f}s "
+          f"({report['requests_per_s']} req/s, {server_stats['bytes_sent']:,} bytes)")
+    for host, s in report["hosts"].items():
+        print(f"       {host:<24} requests={s['requests']} retries={s['retries']} "
+              f"throttled={s['throttled']} errors={s['errors']} "
+              f"rate={s['rate']}/s concurrency={s['concurrency']} latency={s['latency_ms']}ms")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
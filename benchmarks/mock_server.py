@@ -0,0 +1,346 @@
+"""
+Local Mock Bank Server
+Serves: the four partner endpoints from fixtures or a synthetic corpus,
+        with configurable latency, bandwidth, fault injection and cookie checks.
+
+Routes (paths match the real sites, so one server stands in for all four)
+------
+/api/partners?size=N&page=P                           BirBank JSON (paged)
+/az/ipoteka/partners/partners                         PASHA Bank HTML
+/az/ferdi/kreditler/ipoteka/partnyor-sirketler-uzre-ipoteka    Xalq Bank HTML
+/partnyor-tikinti-sirketleri-uzre-ipoteka-krediti     ABB Home list page
+/partnyor-tikinti-sirketleri-uzre-ipoteka-krediti/<slug>   ABB Home partner
+                                                      detail page (generated)
+*.png / *.jpg / *.jpeg / *.webp / *.svg               tiny placeholder logo
+/                                                     home page (issues cookies)
+/__stats                                              request counters (JSON)
+
+Every response carries an ETag and Last-Modified; conditional GETs get 304.
+GET and HEAD are supported.
+
+Fault injection
+---------------
+--latency MS [--jitter MS]   added before each response
+--bandwidth KBPS             body is trickled out at this rate
+--error-rate F               fraction of requests answered 500/502/503
+--throttle-rate F            fraction answered 429 + Retry-After
+--retry-after S              Retry-After value for 429s (default 1)
+--require-cookie NAME        403 unless the request carries cookie NAME;
+                             GET / hands it out via Set-Cookie
+
+Point the scrapers at it with the http_client base-URL override:
+  python benchmarks/mock_server.py --port 8800 --latency 50 --throttle-rate 0.1
+  SCRAPER_BASE_URL=http://127.0.0.1:8800 python scripts/birbank.py
+
+In-process use (e.g. from a load-test script):
+  server = MockBankServer(MockConfig(latency_ms=20)).start()
+  ... server.base_url ...
+  server.stop()
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+BIRBANK_PATH = "/api/partners"
+PASHA_PATH = "/az/ipoteka/partners/partners"
+XALQ_PATH = "/az/ferdi/kreditler/ipoteka/partnyor-sirketler-uzre-ipoteka"
+ABB_PATH = "/partnyor-tikinti-sirketleri-uzre-ipoteka-krediti"
+IMAGE_RE = re.compile(r"\.(png|jpe?g|webp|gif|svg)$", re.IGNORECASE)
+
+# 1×1 transparent PNG
+PLACEHOLDER_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100e221bc330000"
+    "000049454e44ae426082"
+)
+
+
+@dataclass
+class MockConfig:
+    fixtures: str = FIXTURE_DIR
+    synthetic: tuple[int, int] | None = None   # (partners, complexes)
+    seed: int = 0
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    bandwidth_kbps: float = 0.0                # 0 = unlimited
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+    require_cookie: str | None = None
+    detail_projects: int = 5                   # projects per ABB detail page
+
+
+@dataclass
+class Payloads:
+    birbank: dict
+    pashabank: bytes
+    xalqbank: bytes
+    abbhome: bytes
+    abb_partners: dict[str, dict] = field(default_factory=dict)
+
+
+def load_payloads(config: MockConfig) -> Payloads:
+    if config.synthetic:
+        n, m = config.synthetic
+        raw = {name: synthetic.generate(name, n, m, config.seed)
+               for name in synthetic.GENERATORS}
+    else:
+        raw = {}
+        for name in synthetic.GENERATORS:
+            with open(os.path.join(config.fixtures, name), encoding="utf-8") as f:
+                raw[name] = f.read()
+
+    abb_partners = {}
+    match = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', raw["abbhome.html"], re.S)
+    if match:
+        page_props = json.loads(match.group(1)).get("props", {}).get("pageProps", {})
+        abb_partners = {p["slug"]: p for p in page_props.get("partners", []) if p.get("slug")}
+
+    return Payloads(
+        birbank=json.loads(raw["birbank.json"]),
+        pashabank=raw["pashabank.html"].encode("utf-8"),
+        xalqbank=raw["xalqbank.html"].encode("utf-8"),
+        abbhome=raw["abbhome.html"].encode("utf-8"),
+        abb_partners=abb_partners,
+    )
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_path: dict[str, dict[str, int]] = {}
+        self.bytes_sent = 0
+
+    def record(self, path: str, status: int, size: int) -> None:
+        with self.lock:
+            counts = self.by_path.setdefault(path, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+            self.bytes_sent += size
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"paths": json.loads(json.dumps(self.by_path)), "bytes_sent": self.bytes_sent}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockBank/1.0"
+
+    # Set on the server instance by MockBankServer
+    @property
+    def cfg(self) -> MockConfig:
+        return self.server.config  # type: ignore[attr-defined]
+
+    def log_message(self, fmt, *args):  # keep load tests quiet
+        pass
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    # -- routing -----------------------------------------------------------
+
+    def _route(self, path: str, query: dict) -> tuple[bytes, str] | None:
+        payloads: Payloads = self.server.payloads  # type: ignore[attr-defined]
+        if path == BIRBANK_PATH:
+            return self._birbank(payloads.birbank, query), "application/json"
+        if path == PASHA_PATH:
+            return payloads.pashabank, "text/html; charset=utf-8"
+        if path == XALQ_PATH:
+            return payloads.xalqbank, "text/html; charset=utf-8"
+        if path == ABB_PATH:
+            return payloads.abbhome, "text/html; charset=utf-8"
+        if path.startswith(ABB_PATH + "/"):
+            partner = payloads.abb_partners.get(path[len(ABB_PATH) + 1:])
+            if partner is None:
+                return None
+            rng = random.Random(zlib.crc32(partner["slug"].encode("utf-8")) ^ self.cfg.seed)
+            page = synthetic.next_data_page(
+                synthetic.abbhome_projects(rng, partner, self.cfg.detail_projects),
+                title=partner.get("title", ""))
+            return page.encode("utf-8"), "text/html; charset=utf-8"
+        if IMAGE_RE.search(path):
+            return PLACEHOLDER_PNG, "image/png"
+        if path == "/":
+            return b"<!DOCTYPE html><html><body>mock bank</body></html>", "text/html; charset=utf-8"
+        return None
+
+    @staticmethod
+    def _birbank(payload: dict, query: dict) -> bytes:
+        partners = payload.get("data", {}).get("responseDto", [])
+        size = int(query.get("size", [len(partners) or 1])[0])
+        page = int(query.get("page", [0])[0])
+        chunk = partners[page * size:(page + 1) * size]
+        body = {
+            "message": payload.get("message", "Success"),
+            "data": {"totalElements": len(partners), "responseDto": chunk},
+        }
+        return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+    # -- request handling --------------------------------------------------
+
+    def _handle(self, send_body: bool) -> None:
+        cfg = self.cfg
+        parts = urlsplit(self.path)
+        path, query = parts.path, parse_qs(parts.query)
+
+        if path == "/__stats":
+            body = json.dumps(self.server.stats.snapshot()).encode()  # type: ignore[attr-defined]
+            return self._send(200, body, "application/json", send_body, record=False)
+
+        delay = cfg.latency_ms + (random.uniform(0, cfg.jitter_ms) if cfg.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < cfg.throttle_rate:
+            return self._send(429, b"Too Many Requests", "text/plain", send_body,
+                              extra={"Retry-After": f"{cfg.retry_after:g}"})
+        if roll < cfg.throttle_rate + cfg.error_rate:
+            return self._send(random.choice([500, 502, 503]), b"Server Error",
+                              "text/plain", send_body)
+
+        extra = {}
+        if cfg.require_cookie:
+            cookies = SimpleCookie(self.headers.get("Cookie", ""))
+            if path == "/":
+                token = hashlib.sha1(str(time.time()).encode()).hexdigest()
+                extra["Set-Cookie"] = f"{cfg.require_cookie}={token}; Path=/; HttpOnly"
+            elif cfg.require_cookie not in cookies:
+                return self._send(403, b"Access Denied", "text/plain", send_body)
+
+        routed = self._route(path, query)
+        if routed is None:
+            return self._send(404, b"Not Found", "text/plain", send_body)
+        body, content_type = routed
+
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        extra.update({"ETag": etag, "Last-Modified": self.server.last_modified})  # type: ignore[attr-defined]
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", content_type, send_body, extra=extra)
+        self._send(200, body, content_type, send_body, extra=extra)
+
+    def _send(self, status: int, body: bytes, content_type: str, send_body: bool,
+              extra: dict | None = None, record: bool = True) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body) if status != 304 else 0))
+        for key, value in (extra or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        sent = 0
+        if send_body and status != 304:
+            sent = self._write(body)
+        if record:
+            self.server.stats.record(urlsplit(self.path).path, status, sent)  # type: ignore[attr-defined]
+
+    def _write(self, body: bytes) -> int:
+        kbps = self.cfg.bandwidth_kbps
+        if not kbps:
+            self.wfile.write(body)
+            return len(body)
+        chunk = 16 * 1024
+        bytes_per_s = kbps * 1024
+        for i in range(0, len(body), chunk):
+            piece = body[i:i + chunk]
+            self.wfile.write(piece)
+            time.sleep(len(piece) / bytes_per_s)
+        return len(body)
+
+
+class MockBankServer:
+    def __init__(self, config: MockConfig | None = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self.httpd.payloads = load_payloads(self.config)
+        self.httpd.stats = Stats()
+        self.httpd.last_modified = formatdate(time.time(), usegmt=True)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> dict:
+        return self.httpd.stats.snapshot()
+
+    def start(self) -> "MockBankServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the four bank endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--synthetic", metavar="N,M",
+                        help="serve a generated corpus of N partners × M complexes instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="ms per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random ms")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="KiB/s per response")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--require-cookie", metavar="NAME")
+    parser.add_argument("--detail-projects", type=int, default=5)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        fixtures=args.fixtures,
+        synthetic=tuple(int(x) for x in args.synthetic.split(",")) if args.synthetic else None,
+        seed=args.seed,
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        bandwidth_kbps=args.bandwidth,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        require_cookie=args.require_cookie,
+        detail_projects=args.detail_projects,
+    )
+    server = MockBankServer(config, args.host, args.port)
+    print(f"[INFO] Mock banks on {server.base_url}  "
+          f"(SCRAPER_BASE_URL={server.base_url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Benchmark Fixture Recorder
+Reads: data/birbank.csv, data/pashabank.csv, data/xalqbank.csv, data/abbhome.csv
+Writes: benchmarks/fixtures/{birbank.json, pashabank.html, xalqbank.html, abbhome.html}
+
+By default the raw source payloads are rebuilt from the committed snapshot
+CSVs, in exactly the structure each scraper's docstring documents, so the
+benchmark inputs stay stable and the suite runs offline. With --live the
+real pages / API response are downloaded instead (through http_client, with
+each scraper's own headers and cookie jar).
+
+Usage:
+  python benchmarks/record_fixtures.py [--live]
+"""
+
+import argparse
+import html
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import abbhome  # noqa: E402
+import birbank  # noqa: E402
+import dataio  # noqa: E402
+import pashabank  # noqa: E402
+import xalqbank  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _read(filename: str) -> list[dict]:
+    return dataio.read_csv(os.path.join(DATA_DIR, filename))
+
+
+def _num(value: str):
+    """CSV text back to the JSON scalar BirBank sends (None when empty)."""
+    if not value:
+        return None
+    try:
+        f = float(value)
+    except ValueError:
+        return value
+    return int(f) if f.is_integer() and "." not in value else f
+
+
+def _logo_file(url: str) -> str:
+    return url[len(birbank.LOGO_BASE):] if url.startswith(birbank.LOGO_BASE) else url
+
+
+def build_birbank() -> str:
+    partners: dict[str, dict] = {}
+    for r in _read("birbank.csv"):
+        p = partners.get(r["partner_name"])
+        if p is None:
+            p = partners[r["partner_name"]] = {
+                "id": len(partners) + 1,
+                "slug": "",
+                "logo": _logo_file(r["partner_logo_url"]),
+                "name": r["partner_name"],
+                "mobileNumber1": r["phone_mobile1"],
+                "mobileNumber2": r["phone_mobile2"] or None,
+                # Short codes come as numbers; leading-zero landlines as strings.
+                "phoneNumber": (r["phone_short"] if r["phone_short"].startswith("0")
+                                else _num(r["phone_short"])),
+                "email": r["email"] or None,
+                "website": r["website"] or None,
+                "facebook": r["facebook"] or None,
+                "instagram": r["instagram"] or None,
+                "address": r["partner_address"],
+                "minLoanAmount": _num(r["min_loan_amount"]),
+                "maxLoanAmount": _num(r["max_loan_amount"]),
+                "mortgageRate": _num(r["mortgage_rate_pct"]),
+                "mortgagePeriod": _num(r["mortgage_period_years"]),
+                "initialPayment": _num(r["initial_payment_pct"]),
+                "complexes": [],
+            }
+        if r["complex_name"]:
+            p["complexes"].append({
+                "id": sum(len(q["complexes"]) for q in partners.values()) + 1,
+                "name": r["complex_name"],
+                "regionId": _num(r["region_id"]),
+                "longitude": _num(r["longitude"]),
+                "latitude": _num(r["latitude"]),
+                "logo": _logo_file(r["complex_logo_url"]),
+                "slug": r["complex_slug"],
+            })
+    payload = {"message": "Success", "data": {"responseDto": list(partners.values())}}
+    return json.dumps(payload, ensure_ascii=False, indent=1)
+
+
+def _term_li(value: str) -> str:
+    prefix, _, rest = value.partition(" ")
+    if prefix in ("min.", "maks.") and rest:
+        return (f'<li><span class="min_prefix">{html.escape(prefix)}</span> '
+                f'<span class="fs-5 fw-normal">{html.escape(rest)}</span></li>')
+    return f'<li><span class="fs-5 fw-normal">{html.escape(value)}</span></li>'
+
+
+def _badge(alt: str, text: str) -> str:
+    if not text:
+        return ""
+    return (f'<li><div class="partner-card__contacts-badge">'
+            f'<img src="/assets/icons/{alt}.svg" alt="{alt}"><p>{html.escape(text)}</p>'
+            f'</div></li>')
+
+
+def build_pashabank() -> str:
+    cards = []
+    for r in _read("pashabank.csv"):
+        logo = r["logo_url"].replace(pashabank.BASE_URL, "")
+        cards.append(f"""
+<div class="col-lg-12">
+ <div class="h-100 w-100">
+  <div class="row">
+   <div class="col-md-4 partner-image">
+    <img class="partner-card__logo" src="{html.escape(logo)}" alt="{html.escape(r['name'])}">
+   </div>
+   <div class="col-md-8 mob-pad">
+    <div class="title"><h4>{html.escape(r['name'])}</h4></div>
+    <ul class="d-flex list-unstyled">
+     {_term_li(r['down_payment'])}
+     {_term_li(r['annual_rate'])}
+     {_term_li(r['term'])}
+    </ul>
+    <ul class="list-unstyled">
+     {_badge('location', r['address'])}
+     {_badge('phone', r['phone'])}
+     {_badge('globus', r['website'])}
+    </ul>
+   </div>
+  </div>
+ </div>
+</div>""")
+    return ('<!DOCTYPE html><html lang="az"><head><meta charset="utf-8">'
+            '<title>Partnyorlar | PAŞA Bank İpoteka</title></head><body>'
+            '<div class="container"><div class="row" id="partners-list">'
+            + "".join(cards) + "</div></div></body></html>")
+
+
+def build_xalqbank() -> str:
+    cards = []
+    for r in _read("xalqbank.csv"):
+        site = (f'<p><a href="{html.escape(r["website"])}" target="_blank">'
+                f'{html.escape(r["website"])}</a></p>') if r["website"] else ""
+        cards.append(f"""
+<div class="loan__item">
+ <div class="about-card__head">
+  <span class="loan__icon"><img src="{html.escape(r['logo_url'])}" alt="{html.escape(r['name'])}"></span>
+ </div>
+ <div class="loan__body">
+  <p class="font-600">{html.escape(r['name'])}<span></span></p>
+  <span class="partners__categ">{html.escape(r['region'])}</span>
+  <div class="loan__text mb-0">
+   <p>Ünvan: {html.escape(r['address'])}</p>
+   <p>Tel:&nbsp;; {html.escape(r['phone'])}</p>
+   {site}
+  </div>
+ </div>
+</div>""")
+    return ('<!DOCTYPE html><html lang="az"><head><meta charset="utf-8">'
+            '<title>Partnyor şirkətlər üzrə ipoteka | Xalq Bank</title></head><body>'
+            '<div id="__nuxt"><div class="loan">' + "".join(cards)
+            + "</div></div></body></html>")
+
+
+def build_abbhome() -> str:
+    rows = _read("abbhome.csv")
+    first = rows[0] if rows else {}
+    partners = []
+    for i, r in enumerate(rows, 1):
+        info = [{"logicalKey": "phone", "key": "Telefon", "label": r["phone"]}]
+        if r["address"]:
+            info.append({"logicalKey": "address", "key": "Ünvan", "label": r["address"]})
+        if r["website"]:
+            info.append({"logicalKey": "website", "key": "Sayt", "label": r["website"]})
+        partners.append({
+            "id": i,
+            "title": r["name"],
+            "slug": r["slug"],
+            "mtkPartnerProjectsCount": int(r["project_count"]) if r["project_count"] else None,
+            "mainImage": {"url": r["logo_url"]},
+            "additionalInfo": info,
+        })
+    next_data = {
+        "props": {"pageProps": {
+            "partners": partners,
+            "product": {"additionalInfo": {
+                "minimumDownPayment": {"label": first.get("min_down_payment", "")},
+                "minimumAnnualInterestRate": {"label": first.get("min_annual_rate", "")},
+                "maximumDuration": {"label": first.get("max_term", "")},
+                "maximumLoanAmount": {"label": first.get("max_loan_amount", "")},
+            }},
+        }},
+        "page": "/[slug]",
+        "query": {},
+        "buildId": "fixture",
+    }
+    blob = json.dumps(next_data, ensure_ascii=False).replace("</", "<\\/")
+    return ('<!DOCTYPE html><html lang="az"><head><meta charset="utf-8">'
+            '<title>ABB Home</title></head><body><div id="__next"></div>'
+            f'<script id="__NEXT_DATA__" type="application/json">{blob}</script>'
+            "</body></html>")
+
+
+def record_live() -> dict[str, str]:
+    import requests
+
+    import http_client
+
+    out = {}
+    targets = [
+        ("birbank.json", birbank.API_URL, lambda url: http_client.get(url, headers=birbank.HEADERS, timeout=30)),
+        ("pashabank.html", pashabank.PARTNERS_URL, lambda url: pashabank.SESSION.get(url, timeout=30)),
+        ("xalqbank.html", xalqbank.PAGE_URL, lambda url: xalqbank.SESSION.get(url, timeout=30)),
+        ("abbhome.html", abbhome.PAGE_URL, lambda url: abbhome.SESSION.get(url, timeout=30)),
+    ]
+    for name, url, fetch in targets:
+        try:
+            resp = fetch(url)
+            resp.raise_for_status()
+        except requests.RequestException as exc:
+            print(f"[ERROR] {name}: {exc}")
+            continue
+        resp.encoding = "utf-8"
+        out[name] = resp.text
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record benchmark fixtures.")
+    parser.add_argument("--live", action="store_true",
+                        help="download the real pages instead of rebuilding from data/*.csv")
+    args = parser.parse_args()
+
+    if args.live:
+        fixtures = record_live()
+    else:
+        fixtures = {
+            "birbank.json": build_birbank(),
+            "pashabank.html": build_pashabank(),
+            "xalqbank.html": build_xalqbank(),
+            "abbhome.html": build_abbhome(),
+        }
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, body in fixtures.items():
+        path = os.path.join(FIXTURE_DIR, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body)
+        print(f"[OK] {name} ({len(body.encode('utf-8')):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
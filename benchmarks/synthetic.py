@@ -0,0 +1,370 @@
+"""
+Synthetic Partner Corpus Generator
+Writes: <out>/{birbank.json, pashabank.html, xalqbank.html, abbhome.html}
+
+Produces raw source payloads in the same structures the scrapers parse
+(see the docstrings of scripts/birbank.py, pashabank.py, xalqbank.py,
+abbhome.py), at any size:
+
+  birbank.json    N partners in data.responseDto, M complexes each
+  pashabank.html  N × M partner cards in #partners-list
+  xalqbank.html   N × M div.loan__item cards
+  abbhome.html    N partners in __NEXT_DATA__, mtkPartnerProjectsCount = M
+
+The corpus is deliberately messy, like the real portals:
+  - Azerbaijani names and addresses (ə, ş, ç, ğ, ı, ö, ü, İ)
+  - missing fields (no website / email / socials, empty addresses, partners
+    without complexes, null logos)
+  - label variants ("min. 30%", "30%", "30%-dən"; "20 ilədək", "maks. 25 il";
+    "Tel:" vs "Tel.:"; numbers sent as int, float or string)
+
+Output is streamed chunk by chunk, so 10^6-record files never sit in memory,
+and is fully determined by --seed.
+
+Usage:
+  python benchmarks/synthetic.py --partners 1000 --complexes 10 --out /tmp/corpus
+  python benchmarks/bench.py --fixtures /tmp/corpus --scales 1 --stage birbank
+"""
+
+import argparse
+import html
+import json
+import os
+import random
+from typing import Iterator
+
+FIRST_WORDS = [
+    "Ağ", "Yaşıl", "Gənc", "Şəhər", "Xəzər", "Günəş", "Qızıl", "Ulduz", "Dəniz",
+    "Çinar", "Bağ", "Səma", "İnci", "Göy", "Möhtəşəm", "Gözəl", "Şirin", "Üfüq",
+]
+SECOND_WORDS = [
+    "Residence", "Park", "Evləri", "Towers", "City", "Plaza", "Məhəlləsi",
+    "Bağları", "Sahil", "Ev", "Kompleksi", "Garden",
+]
+COMPANY_SUFFIXES = ["MMC", "İnşaat MMC", "Group", "Construction", "Development", "QSC"]
+CITIES = ["Bakı", "Sumqayıt", "Gəncə", "Xırdalan", "Abşeron", "Mingəçevir", "Şəki", "Lənkəran"]
+DISTRICTS = ["Nəsimi", "Yasamal", "Xətai", "Nərimanov", "Binəqədi", "Səbail", "Suraxanı", "Xəzər"]
+STREETS = [
+    "Səməd Vurğun", "Füzuli", "Nizami", "Həsən bəy Zərdabi", "Şəhriyar", "Üzeyir Hacıbəyov",
+    "Qurban Abbasov", "Mərdanov qardaşları", "Ağa Nemətulla", "Cəfər Cabbarlı",
+]
+DOWN_PAYMENTS = [10, 15, 20, 30]
+RATES = [5, 8, 10, 11, 12, 16.5]
+TERMS = [10, 15, 20, 25, 30]
+
+# BirBank-like bounding box, with a few points left deliberately outside.
+LAT_RANGE = (38.4, 41.9)
+LON_RANGE = (44.8, 50.6)
+
+
+def _maybe(rng: random.Random, p_missing: float, value):
+    return None if rng.random() < p_missing else value
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_WORDS)} {rng.choice(SECOND_WORDS)}"
+
+
+def _company(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(FIRST_WORDS)} {rng.choice(SECOND_WORDS)} {rng.choice(COMPANY_SUFFIXES)} {i}"
+
+
+def _address(rng: random.Random) -> str:
+    city = rng.choice(CITIES)
+    variant = rng.random()
+    street = rng.choice(STREETS)
+    num = rng.randint(1, 250)
+    if variant < 0.4:
+        return f"{city} şəh., {rng.choice(DISTRICTS)} ray., {street} küç. {num}"
+    if variant < 0.7:
+        return f"{street} küçəsi {num}, {city}"
+    if variant < 0.9:
+        return f"{city} şəhəri, {street} prospekti {num} "
+    return ""
+
+
+def _phone(rng: random.Random) -> str:
+    prefix = rng.choice(["50", "51", "55", "70", "77", "99", "12"])
+    digits = f"{rng.randint(200, 999)}{rng.randint(10, 99)}{rng.randint(10, 99)}"
+    variant = rng.random()
+    if variant < 0.35:
+        return f"+994 {prefix} {digits[:3]} {digits[3:5]} {digits[5:]}"
+    if variant < 0.6:
+        return f"+994{prefix}{digits} *{rng.randint(1000, 9999)}"
+    if variant < 0.8:
+        return f"0{prefix}{digits}"
+    return f"*{rng.randint(1000, 9999)}"
+
+
+def _slug(name: str, i: int) -> str:
+    table = str.maketrans("əşçğıöüƏŞÇĞÖÜİ", "escgiouESCGOUI")
+    return f"{i}-" + "-".join(name.translate(table).lower().split())
+
+
+def _pct_label(rng: random.Random, value) -> str:
+    return rng.choice([f"{value}%", f"min. {value}%", f"{value}%-dən", f"{value} %"])
+
+
+def _term_label(rng: random.Random, years: int) -> str:
+    return rng.choice([f"{years} ilədək", f"{years} il", f"maks. {years} il"])
+
+
+def _number(rng: random.Random, value: float):
+    """BirBank sends numbers as int, float or (rarely) string."""
+    variant = rng.random()
+    if variant < 0.5:
+        return value
+    if variant < 0.9:
+        return float(value)
+    return str(value)
+
+
+# ---------------------------------------------------------------------------
+# BirBank — JSON API
+# ---------------------------------------------------------------------------
+
+def iter_birbank(partners: int, complexes: int, seed: int = 0) -> Iterator[str]:
+    rng = random.Random(seed)
+    yield '{"message": "Success", "data": {"totalElements": %d, "responseDto": [' % partners
+    complex_id = 0
+    for i in range(1, partners + 1):
+        name = _company(rng, i)
+        n_complexes = 0 if rng.random() < 0.05 else complexes
+        items = []
+        for _ in range(n_complexes):
+            complex_id += 1
+            cname = _name(rng)
+            inside = rng.random() > 0.01
+            items.append({
+                "id": complex_id,
+                "name": _maybe(rng, 0.02, cname),
+                "regionId": _maybe(rng, 0.1, rng.randint(1, 60)),
+                "latitude": _maybe(rng, 0.05, round(rng.uniform(*LAT_RANGE), 6) if inside
+                                   else round(rng.uniform(0, 90), 6)),
+                "longitude": _maybe(rng, 0.05, round(rng.uniform(*LON_RANGE), 6) if inside
+                                    else round(rng.uniform(0, 180), 6)),
+                "logo": _maybe(rng, 0.1, f"{rng.getrandbits(128):032x}.jpeg"),
+                "slug": _slug(cname, complex_id),
+            })
+        partner = {
+            "id": i,
+            "slug": _slug(name, i),
+            "logo": _maybe(rng, 0.05, f"{rng.getrandbits(128):032x}.png"),
+            "name": name,
+            "mobileNumber1": _maybe(rng, 0.05, _phone(rng)),
+            "mobileNumber2": _maybe(rng, 0.7, _phone(rng)),
+            "phoneNumber": _maybe(rng, 0.4, rng.choice([rng.randint(1000, 9999),
+                                                        f"012{rng.randint(1000000, 9999999)}"])),
+            "email": _maybe(rng, 0.7, f"info@{_slug(name, i)}.az"),
+            "website": _maybe(rng, 0.4, f"www.{_slug(name, i)}.az"),
+            "facebook": _maybe(rng, 0.7, f"www.facebook.com/{_slug(name, i)}"),
+            "instagram": _maybe(rng, 0.6, f"www.instagram.com/{_slug(name, i)}/"),
+            "address": _maybe(rng, 0.1, _address(rng)),
+            "minLoanAmount": _number(rng, rng.choice([20000, 30000])),
+            "maxLoanAmount": _number(rng, 500000),
+            "mortgageRate": _maybe(rng, 0.02, _number(rng, rng.choice([5, 16.5]))),
+            "mortgagePeriod": _number(rng, rng.choice([20, 25, 30])),
+            "initialPayment": _maybe(rng, 0.02, _number(rng, rng.choice([15, 20, 30]))),
+            "complexes": items if items or rng.random() < 0.5 else None,
+        }
+        yield ("" if i == 1 else ",") + json.dumps(partner, ensure_ascii=False)
+    yield "]}}"
+
+
+# ---------------------------------------------------------------------------
+# PASHA Bank — server-rendered cards
+# ---------------------------------------------------------------------------
+
+def _pasha_term_li(label: str) -> str:
+    prefix, _, rest = label.partition(" ")
+    if prefix in ("min.", "maks.") and rest:
+        return (f'<li><span class="min_prefix">{prefix}</span> '
+                f'<span class="fs-5 fw-normal">{html.escape(rest)}</span></li>')
+    return f'<li><span class="fs-5 fw-normal">{html.escape(label)}</span></li>'
+
+
+def iter_pashabank(partners: int, complexes: int, seed: int = 0) -> Iterator[str]:
+    rng = random.Random(seed + 1)
+    yield ('<!DOCTYPE html><html lang="az"><head><meta charset="utf-8">'
+           '<title>Partnyorlar | PAŞA Bank İpoteka</title></head><body>'
+           '<div class="container"><div class="row" id="partners-list">')
+    for i in range(partners * complexes):
+        name = _name(rng)
+        heading = "h3" if rng.random() < 0.3 else "h4"
+        logo = rng.choice([
+            f"/assets/images/banner/{_slug(name, i)}.png",
+            f"assets/images/banner/{_slug(name, i)}.png",
+            f"https://ipoteka.pashabank.az/assets/images/banner/{_slug(name, i)}.png",
+        ])
+        terms = [
+            _pasha_term_li(_pct_label(rng, rng.choice(DOWN_PAYMENTS))),
+            _pasha_term_li(_pct_label(rng, rng.choice(RATES))),
+            _pasha_term_li(_term_label(rng, rng.choice(TERMS))),
+        ]
+        if rng.random() < 0.05:
+            terms = terms[:2]  # card without a term entry
+        badges = []
+        for alt, value in (("location", _address(rng)), ("phone", _phone(rng)),
+                           ("globus", _maybe(rng, 0.6, f"www.{_slug(name, i)}.az"))):
+            if value:
+                badges.append(
+                    f'<li><div class="partner-card__contacts-badge">'
+                    f'<img src="/assets/icons/{alt}.svg" alt="{alt}"><p>{html.escape(value)}</p>'
+                    f'</div></li>')
+        yield (f'<div class="col-lg-12"><div class="h-100 w-100"><div class="row">'
+               f'<div class="col-md-4 partner-image">'
+               f'<img class="partner-card__logo" src="{html.escape(logo)}" alt="{html.escape(name)}">'
+               f'</div><div class="col-md-8 mob-pad">'
+               f'<div class="title"><{heading}>{html.escape(name)}</{heading}></div>'
+               f'<ul class="d-flex list-unstyled">{"".join(terms)}</ul>'
+               f'<ul class="list-unstyled">{"".join(badges)}</ul>'
+               f'</div></div></div></div>')
+    yield "</div></div></body></html>"
+
+
+# ---------------------------------------------------------------------------
+# Xalq Bank — Nuxt SSR cards
+# ---------------------------------------------------------------------------
+
+def iter_xalqbank(partners: int, complexes: int, seed: int = 0) -> Iterator[str]:
+    rng = random.Random(seed + 2)
+    yield ('<!DOCTYPE html><html lang="az"><head><meta charset="utf-8">'
+           '<title>Partnyor şirkətlər üzrə ipoteka | Xalq Bank</title></head><body>'
+           '<div id="__nuxt"><div class="loan">')
+    for i in range(partners * complexes):
+        name = _name(rng)
+        logo = (f"https://api.xalqbank.az/resized/resize0x120/center/temp/processing/"
+                f"{_slug(name, i)}.jpg")
+        address = _address(rng)
+        tel_prefix = rng.choice(["Tel:", "Tel.:", "TEL:", "Tel: &nbsp;;"])
+        paragraphs = []
+        if address or rng.random() < 0.5:
+            paragraphs.append(f"<p>{rng.choice(['Ünvan:', 'ÜNVAN:'])} {html.escape(address)}</p>")
+        paragraphs.append(f"<p>{tel_prefix} {html.escape(_phone(rng))}</p>")
+        if rng.random() < 0.9:
+            site = rng.choice([f"https://{_slug(name, i)}.az/",
+                               f"https://www.instagram.com/{_slug(name, i)}/"])
+            paragraphs.append(f'<p><a href="{site}" target="_blank">{site}</a></p>')
+        region = _maybe(rng, 0.05, rng.choice(CITIES)) or ""
+        yield (f'<div class="loan__item"><div class="about-card__head">'
+               f'<span class="loan__icon"><img src="{logo}" alt="{html.escape(name)}"></span>'
+               f'</div><div class="loan__body">'
+               f'<p class="font-600">{html.escape(name)}<span></span></p>'
+               f'<span class="partners__categ">{html.escape(region)}</span>'
+               f'<div class="loan__text mb-0">{"".join(paragraphs)}</div>'
+               f'</div></div>')
+    yield "</div></div></body></html>"
+
+
+# ---------------------------------------------------------------------------
+# ABB Home — Next.js __NEXT_DATA__
+# ---------------------------------------------------------------------------
+
+def abbhome_partner(rng: random.Random, i: int, complexes: int) -> dict:
+    name = _company(rng, i)
+    info = [{"logicalKey": "phone", "key": "Telefon", "label": _phone(rng)}]
+    address = _address(rng)
+    if address:
+        info.append({"logicalKey": "address", "key": "Ünvan", "label": address})
+    if rng.random() < 0.3:
+        info.append({"logicalKey": "website", "key": "Sayt", "label": f"www.{_slug(name, i)}.az"})
+    return {
+        "id": i,
+        "title": name,
+        "slug": _slug(name, i),
+        "mtkPartnerProjectsCount": _maybe(rng, 0.05, complexes),
+        "mainImage": _maybe(rng, 0.05, {"url": f"https://cdn.abbhome.az/{_slug(name, i)}.webp"}),
+        "additionalInfo": info,
+    }
+
+
+def abbhome_product(rng: random.Random) -> dict:
+    return {"additionalInfo": {
+        "minimumDownPayment": {"label": rng.choice(["10%-dən", "10 %-dən", "min. 10%"])},
+        "minimumAnnualInterestRate": {"label": rng.choice(["11%-dən", "11 %-dən"])},
+        "maximumDuration": {"label": rng.choice(["20 ilədək", "20 il"])},
+        "maximumLoanAmount": {"label": rng.choice(["300,000 AZN", "300 000 AZN", "300000 ₼"])},
+    }}
+
+
+def abbhome_projects(rng: random.Random, partner: dict, complexes: int) -> dict:
+    """__NEXT_DATA__ of one partner detail page (used by the mock server)."""
+    projects = []
+    for j in range(complexes):
+        name = _name(rng)
+        projects.append({
+            "id": j + 1,
+            "title": name,
+            "slug": _slug(name, j),
+            "address": _maybe(rng, 0.3, _address(rng)),
+            "latitude": _maybe(rng, 0.5, round(rng.uniform(*LAT_RANGE), 6)),
+            "longitude": _maybe(rng, 0.5, round(rng.uniform(*LON_RANGE), 6)),
+            "mainImage": _maybe(rng, 0.2, {"url": f"https://cdn.abbhome.az/{_slug(name, j)}.webp"}),
+        })
+    return {"props": {"pageProps": {"partner": dict(partner, projects=projects)}},
+            "page": "/[slug]/[partner]", "query": {"partner": partner["slug"]},
+            "buildId": "synthetic"}
+
+
+def next_data_page(next_data: dict, title: str = "ABB Home") -> str:
+    blob = json.dumps(next_data, ensure_ascii=False).replace("</", "<\\/")
+    return ('<!DOCTYPE html><html lang="az"><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title></head><body><div id="__next"></div>'
+            f'<script id="__NEXT_DATA__" type="application/json">{blob}</script>'
+            "</body></html>")
+
+
+def iter_abbhome(partners: int, complexes: int, seed: int = 0) -> Iterator[str]:
+    rng = random.Random(seed + 3)
+    yield ('<!DOCTYPE html><html lang="az"><head><meta charset="utf-8">'
+           '<title>ABB Home</title></head><body><div id="__next"></div>'
+           '<script id="__NEXT_DATA__" type="application/json">'
+           '{"props": {"pageProps": {"partners": [')
+    for i in range(1, partners + 1):
+        blob = json.dumps(abbhome_partner(rng, i, complexes), ensure_ascii=False)
+        yield ("" if i == 1 else ",") + blob.replace("</", "<\\/")
+    product = json.dumps(abbhome_product(rng), ensure_ascii=False)
+    yield (f'], "product": {product}}}}}, "page": "/[slug]", "query": {{}}, '
+           f'"buildId": "synthetic"}}</script></body></html>')
+
+
+GENERATORS = {
+    "birbank.json": iter_birbank,
+    "pashabank.html": iter_pashabank,
+    "xalqbank.html": iter_xalqbank,
+    "abbhome.html": iter_abbhome,
+}
+
+
+def generate(name: str, partners: int, complexes: int, seed: int = 0) -> str:
+    """Whole payload as one string — convenient for small corpora."""
+    return "".join(GENERATORS[name](partners, complexes, seed))
+
+
+def write(path: str, chunks: Iterator[str], buffer_size: int = 1 << 20) -> int:
+    written = 0
+    with open(path, "w", encoding="utf-8", buffering=buffer_size) as f:
+        for chunk in chunks:
+            written += f.write(chunk)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic partner corpus.")
+    parser.add_argument("--partners", "-n", type=int, default=1000)
+    parser.add_argument("--complexes", "-m", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--only", action="append", choices=sorted(GENERATORS),
+                        help="generate just this file (repeatable)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for name in args.only or GENERATORS:
+        path = os.path.join(args.out, name)
+        size = write(path, GENERATORS[name](args.partners, args.complexes, args.seed))
+        print(f"[OK] {name}: {size:,} chars → {os.path.abspath(path)}")
+
+
+if __name__ == "__main__":
+    main()
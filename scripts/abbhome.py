@@ -21,13 +21,21 @@ Data structure (from __NEXT_DATA__.props.pageProps):
     .maximumLoanAmount.label
 """
 
-import csv
 import json
 import os
+from collections.abc import Callable
 import requests
 from bs4 import BeautifulSoup
 
+import dataio
+import instrument
+import probe
+import sessions
+from textnorm import clean
+
 PAGE_URL = "https://abbhome.az/partnyor-tikinti-sirketleri-uzre-ipoteka-krediti"
+# Change probe: the embedded Next.js payload is all the CSV is built from.
+PROBE_BLOCK = ('id="__NEXT_DATA__"', "</script>")
 
 HEADERS = {
     "accept": (
@@ -48,19 +56,9 @@ HEADERS = {
     ),
 }
 
-# Update if site returns 403 / empty data
-COOKIES = {
-    "dtCookie": (
-        "v_4_srv_1_sn_44C64C3530677FA829B310D203B4993A_perc_100000_ol_0"
-        "_mul_1_app-3A2328cc1fb61a3116_0_rcs-3Acss_1"
-    ),
-    "22c5a46d7f8c5fa2a26ced8513e092dd": "052074494e3f0dedcbcabb07485fb6d4",
-    "TS01c34874": (
-        "01f87268a800c8235e24022de801cc3dd27fb0d824b4ab116e49248e93cddc6f"
-        "cc8ac49458ba010fb7d746391376e00a66d3dcdb41d7855057b2c3aeaa5e4962a"
-        "21c70521e38d37b88938f0d41f06d3f1dbdfb029a"
-    ),
-}
+# WAF / session cookies: obtained by a warm-up request and kept in
+# data/sessions/, refreshed on 403 (see sessions.py).
+SESSION = sessions.SessionStore(PAGE_URL, HEADERS)
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "abbhome.csv")
@@ -80,23 +78,32 @@ CSV_FIELDS = [
 ]
 
 
-def fetch_next_data(url: str) -> dict | None:
-    session = requests.Session()
-    session.headers.update(HEADERS)
-    session.cookies.update(COOKIES)
+def fetch_html(url: str, headers: dict | None = None) -> requests.Response | None:
+    """GET the page; may be a 304 if headers carry the probe's validators."""
     try:
-        resp = session.get(url, timeout=30)
+        resp = SESSION.get(url, headers=headers, timeout=30)
         resp.raise_for_status()
         resp.encoding = "utf-8"
-        soup = BeautifulSoup(resp.text, "html.parser")
-        tag = soup.find("script", id="__NEXT_DATA__")
-        if not tag or not tag.string:
-            print("[ERROR] __NEXT_DATA__ not found in page.")
-            return None
-        return json.loads(tag.string)
+        return resp
     except requests.RequestException as exc:
         print(f"[ERROR] {exc}")
         return None
+
+
+def fetch_next_data(url: str) -> dict | None:
+    resp = fetch_html(url)
+    return extract_next_data(resp.text) if resp is not None else None
+
+
+def extract_next_data(html: str) -> dict | None:
+    """Parse the embedded <script id="__NEXT_DATA__"> JSON out of a page."""
+    soup = BeautifulSoup(html, "html.parser")
+    tag = soup.find("script", id="__NEXT_DATA__")
+    if not tag or not tag.string:
+        print("[ERROR] __NEXT_DATA__ not found in page.")
+        return None
+    try:
+        return json.loads(tag.string)
     except json.JSONDecodeError as exc:
         print(f"[ERROR] JSON parse failed: {exc}")
         return None
@@ -106,27 +113,28 @@ def _ai(info_list: list, key: str) -> str:
     """Extract label from additionalInfo list by logicalKey."""
     for item in info_list:
         if isinstance(item, dict) and item.get("logicalKey") == key:
-            return (item.get("label") or "").strip()
+            return clean(item.get("label"))
     return ""
 
 
-def parse_partners(next_data: dict) -> list[dict]:
+def parse_partners(next_data: dict,
+                   emit: Callable[[dict], None] | None = None) -> list[dict]:
     page_props = next_data.get("props", {}).get("pageProps", {})
     partners_raw = page_props.get("partners", [])
     product = page_props.get("product", {})
 
     # Product-level mortgage terms (apply to all partners on this page)
     prod_add = product.get("additionalInfo", {}) or {}
-    min_down = (prod_add.get("minimumDownPayment") or {}).get("label", "")
-    min_rate = (prod_add.get("minimumAnnualInterestRate") or {}).get("label", "")
-    max_term = (prod_add.get("maximumDuration") or {}).get("label", "")
-    max_loan = (prod_add.get("maximumLoanAmount") or {}).get("label", "")
+    min_down = clean((prod_add.get("minimumDownPayment") or {}).get("label"))
+    min_rate = clean((prod_add.get("minimumAnnualInterestRate") or {}).get("label"))
+    max_term = clean((prod_add.get("maximumDuration") or {}).get("label"))
+    max_loan = clean((prod_add.get("maximumLoanAmount") or {}).get("label"))
 
     records = []
     for p in partners_raw:
         ai = p.get("additionalInfo") or []
         record = {
-            "name": (p.get("title") or "").strip(),
+            "name": clean(p.get("title")),
             "project_count": (p.get("mtkPartnerProjectsCount") or ""),
             "phone": _ai(ai, "phone"),
             "address": _ai(ai, "address"),
@@ -136,34 +144,41 @@ def parse_partners(next_data: dict) -> list[dict]:
             "max_term": max_term,
             "max_loan_amount": max_loan,
             "logo_url": (p.get("mainImage") or {}).get("url", ""),
-            "slug": (p.get("slug") or "").strip(),
+            "slug": clean(p.get("slug")),
         }
         records.append(record)
+        if emit:
+            emit(record)
 
     return records
 
 
-def save_csv(records: list[dict], filepath: str) -> None:
-    if not records:
-        print("[WARN] No records to save.")
-        return
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(records)
-    print(f"[OK] Saved {len(records)} records → {os.path.abspath(filepath)}")
-
-
+@instrument.job("abbhome")
 def main() -> None:
+    emit = dataio.ndjson_emitter("abbhome", CSV_FIELDS)  # None unless NDJSON_OUT is set
     print(f"[INFO] Fetching {PAGE_URL}")
-    next_data = fetch_next_data(PAGE_URL)
+    chk = probe.Probe(OUTPUT_FILE)
+    with instrument.stage("abbhome.fetch"):
+        resp = fetch_html(PAGE_URL, chk.headers())
+    if resp is None:
+        instrument.fail("page fetch failed")
+        return
+    fingerprint = probe.block_hash(resp.text, *PROBE_BLOCK)
+    if chk.unchanged(fingerprint, resp):
+        chk.skip(resp)
+        return
+    next_data = extract_next_data(resp.text)
     if next_data is None:
+        instrument.fail("__NEXT_DATA__ missing")
         return
 
-    partners = parse_partners(next_data)
+    with instrument.stage("abbhome.parse") as st:
+        partners = parse_partners(next_data, emit)
+        st.records = len(partners)
     print(f"[INFO] Found {len(partners)} partners.")
-    save_csv(partners, OUTPUT_FILE)
+    with instrument.stage("abbhome.save_csv") as st:
+        st.rows = dataio.save_csv(partners, OUTPUT_FILE, CSV_FIELDS)
+    chk.save(fingerprint, resp)
 
     if partners:
         print("\n--- Preview (first 3) ---")
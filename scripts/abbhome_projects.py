@@ -0,0 +1,288 @@
+"""
+ABB Home Partner Project Crawler
+Reads: data/abbhome.csv  (partner list with detail-page `slug`)
+URL: https://abbhome.az/partnyor-tikinti-sirketleri-uzre-ipoteka-krediti/<slug>
+Source: __NEXT_DATA__ JSON embedded in each partner detail page (Next.js SSR)
+Output: data/abbhome_projects.csv
+
+Data structure (from __NEXT_DATA__.props.pageProps), first match wins:
+  projects[]  |  partner.projects[]  |  partner.mtkPartnerProjects[]
+    .title            → project name
+    .slug             → project slug
+    .address          → project address (if present)
+    .latitude / .longitude  (if present)
+    .mainImage.url    → project image URL
+    .additionalInfo[] → [{logicalKey, key, label}], logicalKey=address fallback
+
+Output rows: one per project, with partner info repeated (same shape as
+birbank.py emits per complex). If a partner page lists no projects, one row
+is emitted for the partner itself.
+
+Progress is checkpointed to data/abbhome_projects.checkpoint.jsonl — one line
+per finished partner — so an interrupted crawl resumes where it stopped.
+Each line is appended with a single O_APPEND write under an exclusive
+flock, so crawl workers in several processes (jobqueue.py) can share the
+file without interleaving. Lines carry the snapshot id of the abbhome.csv
+they were crawled from; lines from another snapshot are not reused. The
+checkpoint is removed after the CSV has been written.
+
+Usage:
+  python scripts/abbhome_projects.py [--base-url http://127.0.0.1:8000]
+                                     [--workers 4] [--rate 2] [--fresh]
+"""
+
+import argparse
+import json
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: O_APPEND alone
+    fcntl = None
+
+import requests
+
+import dataio
+import http_client
+import instrument
+from abbhome import PAGE_URL, SESSION, _ai, extract_next_data
+from textnorm import clean
+
+DETAIL_URL = PAGE_URL + "/{slug}"
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+INPUT_FILE = os.path.join(DATA_DIR, "abbhome.csv")
+OUTPUT_FILE = os.path.join(DATA_DIR, "abbhome_projects.csv")
+CHECKPOINT_FILE = os.path.join(DATA_DIR, "abbhome_projects.checkpoint.jsonl")
+
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 2.0  # requests per second, across all workers
+
+CSV_FIELDS = [
+    # Project-level
+    "project_name",
+    "project_slug",
+    "project_address",
+    "project_image_url",
+    "latitude",
+    "longitude",
+    # Partner-level
+    "partner_name",
+    "partner_slug",
+    "partner_phone",
+    "partner_logo_url",
+    # Mortgage terms (product-level, from abbhome.csv)
+    "min_down_payment",
+    "min_annual_rate",
+    "max_term",
+    "max_loan_amount",
+]
+
+
+def read_partners(path: str = INPUT_FILE) -> list[dict]:
+    if dataio.resolve(path) is None:
+        print(f"[WARN] {os.path.basename(path)} not found – run abbhome.py first.")
+        return []
+    return [r for r in dataio.read_csv(path) if r.get("slug")]
+
+
+def load_checkpoint(path: str = CHECKPOINT_FILE, snapshot: str | None = None) -> dict[str, list[dict]]:
+    """slug → rows for every partner a previous run finished from the same abbhome.csv snapshot."""
+    done: dict[str, list[dict]] = {}
+    if not os.path.exists(path):
+        return done
+    stale = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn last line from an interrupted write — that partner
+                # simply gets fetched again.
+                continue
+            if entry.get("snapshot") != snapshot:
+                stale += 1
+                continue
+            done[entry["slug"]] = entry["rows"]
+    if stale:
+        print(f"[INFO] Checkpoint: {stale} partner(s) from another abbhome.csv snapshot – refetching.")
+    return done
+
+
+def _projects(next_data: dict) -> list[dict]:
+    page_props = next_data.get("props", {}).get("pageProps", {})
+    partner = page_props.get("partner") or {}
+    for candidate in (
+        page_props.get("projects"),
+        partner.get("projects"),
+        partner.get("mtkPartnerProjects"),
+    ):
+        if isinstance(candidate, list):
+            return candidate
+    return []
+
+
+def parse_projects(next_data: dict, partner: dict) -> list[dict]:
+    partner_base = {
+        "partner_name": partner.get("name", ""),
+        "partner_slug": partner.get("slug", ""),
+        "partner_phone": partner.get("phone", ""),
+        "partner_logo_url": partner.get("logo_url", ""),
+        "min_down_payment": partner.get("min_down_payment", ""),
+        "min_annual_rate": partner.get("min_annual_rate", ""),
+        "max_term": partner.get("max_term", ""),
+        "max_loan_amount": partner.get("max_loan_amount", ""),
+    }
+
+    records = []
+    for p in _projects(next_data):
+        ai = p.get("additionalInfo") or []
+        rec = dict(partner_base)
+        rec.update({
+            "project_name": clean(p.get("title") or p.get("name")),
+            "project_slug": clean(p.get("slug")),
+            "project_address": clean(p.get("address") or _ai(ai, "address")),
+            "project_image_url": (p.get("mainImage") or {}).get("url", ""),
+            "latitude": str(p.get("latitude") or ""),
+            "longitude": str(p.get("longitude") or ""),
+        })
+        records.append(rec)
+
+    if not records:
+        # Partner with no projects listed — emit one row
+        rec = dict(partner_base)
+        rec.update({
+            "project_name": "",
+            "project_slug": "",
+            "project_address": "",
+            "project_image_url": "",
+            "latitude": "",
+            "longitude": "",
+        })
+        records.append(rec)
+    return records
+
+
+class ProjectCrawler:
+    def __init__(self, workers: int = DEFAULT_WORKERS, rate: float = DEFAULT_RATE,
+                 checkpoint_path: str = CHECKPOINT_FILE,
+                 emit: Callable[[dict], None] | None = None,
+                 snapshot: str | None = None):
+        self.workers = workers
+        self.emit = emit  # NDJSON stream: rows go out as each page is parsed
+        # Rate limit and retries are handled by the shared scheduler.
+        http_client.configure(urlsplit(PAGE_URL).netloc, rate=rate, max_concurrency=workers)
+        self.checkpoint_path = checkpoint_path
+        self.snapshot = snapshot  # of the abbhome.csv the partners come from
+
+    def _record(self, slug: str, rows: list[dict]) -> None:
+        line = json.dumps({"slug": slug, "snapshot": self.snapshot, "rows": rows}, ensure_ascii=False)
+        data = (line + "\n").encode("utf-8")
+        # One write on an O_APPEND descriptor, under an exclusive lock: threads
+        # and other worker processes each add whole lines.
+        fd = os.open(self.checkpoint_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)  # releases the lock
+
+    def crawl_one(self, partner: dict) -> list[dict] | None:
+        url = DETAIL_URL.format(slug=partner["slug"])
+        try:
+            # Per-thread sessions over abbhome's shared, persistent cookie jar.
+            resp = SESSION.get(url, timeout=30)
+            resp.raise_for_status()
+            resp.encoding = "utf-8"
+        except requests.RequestException as exc:
+            print(f"[ERROR] {partner['slug']}: {exc}")
+            return None
+        next_data = extract_next_data(resp.text)
+        if next_data is None:
+            return None
+        rows = parse_projects(next_data, partner)
+        self._record(partner["slug"], rows)
+        if self.emit:
+            for row in rows:
+                self.emit(row)
+        return rows
+
+    def crawl(self, partners: list[dict], done: dict[str, list[dict]]) -> tuple[list[dict], int]:
+        """Crawl every partner not already in `done`; return (rows, failures)."""
+        pending = [p for p in partners if p["slug"] not in done]
+        print(f"[INFO] Partners: {len(partners)} "
+              f"({len(partners) - len(pending)} from checkpoint, {len(pending)} to fetch)")
+
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        results = dict(done)
+        if self.emit:
+            for rows in done.values():
+                for row in rows:
+                    self.emit(row)
+        failures = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for partner, rows in zip(pending, pool.map(self.crawl_one, pending)):
+                if rows is None:
+                    failures += 1
+                else:
+                    results[partner["slug"]] = rows
+
+        # Keep the partner order of abbhome.csv
+        records = []
+        for p in partners:
+            records.extend(results.get(p["slug"], []))
+        return records, failures
+
+
+@instrument.job("abbhome_projects")
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--base-url", help="override scheme://host, e.g. a local stand-in server")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="max requests per second (default: %(default)s)")
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+    emit = dataio.ndjson_emitter("abbhome_projects", CSV_FIELDS)  # None unless NDJSON_OUT is set
+
+    partners = read_partners()
+    if not partners:
+        return
+
+    if args.fresh and os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+    snapshot = dataio.snapshot_id(INPUT_FILE)
+    done = load_checkpoint(snapshot=snapshot)
+
+    if args.base_url:
+        http_client.set_base_url(args.base_url)
+    crawler = ProjectCrawler(args.workers, args.rate, emit=emit, snapshot=snapshot)
+    with instrument.stage("abbhome_projects.crawl") as st:
+        records, failures = crawler.crawl(partners, done)
+        st.records = len(records)
+    if failures:
+        print(f"[WARN] {failures} partner page(s) failed – rerun to resume from checkpoint.")
+        instrument.fail(f"{failures} partner page(s) failed")
+        return
+
+    print(f"[INFO] Project rows: {len(records)}")
+    with instrument.stage("abbhome_projects.save_csv") as st:
+        st.rows = dataio.save_csv(records, OUTPUT_FILE, CSV_FIELDS)
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+    if records:
+        print("\n--- Preview (first 3) ---")
+        for r in records[:3]:
+            print(r)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Mortgage Affordability Engine
+Reads:  data/data.csv  (unified offers from combine.py)
+Output: stdout table, optionally data/affordability.csv (--out)
+
+For every offer × property price:
+  loan             = price × (1 − down_payment%)
+  monthly_payment  = loan × r / (1 − (1 + r)^−n)     r = annual_rate / 12, n = months
+  total_interest   = monthly_payment × n − loan
+  total_cost       = price − loan + monthly_payment × n   (down payment + installments)
+  feasible         = min_loan_amount ≤ loan ≤ max_loan_amount
+
+Payment and interest are linear in the loan, so each offer reduces to a
+handful of per-offer factors (loan-to-value, annuity factor, loan limits)
+and the whole grid is one broadcast multiply in float32. Offers are parsed
+once per data snapshot (content hash of data.csv) and grids are cached per
+price tuple, so repeated queries are served from memory.
+
+Label formats handled (four banks, four schemas):
+  down_payment   "30.0", "30%", "min. 30%", "10%-dən"   → 30.0
+  annual_rate    "16.5", "min. 8%", "11%-dən"           → 16.5
+  term           "20", "20 ilədək"                      → 20 years
+  loan amounts   "500000.0", "300,000 AZN"              → 500000.0
+                 ("1.500.000", "1 500 000", "1,234,567.89" grouping too)
+A label whose number cannot be read parses as NaN, never an error.
+"min." / "-dən" labels are taken at face value, i.e. the bank's best case.
+Offers without a rate or term (e.g. Xalq Bank) are left out; a missing
+down payment counts as 0% and a missing loan limit as no limit.
+
+Usage:
+  python scripts/affordability.py --prices 80000,150000,250000
+  python scripts/affordability.py --prices 50000:500000:25000 --out data/affordability.csv
+"""
+
+import argparse
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+
+import numpy as np
+
+import dataio
+import instrument
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DATA_CSV = os.path.join(DATA_DIR, "data.csv")
+
+GRID_CACHE_SIZE = 8        # price grids kept per engine
+ENGINE_CACHE_SIZE = 4      # snapshots kept in memory
+CHUNK_OFFERS = 8192        # offers per block in chunked reductions
+OUTPUT_FIELDS = [
+    "source", "name", "partner_name", "price", "loan", "down_payment_amount",
+    "monthly_payment", "total_interest", "total_cost", "feasible",
+]
+
+# Space-grouped thousands ("1 500 000", also NBSP / narrow NBSP) first,
+# then digits joined by any mix of "." and ",".
+_NUMBER = re.compile(r"\d{1,3}(?:[ \u00a0\u202f]\d{3})+(?:[.,]\d+)?(?!\d)|\d+(?:[.,]\d+)*")
+_GROUPED_COMMA = re.compile(r"\d{1,3}(,\d{3})+")
+
+
+@lru_cache(maxsize=4096)  # labels repeat heavily across offers
+def parse_number(label: str) -> float:
+    """
+    First number in a free-text label; NaN if there is none or it cannot be
+    read. "min. 8%" → 8.0, "300,000 AZN" / "300 000 AZN" → 300000.0,
+    "1.500.000" → 1500000.0, "1,234,567.89" / "1.234.567,89" → 1234567.89.
+    A single "." is a decimal point, a single "," one too unless it groups
+    thousands ("16,5" → 16.5, "300,000" → 300000.0).
+    """
+    m = _NUMBER.search(label or "")
+    if not m:
+        return float("nan")
+    text = re.sub(r"[ \u00a0\u202f]", "", m.group())
+    if "," in text and "." in text:
+        decimal = "," if text.rfind(",") > text.rfind(".") else "."
+        text = text.replace("." if decimal == "," else ",", "")       # the other one groups
+    elif text.count(",") > 1 or text.count(".") > 1 or _GROUPED_COMMA.fullmatch(text):
+        text = text.replace(",", "").replace(".", "")                 # thousands only
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:  # e.g. "1.2.3,4,5": no sensible reading
+        return float("nan")
+
+
+def rate_tier(rate: float) -> str:
+    """The tier key of a parsed rate (16.5 → "16.5%"), shared by rollups.py, api.py and dashboard.py."""
+    return f"{rate:g}%"
+
+
+@dataclass
+class Grid:
+    """
+    Result of one batched evaluation, arrays shaped (offers, prices).
+    Interest and total cost are derived on first access, so a 10^5 × 10^3
+    grid only pays for the matrices a caller actually reads.
+    """
+    prices: np.ndarray
+    months: np.ndarray        # (offers, 1)
+    loan: np.ndarray
+    monthly_payment: np.ndarray
+    feasible: np.ndarray
+
+    @cached_property
+    def total_interest(self) -> np.ndarray:
+        return self.monthly_payment * self.months - self.loan
+
+    @cached_property
+    def total_cost(self) -> np.ndarray:
+        return self.monthly_payment * self.months + (self.prices[None, :] - self.loan)
+
+
+class AffordabilityEngine:
+    def __init__(self, rows: list[dict], snapshot: str | None = None):
+        self.snapshot = snapshot
+        rate = np.array([parse_number(r.get("annual_rate", "")) for r in rows], dtype=np.float64)
+        years = np.array([parse_number(r.get("term", "")) for r in rows], dtype=np.float64)
+        keep = np.flatnonzero(~np.isnan(rate) & ~np.isnan(years) & (years > 0))
+
+        self.offers = [rows[i] for i in keep]
+        rate, years = rate[keep], years[keep]
+        down = np.array([parse_number(rows[i].get("down_payment", "")) for i in keep])
+        min_loan = np.array([parse_number(rows[i].get("min_loan_amount", "")) for i in keep])
+        max_loan = np.array([parse_number(rows[i].get("max_loan_amount", "")) for i in keep])
+
+        self.months = np.round(years * 12)
+        self.ltv = 1.0 - np.nan_to_num(down, nan=0.0) / 100.0
+        self.min_loan = np.nan_to_num(min_loan, nan=0.0)
+        self.max_loan = np.nan_to_num(max_loan, nan=np.inf)
+
+        r = rate / 1200.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            annuity = r / -np.expm1(-self.months * np.log1p(r))
+        self.annuity = np.where(r > 0, annuity, 1.0 / self.months)   # payment per 1 AZN of loan
+        self.repay = self.annuity * self.months                      # total repaid per 1 AZN
+
+        self._grids: OrderedDict[tuple, Grid] = OrderedDict()
+        self._cheapest: OrderedDict[tuple, tuple[np.ndarray, np.ndarray]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.offers)
+
+    def evaluate(self, prices, dtype=np.float32) -> Grid:
+        """All offers × prices in one broadcast; cached per price tuple."""
+        key = (tuple(float(p) for p in prices), np.dtype(dtype).str)
+        if key in self._grids:
+            self._grids.move_to_end(key)
+            return self._grids[key]
+
+        p = np.asarray(key[0], dtype=dtype)
+        loan = self.ltv.astype(dtype)[:, None] * p[None, :]
+        grid = Grid(
+            prices=p,
+            months=self.months.astype(dtype)[:, None],
+            loan=loan,
+            monthly_payment=loan * self.annuity.astype(dtype)[:, None],
+            feasible=(loan >= self.min_loan.astype(dtype)[:, None])
+                     & (loan <= self.max_loan.astype(dtype)[:, None]),
+        )
+        _remember(self._grids, key, grid, GRID_CACHE_SIZE)
+        return grid
+
+    def cheapest(self, prices, chunk: int = CHUNK_OFFERS) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Per price: index of the feasible offer with the lowest total cost
+        (-1 if none) and that cost. Works in blocks of offers so memory stays
+        bounded for very large offer sets.
+        """
+        key = tuple(float(x) for x in prices)
+        if key in self._cheapest:
+            self._cheapest.move_to_end(key)
+            return self._cheapest[key]
+
+        p = np.asarray(key, dtype=np.float64)
+        best_idx = np.full(p.shape, -1, dtype=np.int64)
+        best_cost = np.full(p.shape, np.inf)
+        for start in range(0, len(self), chunk):
+            sl = slice(start, start + chunk)
+            loan = self.ltv[sl, None] * p[None, :]
+            cost = loan * self.repay[sl, None] + (p[None, :] - loan)
+            cost[(loan < self.min_loan[sl, None]) | (loan > self.max_loan[sl, None])] = np.inf
+            i = cost.argmin(axis=0)
+            c = cost[i, np.arange(len(p))]
+            better = c < best_cost
+            best_idx[better] = i[better] + start
+            best_cost[better] = c[better]
+        _remember(self._cheapest, key, (best_idx, best_cost), GRID_CACHE_SIZE)
+        return best_idx, best_cost
+
+
+def _remember(cache: OrderedDict, key, value, limit: int) -> None:
+    cache[key] = value
+    if len(cache) > limit:
+        cache.popitem(last=False)
+
+
+_ENGINES: OrderedDict[str, AffordabilityEngine] = OrderedDict()
+
+
+def load_engine(path: str = DATA_CSV) -> AffordabilityEngine:
+    """Engine for the current snapshot of path; parsed once per content hash."""
+    snapshot = dataio.snapshot_id(path)
+    if snapshot is None:
+        raise FileNotFoundError(path)
+    engine = _ENGINES.get(snapshot)
+    if engine is None:
+        engine = AffordabilityEngine(dataio.read_csv(path), snapshot)
+        _remember(_ENGINES, snapshot, engine, ENGINE_CACHE_SIZE)
+    else:
+        _ENGINES.move_to_end(snapshot)
+    return engine
+
+
+def parse_prices(spec: str) -> list[float]:
+    """"80000,150000" or "start:stop:step" (stop inclusive)."""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        return list(np.arange(start, stop + step / 2, step))
+    return [float(x) for x in spec.split(",") if x.strip()]
+
+
+def iter_rows(engine: AffordabilityEngine, grid: Grid):
+    for i, offer in enumerate(engine.offers):
+        for j, price in enumerate(grid.prices):
+            loan = float(grid.loan[i, j])
+            yield {
+                "source": offer["source"],
+                "name": offer["name"],
+                "partner_name": offer.get("partner_name", ""),
+                "price": f"{price:.0f}",
+                "loan": f"{loan:.2f}",
+                "down_payment_amount": f"{price - loan:.2f}",
+                "monthly_payment": f"{grid.monthly_payment[i, j]:.2f}",
+                "total_interest": f"{grid.total_interest[i, j]:.2f}",
+                "total_cost": f"{grid.total_cost[i, j]:.2f}",
+                "feasible": int(grid.feasible[i, j]),
+            }
+
+
+@instrument.job("affordability")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mortgage affordability over all partner offers.")
+    parser.add_argument("--prices", default="50000:500000:50000",
+                        help='comma list or start:stop:step in AZN (default: %(default)s)')
+    parser.add_argument("--out", help="write every offer × price row to this CSV")
+    args = parser.parse_args()
+
+    prices = parse_prices(args.prices)
+    with instrument.stage("affordability.load") as st:
+        engine = load_engine()
+        st.records = len(engine)
+    print(f"[INFO] {len(engine)} offers with rate and term × {len(prices)} prices")
+
+    with instrument.stage("affordability.evaluate") as st:
+        grid = engine.evaluate(prices)
+        best, cost = engine.cheapest(prices)
+        st.records = grid.loan.size
+
+    print(f"\n  {'price':>9}  {'feasible':>8}  {'cheapest offer':<40} {'monthly':>9} {'total cost':>12}")
+    for j, price in enumerate(prices):
+        n = int(grid.feasible[:, j].sum())
+        if best[j] < 0:
+            print(f"  {price:>9,.0f}  {n:>8}  {'—':<40}")
+            continue
+        o = engine.offers[best[j]]
+        label = f"{o['source']}: {o['name']}"[:40]
+        print(f"  {price:>9,.0f}  {n:>8}  {label:<40} "
+              f"{grid.monthly_payment[best[j], j]:>9,.0f} {cost[j]:>12,.0f}")
+
+    if args.out:
+        with instrument.stage("affordability.save_csv") as st:
+            st.rows = dataio.write_csv(args.out, iter_rows(engine, grid), OUTPUT_FIELDS)
+        print(f"\n[OK] {st.rows} rows → {os.path.abspath(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
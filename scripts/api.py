@@ -0,0 +1,459 @@
+"""
+Local Query API over data/data.csv
+Serves: http://127.0.0.1:8900  (asyncio, HTTP/1.1 keep-alive, GET/HEAD only)
+
+  GET /offers?source=BirBank&region=Bakı&page=2&per_page=50
+  GET /offers?partner=PMD Group&max_rate=10
+  GET /offers?rate_tier=16.5                  (or 16.5%, "min. 16.5%", …)
+  GET /offers?bbox=40.3,49.7,40.5,50.0        (min_lat,min_lon,max_lat,max_lon)
+  GET /best?name=PMD Group&price=150000       (ranking_index.json, see ranking.py)
+  GET /search?q=zerife eliyeva&limit=10       (search_index.bin, see search.py)
+  GET /trends?dim=source&key=BirBank&grain=week&limit=12
+                                              (rollups.sqlite, see rollups.py)
+  GET /health                                 (snapshot id, row count, cache stats)
+
+The dataset is loaded once into in-memory indexes — posting lists by
+source, partner, region and rate tier, a rate-sorted list for max_rate and
+a latitude-sorted list for bbox — and filters intersect the posting lists,
+smallest first. Each row's JSON is pre-encoded at load time so a page is a
+byte join. Responses carry an ETag (snapshot + canonical query) and
+If-None-Match gets a 304; rendered bodies are kept in an LRU cache.
+/trends reads SQLite, so it runs on a worker thread, off the event loop.
+A request body (which no endpoint uses) is read and discarded so the next
+request on the connection starts clean; an unexpected error in a handler
+is a 500, never a dropped connection.
+
+A poller watches data.csv, its sidecar and both index files; when
+combine.py has written a new snapshot, the new indexes are built off the
+event loop and swapped in with one assignment, so requests never see a
+half-loaded dataset. A snapshot whose checksum does not match yet
+(mid-write) is retried on the next poll.
+
+Usage:
+  python scripts/api.py [--host 127.0.0.1] [--port 8900] [--poll 1.0]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+
+import dataio
+from affordability import parse_number, rate_tier
+from ranking import INDEX_FILE, RankingIndex
+from rollups import DIMENSIONS, GRAINS, ROLLUP_FILE, Rollups
+from search import INDEX_FILE as SEARCH_FILE, SearchIndex
+from textnorm import normalize_key
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DATA_CSV = os.path.join(DATA_DIR, "data.csv")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8900
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+CACHE_SIZE = 2048          # rendered responses kept
+POLL_INTERVAL = 1.0        # seconds between data.csv checks
+MAX_HEADER_BYTES = 16384
+MAX_BODY_BYTES = 1 << 20   # larger (or chunked) request bodies close the connection
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class Dataset:
+    """One immutable snapshot of data.csv with its indexes."""
+
+    def __init__(self, rows: list[dict], snapshot: str, ranking: RankingIndex | None = None,
+                 search: SearchIndex | None = None):
+        self.snapshot = snapshot
+        self.rows = rows
+        self.ranking = ranking
+        self.search = search
+        self.loaded_at = time.time()
+        self.fragments = [json.dumps(r, ensure_ascii=False).encode("utf-8") for r in rows]
+
+        self.by_source: dict[str, list[int]] = {}
+        self.by_partner: dict[str, list[int]] = {}
+        self.by_region: dict[str, list[int]] = {}
+        self.by_rate_tier: dict[str, list[int]] = {}
+        rated: list[tuple[float, int]] = []
+        located: list[tuple[float, float, int]] = []
+
+        for i, r in enumerate(rows):
+            self.by_source.setdefault(normalize_key(r["source"]), []).append(i)
+            partner = normalize_key(r.get("partner_name") or r["name"])
+            if partner:
+                self.by_partner.setdefault(partner, []).append(i)
+            if r.get("region"):
+                self.by_region.setdefault(normalize_key(r["region"]), []).append(i)
+            rate = parse_number(r.get("annual_rate", ""))
+            if rate == rate:  # not NaN
+                self.by_rate_tier.setdefault(rate_tier(rate), []).append(i)
+                rated.append((rate, i))
+            lat, lon = parse_number(r.get("latitude", "")), parse_number(r.get("longitude", ""))
+            if lat == lat and lon == lon:
+                located.append((lat, lon, i))
+
+        rated.sort()
+        self.rates = [rate for rate, _ in rated]
+        self.rate_rows = [i for _, i in rated]
+        located.sort()
+        self.lats = [lat for lat, _, _ in located]
+        self.located = located
+
+    @classmethod
+    def load(cls, path: str = DATA_CSV, index_path: str = INDEX_FILE,
+             search_path: str = SEARCH_FILE) -> "Dataset":
+        snapshot = dataio.snapshot_id(path)
+        rows = dataio.read_csv(path)
+        # Indexes from an older snapshot are stale until combine rebuilds them.
+        ranking = search = None
+        if os.path.exists(index_path):
+            ranking = RankingIndex.load(index_path)
+            if ranking.snapshot != snapshot:
+                ranking = None
+        if os.path.exists(search_path):
+            search = SearchIndex.load(search_path)
+            if search.snapshot != snapshot:
+                search = None
+        return cls(rows, snapshot, ranking, search)
+
+    def select(self, params: dict[str, str]) -> list[int]:
+        postings: list = []
+        for name, index in (("source", self.by_source), ("partner", self.by_partner),
+                            ("region", self.by_region)):
+            if name in params:
+                postings.append(index.get(normalize_key(params[name]), []))
+        if "rate_tier" in params:
+            postings.append(self.by_rate_tier.get(_tier(params["rate_tier"]), []))
+        if "max_rate" in params:
+            end = bisect_right(self.rates, _number(params, "max_rate"))
+            postings.append(self.rate_rows[:end])
+        if "bbox" in params:
+            try:
+                min_lat, min_lon, max_lat, max_lon = map(float, params["bbox"].split(","))
+            except ValueError:
+                raise BadRequest("bbox must be min_lat,min_lon,max_lat,max_lon") from None
+            lo, hi = bisect_left(self.lats, min_lat), bisect_right(self.lats, max_lat)
+            postings.append([i for _, lon, i in self.located[lo:hi] if min_lon <= lon <= max_lon])
+
+        if not postings:
+            return list(range(len(self.rows)))
+        postings.sort(key=len)
+        hits = set(postings[0])
+        for p in postings[1:]:
+            hits.intersection_update(p)
+            if not hits:
+                break
+        return sorted(hits)
+
+
+def _number(params: dict, name: str) -> float:
+    try:
+        return float(params[name])
+    except ValueError:
+        raise BadRequest(f"{name} must be a number") from None
+
+
+def _tier(value: str) -> str:
+    """A rate tier key from "16.5", "16.5%" or any label parse_number reads."""
+    rate = parse_number(value)
+    if rate != rate:  # NaN
+        raise BadRequest("rate_tier must be a number")
+    return rate_tier(rate)
+
+
+def _int(params: dict, name: str, default: int) -> int:
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer") from None
+    if value < 1:
+        raise BadRequest(f"{name} must be ≥ 1")
+    return value
+
+
+class QueryAPI:
+    def __init__(self, path: str = DATA_CSV, index_path: str = INDEX_FILE,
+                 search_path: str = SEARCH_FILE, cache_size: int = CACHE_SIZE,
+                 rollup_path: str = ROLLUP_FILE):
+        self.path = path
+        self.index_path = index_path
+        self.search_path = search_path
+        self.rollup_path = rollup_path
+        self.dataset: Dataset | None = None
+        self.cache: OrderedDict[tuple, tuple[int, bytes, bytes]] = OrderedDict()
+        self.cache_size = cache_size
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0, "reloads": 0, "errors": 0}
+        self._watch_key: tuple | None = None
+
+    # ── loading ──────────────────────────────────────────────────────────
+
+    def _file_state(self) -> tuple | None:
+        actual = dataio.resolve(self.path)
+        if actual is None:
+            return None
+        state = []
+        for p in (actual, actual + dataio.META_SUFFIX, self.index_path, self.search_path):
+            try:
+                st = os.stat(p)
+                state.append((p, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                state.append((p, None, None))
+        return tuple(state)
+
+    async def reload_if_changed(self) -> bool:
+        state = self._file_state()
+        if state is None or state == self._watch_key:
+            return False
+        loop = asyncio.get_running_loop()
+        try:
+            dataset = await loop.run_in_executor(None, Dataset.load, self.path,
+                                                 self.index_path, self.search_path)
+        except (dataio.ChecksumError, FileNotFoundError) as exc:
+            print(f"[WARN] Snapshot not ready ({exc}) – retrying.")
+            return False
+        self._watch_key = state
+        if self.dataset and dataset.snapshot == self.dataset.snapshot \
+                and bool(dataset.ranking) == bool(self.dataset.ranking) \
+                and bool(dataset.search) == bool(self.dataset.search):
+            return False
+        self.dataset = dataset          # atomic swap
+        self.cache.clear()
+        self.stats["reloads"] += 1
+        print(f"[INFO] Loaded snapshot {dataset.snapshot[:12]} – {len(dataset.rows)} rows"
+              f"{'' if dataset.ranking else ' (no ranking index)'}")
+        return True
+
+    async def watch(self, interval: float = POLL_INTERVAL) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload_if_changed()
+            except Exception as exc:  # keep serving the old snapshot
+                print(f"[ERROR] Reload failed: {type(exc).__name__}: {exc}")
+
+    # ── request handling ─────────────────────────────────────────────────
+
+    def respond(self, path: str, params: dict[str, str]) -> tuple[int, bytes, bytes]:
+        """(status, etag, body) for a GET; cached per snapshot + canonical query."""
+        ds = self.dataset
+        if ds is None:
+            return 503, b"", b'{"error":"dataset not loaded"}'
+        key = (ds.snapshot, path, tuple(sorted(params.items())))
+        hit = self.cache.get(key)
+        if hit is not None:
+            self.cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return hit
+
+        try:
+            if path == "/offers":
+                body = self._offers(ds, params)
+            elif path == "/best":
+                body = self._best(ds, params)
+            elif path == "/search":
+                body = self._search(ds, params)
+            else:
+                return 404, b"", b'{"error":"not found"}'
+        except BadRequest as exc:
+            return 400, b"", json.dumps({"error": str(exc)}, ensure_ascii=False).encode("utf-8")
+
+        digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).hexdigest()
+        result = (200, f'"{ds.snapshot[:16]}-{digest}"'.encode("ascii"), body)
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def _offers(self, ds: Dataset, params: dict) -> bytes:
+        page = _int(params, "page", 1)
+        per_page = min(_int(params, "per_page", DEFAULT_PER_PAGE), MAX_PER_PAGE)
+        hits = ds.select(params)
+        items = hits[(page - 1) * per_page: page * per_page]
+        head = json.dumps({"snapshot": ds.snapshot, "total": len(hits),
+                           "page": page, "per_page": per_page})
+        return (head[:-1].encode("utf-8") + b',"items":['
+                + b",".join(ds.fragments[i] for i in items) + b"]}")
+
+    def _best(self, ds: Dataset, params: dict) -> bytes:
+        if ds.ranking is None:
+            raise BadRequest("ranking index not available – run combine.py")
+        if "name" not in params or "price" not in params:
+            raise BadRequest("name and price are required")
+        results = ds.ranking.lookup(params["name"], _number(params, "price"),
+                                    _int(params, "top", 10))
+        return json.dumps({"snapshot": ds.snapshot, "items": results},
+                          ensure_ascii=False).encode("utf-8")
+
+    def _search(self, ds: Dataset, params: dict) -> bytes:
+        if ds.search is None:
+            raise BadRequest("search index not available – run combine.py")
+        if not params.get("q"):
+            raise BadRequest("q is required")
+        hits = ds.search.search(params["q"], min(_int(params, "limit", 10), MAX_PER_PAGE))
+        head = json.dumps({"snapshot": ds.snapshot, "total": len(hits)})
+        items = (b'{"score":' + str(score).encode("ascii") + b',"row":' + ds.fragments[row] + b"}"
+                 for row, score in hits)
+        return head[:-1].encode("utf-8") + b',"items":[' + b",".join(items) + b"]}"
+
+    def trends(self, params: dict[str, str]) -> tuple[int, bytes, bytes]:
+        """(status, etag, body) for /trends – blocking SQLite, so call it off the event loop."""
+        # Not cached: backfills change the rollups without a new snapshot,
+        # and a series is a single index range scan anyway.
+        try:
+            return 200, b"", self._trends(params)
+        except BadRequest as exc:
+            return 400, b"", json.dumps({"error": str(exc)}, ensure_ascii=False).encode("utf-8")
+
+    def _trends(self, params: dict) -> bytes:
+        dim, grain = params.get("dim", "all"), params.get("grain", "week")
+        if dim not in DIMENSIONS or grain not in GRAINS:
+            raise BadRequest(f"dim must be one of {', '.join(DIMENSIONS)}; "
+                             f"grain one of {', '.join(GRAINS)}")
+        if dim != "all" and not params.get("key"):
+            raise BadRequest("key is required unless dim=all")
+        if not os.path.exists(self.rollup_path):
+            raise BadRequest("no rollups yet – run combine.py")
+        key = params.get("key", "")
+        if dim == "developer":
+            key = normalize_key(key)
+        elif dim == "rate_tier":
+            key = _tier(key)
+        limit = min(_int(params, "limit", 12), MAX_PER_PAGE)
+        items = [dict(r) for r in Rollups(self.rollup_path).series(dim, key, grain, limit)]
+        return json.dumps({"dim": dim, "key": key, "grain": grain, "items": items},
+                          ensure_ascii=False).encode("utf-8")
+
+    def health(self) -> bytes:
+        ds = self.dataset
+        return json.dumps({
+            "snapshot": ds.snapshot if ds else None,
+            "rows": len(ds.rows) if ds else 0,
+            "ranking": bool(ds and ds.ranking),
+            "search": bool(ds and ds.search),
+            "loaded_at": ds.loaded_at if ds else None,
+            "cache_entries": len(self.cache),
+            **self.stats,
+        }).encode("utf-8")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, b"", b'{"error":"bad request line"}', False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                if not await self._discard_body(reader, headers):
+                    keep_alive = False
+
+                self.stats["requests"] += 1
+                if method not in ("GET", "HEAD"):
+                    status, etag, body = 405, b"", b'{"error":"method not allowed"}'
+                else:
+                    url = urlsplit(target)
+                    try:
+                        if url.path == "/health":
+                            status, etag, body = 200, b"", self.health()
+                        else:
+                            params = dict(parse_qsl(url.query, keep_blank_values=False))
+                            if url.path == "/trends":
+                                status, etag, body = await asyncio.to_thread(self.trends, params)
+                            else:
+                                status, etag, body = self.respond(url.path, params)
+                    except Exception as exc:
+                        self.stats["errors"] += 1
+                        print(f"[ERROR] {method} {target}: {type(exc).__name__}: {exc}")
+                        status, etag, body = 500, b"", b'{"error":"internal server error"}'
+                    if etag and headers.get("if-none-match", "").encode("ascii", "ignore") == etag:
+                        self.stats["not_modified"] += 1
+                        status, body = 304, b""
+                await self._send(writer, status, etag, b"" if method == "HEAD" else body,
+                                 keep_alive, len(body))
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _discard_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> bool:
+        """Read past a request body; False if the connection cannot be reused."""
+        if "transfer-encoding" in headers:
+            return False
+        length = headers.get("content-length", "0")
+        if not length.isdigit() or int(length) > MAX_BODY_BYTES:
+            return False
+        try:
+            await reader.readexactly(int(length))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return False
+        return True
+
+    @staticmethod
+    async def _send(writer, status: int, etag: bytes, body: bytes, keep_alive: bool,
+                    length: int | None = None) -> None:
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}".encode("ascii"),
+                b"Content-Type: application/json; charset=utf-8",
+                b"Content-Length: " + str(len(body) if length is None else length).encode("ascii"),
+                b"Cache-Control: no-cache"]
+        if etag:
+            head.append(b"ETag: " + etag)
+        if not keep_alive:
+            head.append(b"Connection: close")
+        writer.write(b"\r\n".join(head) + b"\r\n\r\n" + body)
+        await writer.drain()
+
+
+async def serve(host: str, port: int, poll: float) -> None:
+    api = QueryAPI()
+    await api.reload_if_changed()
+    if api.dataset is None:
+        print(f"[WARN] {DATA_CSV} not available yet – serving 503 until combine.py runs.")
+    server = await asyncio.start_server(api.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"[OK] Query API on http://{host}:{port}")
+    watcher = asyncio.create_task(api.watch(poll))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local query API over data/data.csv.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--poll", type=float, default=POLL_INTERVAL,
+                        help="seconds between checks for a new snapshot (default: %(default)s)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.poll))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
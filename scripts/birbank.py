@@ -1,6 +1,7 @@
 """
 BirBank Ipoteka Partners Scraper
 API: https://ipoteka.birbank.az/api/partners?size=1000
+     (change probe: ?size=1, see fetch_fingerprint)
 Source: JSON REST API
 Output: data/birbank.csv
 
@@ -29,11 +30,19 @@ Output rows: one per residential complex, with partner info repeated.
 If a partner has no complexes, one row is emitted for the partner itself.
 """
 
-import csv
 import os
+from collections.abc import Callable
+
 import requests
 
+import dataio
+import http_client
+import instrument
+import probe
+from textnorm import clean
+
 API_URL = "https://ipoteka.birbank.az/api/partners?size=1000"
+PROBE_URL = "https://ipoteka.birbank.az/api/partners?size=1"
 # Base URL for logo files (UUID filenames).
 LOGO_BASE = "https://ipoteka.birbank.az/api/files/"
 
@@ -81,21 +90,46 @@ CSV_FIELDS = [
 ]
 
 
-def fetch_partners() -> list[dict]:
+def fetch_page() -> dict:
+    """The full response's `data` object: responseDto (partners) and totalElements; {} on failure."""
     try:
-        resp = requests.get(API_URL, headers=HEADERS, timeout=30)
+        resp = http_client.get(API_URL, headers=HEADERS, timeout=30)
         resp.raise_for_status()
         data = resp.json()
         inner = data.get("data") or {}
-        if isinstance(inner, dict):
-            return inner.get("responseDto", [])
-        return []
+        return inner if isinstance(inner, dict) else {}
     except requests.RequestException as exc:
         print(f"[ERROR] {exc}")
-        return []
+        return {}
     except (ValueError, KeyError) as exc:
         print(f"[ERROR] JSON parse failed: {exc}")
-        return []
+        return {}
+
+
+def fetch_partners() -> list[dict]:
+    return fetch_page().get("responseDto", [])
+
+
+def _fingerprint(total, first: dict | None) -> str:
+    return probe.json_hash([total, first])
+
+
+def fetch_fingerprint() -> str | None:
+    """
+    Fingerprint from a one-partner page: total count + first partner.
+    None if the API does not report a total (then only a full fetch can tell).
+    """
+    try:
+        resp = http_client.get(PROBE_URL, headers=HEADERS, timeout=30)
+        resp.raise_for_status()
+        inner = resp.json().get("data") or {}
+    except (requests.RequestException, ValueError, AttributeError) as exc:
+        print(f"[WARN] Probe failed: {exc}")
+        return None
+    if not isinstance(inner, dict) or inner.get("totalElements") is None:
+        return None
+    first = (inner.get("responseDto") or [None])[0]
+    return _fingerprint(inner["totalElements"], first)
 
 
 def _logo_url(filename: str) -> str:
@@ -106,19 +140,21 @@ def _logo_url(filename: str) -> str:
     return LOGO_BASE + filename
 
 
-def flatten_partners(partners: list[dict]) -> list[dict]:
+def flatten_partners(partners: list[dict],
+                     emit: Callable[[dict], None] | None = None) -> list[dict]:
+    """One row per complex; each row also goes to emit (NDJSON stream) as it is built."""
     records = []
     for p in partners:
         partner_base = {
-            "partner_name": (p.get("name") or "").strip(),
-            "partner_address": (p.get("address") or "").strip(),
-            "phone_mobile1": (p.get("mobileNumber1") or "").strip(),
-            "phone_mobile2": (p.get("mobileNumber2") or "").strip(),
-            "phone_short": str(p.get("phoneNumber") or "").strip(),
-            "email": (p.get("email") or "").strip(),
-            "website": (p.get("website") or "").strip(),
-            "facebook": (p.get("facebook") or "").strip(),
-            "instagram": (p.get("instagram") or "").strip(),
+            "partner_name": clean(p.get("name")),
+            "partner_address": clean(p.get("address")),
+            "phone_mobile1": clean(p.get("mobileNumber1")),
+            "phone_mobile2": clean(p.get("mobileNumber2")),
+            "phone_short": clean(p.get("phoneNumber") or ""),
+            "email": clean(p.get("email")),
+            "website": clean(p.get("website")),
+            "facebook": clean(p.get("facebook")),
+            "instagram": clean(p.get("instagram")),
             "partner_logo_url": _logo_url(p.get("logo") or ""),
             "initial_payment_pct": str(p.get("initialPayment") or ""),
             "mortgage_rate_pct": str(p.get("mortgageRate") or ""),
@@ -132,14 +168,16 @@ def flatten_partners(partners: list[dict]) -> list[dict]:
             for c in complexes:
                 rec = dict(partner_base)
                 rec.update({
-                    "complex_name": (c.get("name") or "").strip(),
-                    "complex_slug": (c.get("slug") or "").strip(),
+                    "complex_name": clean(c.get("name")),
+                    "complex_slug": clean(c.get("slug")),
                     "complex_logo_url": _logo_url(c.get("logo") or ""),
                     "region_id": str(c.get("regionId") or ""),
                     "latitude": str(c.get("latitude") or ""),
                     "longitude": str(c.get("longitude") or ""),
                 })
                 records.append(rec)
+                if emit:
+                    emit(rec)
         else:
             # Partner with no complexes yet — emit one row
             rec = dict(partner_base)
@@ -152,33 +190,44 @@ def flatten_partners(partners: list[dict]) -> list[dict]:
                 "longitude": "",
             })
             records.append(rec)
+            if emit:
+                emit(rec)
 
     return records
 
 
-def save_csv(records: list[dict], filepath: str) -> None:
-    if not records:
-        print("[WARN] No records to save.")
-        return
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
-        writer.writeheader()
-        writer.writerows(records)
-    print(f"[OK] Saved {len(records)} records → {os.path.abspath(filepath)}")
-
-
+@instrument.job("birbank")
 def main() -> None:
+    emit = dataio.ndjson_emitter("birbank", CSV_FIELDS)  # None unless NDJSON_OUT is set
+    chk = probe.Probe(OUTPUT_FILE)
+    if chk.armed:
+        with instrument.stage("birbank.probe"):
+            fingerprint = fetch_fingerprint()
+        if chk.unchanged(fingerprint):
+            chk.skip()
+            return
+
     print(f"[INFO] Fetching {API_URL}")
-    partners = fetch_partners()
+    with instrument.stage("birbank.fetch") as st:
+        page = fetch_page()
+        partners = page.get("responseDto", [])
+        st.records = len(partners)
     if not partners:
         print("[ERROR] No partner data received.")
+        instrument.fail("no partner data received")
         return
 
     print(f"[INFO] Partners: {len(partners)}")
-    records = flatten_partners(partners)
+    with instrument.stage("birbank.flatten") as st:
+        records = flatten_partners(partners, emit)
+        st.records = len(records)
     print(f"[INFO] Complex rows: {len(records)}")
-    save_csv(records, OUTPUT_FILE)
+    with instrument.stage("birbank.save_csv") as st:
+        st.rows = dataio.save_csv(records, OUTPUT_FILE, CSV_FIELDS)
+    # Same inputs as fetch_fingerprint(), so the next probe can match; an
+    # API without a total gives None, i.e. always a full fetch.
+    total = page.get("totalElements")
+    chk.save(_fingerprint(total, partners[0]) if total is not None else None)
 
     if records:
         print("\n--- Preview (first 3) ---")
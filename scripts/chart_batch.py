@@ -0,0 +1,298 @@
+"""
+Batch Chart Variants — the same charts per bank, per region, per snapshot
+Reads:  data/data.csv  (plus any --snapshot CSVs)
+Writes: charts/batch/<template>/<dimension>_<group>.png
+
+Templates (bar charts, one per group of rows):
+  rate_tiers         offers per annual-rate label
+  downpayment_tiers  offers per down-payment label
+  top_developers     top 10 developers by project count
+  cities             projects per city (region field or address keyword)
+
+Dimensions:
+  bank      one group per source bank
+  region    one group per city with at least MIN_GROUP rows
+  snapshot  one group per --snapshot CSV (e.g. archived copies of data.csv)
+  all       the whole dataset
+
+Each template builds its figure, axes, bar and label artists once and then
+only updates their data between variants (heights, tick labels, texts,
+title), instead of a cold plt.subplots + savefig per chart. The main thread
+renders each variant to an RGBA buffer; PNG encoding and the atomic file
+write run on a thread pool (zlib releases the GIL), so rendering the next
+variant overlaps with writing the last. Pillow is optional: without it
+the PNGs are encoded by matplotlib's own (slower) writer.
+
+Usage:
+  python scripts/chart_batch.py                          # bank + region variants
+  python scripts/chart_batch.py --by bank,snapshot --snapshot old/data.csv
+  python scripts/chart_batch.py --templates top_developers --workers 8
+  python scripts/chart_batch.py --cold                   # one fresh figure per chart (for comparison)
+"""
+
+import argparse
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from matplotlib import image as mpl_image
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+import dataio
+import instrument
+from affordability import parse_number
+from generate_charts import ACCENT, CHART_DIR, COLORS, DATA_CSV
+from textnorm import city_of, slug
+
+BATCH_DIR = os.path.join(CHART_DIR, "batch")
+DIMENSIONS = ("bank", "region", "snapshot", "all")
+DEFAULT_DIMENSIONS = ("bank", "region")
+MIN_GROUP = 5              # smaller regions are not worth a chart
+DEFAULT_WORKERS = max(2, min(8, os.cpu_count() or 2))
+DPI = 150
+
+
+def _tier_key(label: str):
+    number = parse_number(label)
+    return (math.isnan(number), 0.0 if math.isnan(number) else number, label)
+
+
+# ── templates ────────────────────────────────────────────────────────────────
+
+class BarTemplate(ABC):
+    """A bar chart whose artists are created once and re-filled per variant."""
+
+    name = ""
+    title = ""
+    xlabel = ""
+    ylabel = ""
+    slots = 8
+    horizontal = False
+    figsize = (8, 5)
+    margins = {"left": 0.1, "right": 0.96, "top": 0.86, "bottom": 0.14}
+
+    def __init__(self):
+        self.fig = Figure(figsize=self.figsize, dpi=DPI)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.fig.subplots_adjust(**self.margins)
+        positions, zeros = np.arange(self.slots), np.zeros(self.slots)
+        if self.horizontal:
+            self.bars = self.ax.barh(positions, zeros, height=0.6, color=ACCENT)
+            self.ax.grid(axis="y", visible=False)
+        else:
+            self.bars = self.ax.bar(positions, zeros, width=0.5, color=ACCENT)
+            self.ax.grid(axis="x", visible=False)
+            self.ax.grid(axis="y", visible=True)
+        self.texts = [
+            self.ax.text(0, 0, "", fontweight="bold",
+                         ha="left" if self.horizontal else "center",
+                         va="center" if self.horizontal else "bottom")
+            for _ in range(self.slots)
+        ]
+        self.heading = self.ax.set_title("", fontsize=13, pad=12)
+        self.ax.set_xlabel(self.xlabel)
+        self.ax.set_ylabel(self.ylabel)
+
+    @abstractmethod
+    def items(self, rows: list[dict]) -> list[tuple[str, int]]:
+        """(label, count) bars for one group of rows, at most `slots` of them."""
+
+    def render(self, items: list[tuple[str, int]], subtitle: str, color: str) -> None:
+        n = len(items)
+        top = max(v for _, v in items)
+        pad = top * 0.01
+        for i, (bar, text) in enumerate(zip(self.bars, self.texts)):
+            visible = i < n
+            bar.set_visible(visible)
+            text.set_visible(visible)
+            if not visible:
+                continue
+            value = items[i][1]
+            bar.set_color(color)
+            if self.horizontal:
+                bar.set_width(value)
+                text.set_position((value + pad, i))
+            else:
+                bar.set_height(value)
+                text.set_position((i, value + pad))
+            text.set_text(str(value))
+
+        labels = [label for label, _ in items]
+        if self.horizontal:
+            self.ax.set_yticks(range(n), labels)
+            self.ax.set_ylim(n - 0.5, -0.5)          # largest on top
+            self.ax.set_xlim(0, top * 1.2)
+        else:
+            self.ax.set_xticks(range(n), labels)
+            self.ax.set_xlim(-0.5, n - 0.5)
+            self.ax.set_ylim(0, top * 1.2)
+        self.heading.set_text(f"{self.title}\n{subtitle}")
+
+    def rgba(self) -> np.ndarray:
+        self.canvas.draw()
+        return np.asarray(self.canvas.buffer_rgba()).copy()
+
+
+class RateTiers(BarTemplate):
+    name = "rate_tiers"
+    title = "Mortgage Rate Tiers"
+    xlabel = "Annual Mortgage Rate"
+    ylabel = "Number of Offers"
+
+    def items(self, rows):
+        dist = Counter(r["annual_rate"] for r in rows if r["annual_rate"])
+        return sorted(dist.most_common(self.slots), key=lambda kv: _tier_key(kv[0]))
+
+
+class DownPaymentTiers(BarTemplate):
+    name = "downpayment_tiers"
+    title = "Down-Payment Tiers"
+    xlabel = "Minimum Initial Payment"
+    ylabel = "Number of Offers"
+
+    def items(self, rows):
+        dist = Counter(r["down_payment"] for r in rows if r["down_payment"])
+        return sorted(dist.most_common(self.slots), key=lambda kv: _tier_key(kv[0]))
+
+
+class TopDevelopers(BarTemplate):
+    name = "top_developers"
+    title = "Top Developers by Project Count"
+    xlabel = "Number of Projects"
+    slots = 10
+    horizontal = True
+    figsize = (10, 6)
+    margins = {"left": 0.3, "right": 0.96, "top": 0.88, "bottom": 0.1}
+
+    def items(self, rows):
+        return Counter(r["partner_name"] or r["name"] for r in rows
+                       if r["partner_name"] or r["name"]).most_common(self.slots)
+
+
+class Cities(BarTemplate):
+    name = "cities"
+    title = "Projects by City"
+    ylabel = "Number of Projects"
+
+    def items(self, rows):
+        return Counter(c for c in map(city_of, rows) if c).most_common(self.slots)
+
+
+TEMPLATES = {t.name: t for t in (RateTiers, DownPaymentTiers, TopDevelopers, Cities)}
+
+
+# ── variants ─────────────────────────────────────────────────────────────────
+
+def groups(rows: list[dict], dimensions, snapshots: list[str]):
+    """(dimension, label, rows, color) for every requested group."""
+    if "all" in dimensions:
+        yield "all", "All banks", rows, ACCENT
+    if "bank" in dimensions:
+        for source in sorted({r["source"] for r in rows}):
+            yield "bank", source, [r for r in rows if r["source"] == source], COLORS.get(source, ACCENT)
+    if "region" in dimensions:
+        by_city: dict[str, list[dict]] = {}
+        for r in rows:
+            city = city_of(r)
+            if city:
+                by_city.setdefault(city, []).append(r)
+        for city, members in sorted(by_city.items()):
+            if len(members) >= MIN_GROUP:
+                yield "region", city, members, ACCENT
+    if "snapshot" in dimensions:
+        for path in snapshots:
+            snapshot = dataio.snapshot_id(path) or ""
+            label = f"{os.path.basename(os.path.dirname(os.path.abspath(path)))} {snapshot[:8]}".strip()
+            yield "snapshot", label, dataio.read_csv(path), ACCENT
+
+
+def _write_png(path: str, rgba: np.ndarray) -> None:
+    # The figure background is opaque: dropping alpha shrinks what zlib
+    # has to compress by a quarter without changing a pixel.
+    tmp = path + ".tmp"
+    if Image is None:
+        mpl_image.imsave(tmp, rgba[..., :3], format="png", dpi=DPI)
+    else:
+        Image.fromarray(rgba, "RGBA").convert("RGB").save(tmp, format="PNG", dpi=(DPI, DPI))
+    os.replace(tmp, path)
+
+
+def render_batch(rows: list[dict], templates: list[str], dimensions, snapshots: list[str],
+                 workers: int = DEFAULT_WORKERS, cold: bool = False) -> int:
+    """Render every template × group; returns the number of PNGs written."""
+    variants = list(groups(rows, dimensions, snapshots))
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="png") as pool:
+        pending: list[Future] = []
+        for name in templates:
+            cls = TEMPLATES[name]
+            out_dir = os.path.join(BATCH_DIR, name)
+            os.makedirs(out_dir, exist_ok=True)
+            with instrument.stage(f"chart_batch.{name}") as st:
+                template = None if cold else cls()
+                for dimension, label, members, color in variants:
+                    tpl = cls() if cold else template
+                    items = tpl.items(members)
+                    if not items:
+                        continue
+                    tpl.render(items, f"{dimension.title()}: {label}", color)
+                    path = os.path.join(out_dir, f"{dimension}_{slug(label)}.png")
+                    if cold:
+                        tpl.fig.savefig(path)
+                    else:
+                        pending.append(pool.submit(_write_png, path, tpl.rgba()))
+                        # Bound the RGBA buffers in flight.
+                        while len(pending) > 2 * workers:
+                            pending.pop(0).result()
+                    written += 1
+                st.records = written
+        for future in pending:
+            future.result()
+    return written
+
+
+@instrument.job("chart_batch")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render chart templates per bank / region / snapshot.")
+    parser.add_argument("--by", default=",".join(DEFAULT_DIMENSIONS),
+                        help=f"comma-separated dimensions: {', '.join(DIMENSIONS)}")
+    parser.add_argument("--templates", default=",".join(TEMPLATES),
+                        help=f"comma-separated templates: {', '.join(TEMPLATES)}")
+    parser.add_argument("--snapshot", action="append", default=[], metavar="CSV",
+                        help="a data.csv snapshot for --by snapshot (repeatable)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="PNG writer threads")
+    parser.add_argument("--cold", action="store_true", help="fresh figure + savefig per chart")
+    args = parser.parse_args()
+
+    dimensions = [d for d in args.by.split(",") if d]
+    templates = [t for t in args.templates.split(",") if t]
+    bad = [d for d in dimensions if d not in DIMENSIONS] + [t for t in templates if t not in TEMPLATES]
+    if bad:
+        parser.error(f"unknown dimension / template: {', '.join(bad)}")
+    if "snapshot" in dimensions and not args.snapshot:
+        parser.error("--by snapshot needs at least one --snapshot CSV")
+
+    with instrument.stage("chart_batch.load") as st:
+        rows = dataio.read_csv(DATA_CSV)
+        st.records = len(rows)
+
+    start = time.perf_counter()
+    n = render_batch(rows, templates, dimensions, args.snapshot, args.workers, args.cold)
+    elapsed = time.perf_counter() - start
+    print(f"[OK] {n} charts in {elapsed:.2f}s ({elapsed / max(n, 1) * 1000:.0f} ms/chart) "
+          f"→ {os.path.abspath(BATCH_DIR)}/")
+
+
+if __name__ == "__main__":
+    main()
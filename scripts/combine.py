@@ -1,5 +1,11 @@
 """
-Combine all bank partner CSVs into a single data/data.csv.
+Combine all bank partner CSVs into a single data/data.csv
+and rebuild the best-offer index data/ranking_index.json (see ranking.py)
+and the search index data/search_index.bin (see search.py), and fold the
+new snapshot into the trend rollups data/rollups.sqlite (see rollups.py).
+Rows are checked against the data-quality rules as they are mapped (see
+validate.py): rows failing an error rule go to data/quarantine.csv instead
+of data.csv, and data/quality_report.json counts every failure per source.
 
 Unified schema
 --------------
@@ -22,30 +28,36 @@ max_loan_amount –
 latitude        – (BirBank only)
 longitude       – (BirBank only)
 
-Source file field mappings
---------------------------
-pashabank.csv   → name, address, phone, website, logo_url,
-                  down_payment, annual_rate, term
-abbhome.csv     → name (title), phone, address, website, logo_url,
-                  down_payment (min_down_payment), annual_rate (min_annual_rate),
-                  term (max_term), max_loan_amount
-xalqbank.csv    → name, region, address, phone, website, logo_url
-birbank.csv     → name (complex_name), partner_name, region_id→region,
-                  address (partner_address), phone (phone_mobile1),
-                  email, website, facebook, instagram,
-                  logo_url (complex_logo_url),
-                  down_payment (initial_payment_pct),
-                  annual_rate (mortgage_rate_pct),
-                  term (mortgage_period_years),
-                  min_loan_amount, max_loan_amount,
-                  latitude, longitude
+Source mappings
+---------------
+Each bank is one SourceMap entry in SOURCES: the CSV it reads and, per
+unified field, the source column (or a tuple of columns, first non-empty
+wins). Fields a bank does not have stay empty. A mapping is compiled once
+per file against its header into positional getters, so rows are never
+turned into dicts before they are mapped. Adding a bank means adding an
+entry here (and a scheduler.SOURCES entry for its scraper).
 """
 
-import csv
 import os
+from collections import Counter
+from dataclasses import dataclass
+from operator import itemgetter
+
+import dataio
+import instrument
+import ranking
+import rollups
+import search
+import validate
+from textnorm import clean_str
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 OUTPUT = os.path.join(DATA_DIR, "data.csv")
+RANKING_INDEX = "ranking_index.json"
+SEARCH_INDEX = "search_index.bin"
+ROLLUPS = "rollups.sqlite"
+QUALITY_REPORT = "quality_report.json"
+QUARANTINE = "quarantine.csv"
 
 FIELDS = [
     "source",
@@ -69,126 +81,163 @@ FIELDS = [
 ]
 
 
-def _read(filename: str) -> list[dict]:
-    path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(path):
-        print(f"[WARN] {filename} not found – skipping.")
+@dataclass(frozen=True)
+class SourceMap:
+    label: str                                # value of the source column
+    filename: str                             # scraper output in DATA_DIR
+    fields: dict[str, str | tuple[str, ...]]  # unified field → column(s)
+
+    def compile(self, header: list[str]):
+        """A function mapping one row of this header to a unified, clean()ed dict."""
+        position = {column: i for i, column in enumerate(header)}
+        single_names, single_cols, chains = [], [], []
+        for field, spec in self.fields.items():
+            columns = (spec,) if isinstance(spec, str) else spec
+            missing = [c for c in columns if c not in position]
+            if missing:
+                print(f"[WARN] {self.filename}: no column {', '.join(missing)} – {field} may stay empty.")
+            present = [position[c] for c in columns if c in position]
+            if len(present) == 1:
+                single_names.append(field)
+                single_cols.append(present[0])
+            elif present:
+                chains.append((field, itemgetter(*present)))
+
+        base = dict.fromkeys(FIELDS, "")
+        base["source"] = self.label
+        if len(single_cols) > 1:
+            getter = itemgetter(*single_cols)
+        elif single_cols:  # itemgetter of one index returns the value, not a 1-tuple
+            only = single_cols[0]
+            getter = lambda row: (row[only],)  # noqa: E731
+        else:
+            getter = None
+
+        def transform(row: list[str]) -> dict:
+            out = base.copy()
+            if getter:
+                out.update(zip(single_names, map(clean_str, getter(row))))
+            for field, get in chains:
+                out[field] = next(filter(None, map(clean_str, get(row))), "")
+            return out
+
+        return transform
+
+
+SOURCES = (
+    SourceMap("PASHA Bank", "pashabank.csv", {
+        "name": "name",
+        "address": "address",
+        "phone": "phone",
+        "website": "website",
+        "logo_url": "logo_url",
+        "down_payment": "down_payment",
+        "annual_rate": "annual_rate",
+        "term": "term",
+    }),
+    SourceMap("ABB Home", "abbhome.csv", {
+        "name": "name",
+        "phone": "phone",
+        "address": "address",
+        "website": "website",
+        "logo_url": "logo_url",
+        "down_payment": "min_down_payment",
+        "annual_rate": "min_annual_rate",
+        "term": "max_term",
+        "max_loan_amount": "max_loan_amount",
+    }),
+    SourceMap("Xalq Bank", "xalqbank.csv", {
+        "name": "name",
+        "region": "region",
+        "address": "address",
+        "phone": "phone",
+        "website": "website",
+        "logo_url": "logo_url",
+    }),
+    SourceMap("BirBank", "birbank.csv", {
+        "name": ("complex_name", "partner_name"),
+        "partner_name": "partner_name",
+        "address": "partner_address",
+        "phone": ("phone_mobile1", "phone_short"),
+        "email": "email",
+        "website": "website",
+        "facebook": "facebook",
+        "instagram": "instagram",
+        "logo_url": ("complex_logo_url", "partner_logo_url"),
+        "down_payment": "initial_payment_pct",
+        "annual_rate": "mortgage_rate_pct",
+        "term": "mortgage_period_years",
+        "min_loan_amount": "min_loan_amount",
+        "max_loan_amount": "max_loan_amount",
+        "latitude": "latitude",
+        "longitude": "longitude",
+    }),
+)
+
+
+def transform(source: SourceMap) -> list[dict]:
+    """Unified rows for one source ([] with a warning if its CSV is missing)."""
+    path = os.path.join(DATA_DIR, source.filename)
+    if dataio.resolve(path) is None:
+        print(f"[WARN] {source.filename} not found – skipping.")
         return []
-    with open(path, encoding="utf-8") as f:
-        return list(csv.DictReader(f))
-
-
-def _row(**kwargs) -> dict:
-    """Build a unified row; missing fields default to empty string."""
-    base = {f: "" for f in FIELDS}
-    base.update({k: (v or "") for k, v in kwargs.items()})
-    return base
-
-
-# ---------------------------------------------------------------------------
-# Per-source transformers
-# ---------------------------------------------------------------------------
-
-def from_pashabank() -> list[dict]:
-    rows = _read("pashabank.csv")
-    out = []
-    for r in rows:
-        out.append(_row(
-            source="PASHA Bank",
-            name=r["name"],
-            address=r["address"],
-            phone=r["phone"],
-            website=r["website"],
-            logo_url=r["logo_url"],
-            down_payment=r["down_payment"],
-            annual_rate=r["annual_rate"],
-            term=r["term"],
-        ))
-    return out
-
-
-def from_abbhome() -> list[dict]:
-    rows = _read("abbhome.csv")
-    out = []
-    for r in rows:
-        out.append(_row(
-            source="ABB Home",
-            name=r["name"],
-            phone=r["phone"],
-            address=r["address"],
-            website=r["website"],
-            logo_url=r["logo_url"],
-            down_payment=r["min_down_payment"],
-            annual_rate=r["min_annual_rate"],
-            term=r["max_term"],
-            max_loan_amount=r["max_loan_amount"],
-        ))
-    return out
-
-
-def from_xalqbank() -> list[dict]:
-    rows = _read("xalqbank.csv")
-    out = []
-    for r in rows:
-        out.append(_row(
-            source="Xalq Bank",
-            name=r["name"],
-            region=r["region"],
-            address=r["address"],
-            phone=r["phone"],
-            website=r["website"],
-            logo_url=r["logo_url"],
-        ))
-    return out
-
-
-def from_birbank() -> list[dict]:
-    rows = _read("birbank.csv")
-    out = []
-    for r in rows:
-        out.append(_row(
-            source="BirBank",
-            name=r["complex_name"] or r["partner_name"],
-            partner_name=r["partner_name"],
-            address=r["partner_address"],
-            phone=r["phone_mobile1"] or r["phone_short"],
-            email=r["email"],
-            website=r["website"],
-            facebook=r["facebook"],
-            instagram=r["instagram"],
-            logo_url=r["complex_logo_url"] or r["partner_logo_url"],
-            down_payment=r["initial_payment_pct"],
-            annual_rate=r["mortgage_rate_pct"],
-            term=r["mortgage_period_years"],
-            min_loan_amount=r["min_loan_amount"],
-            max_loan_amount=r["max_loan_amount"],
-            latitude=r["latitude"],
-            longitude=r["longitude"],
-        ))
-    return out
+    header, table = dataio.read_table(path)
+    row_of = source.compile(header)
+    width = len(header)
+    pad = [""] * width
+    return [row_of(row if len(row) == width else (row + pad)[:width]) for row in table]
 
 
 # ---------------------------------------------------------------------------
 
+@instrument.job("combine")
 def main() -> None:
+    emit = dataio.ndjson_emitter("combine", FIELDS)  # None unless NDJSON_OUT is set
     all_rows: list[dict] = []
-    all_rows.extend(from_pashabank())
-    all_rows.extend(from_abbhome())
-    all_rows.extend(from_xalqbank())
-    all_rows.extend(from_birbank())
-
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(OUTPUT, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDS)
-        writer.writeheader()
-        writer.writerows(all_rows)
+    validator = validate.Validator()
+    with instrument.stage("combine.read") as st:
+        for source in SOURCES:
+            rows = validator.filter(transform(source))
+            all_rows.extend(rows)
+            if emit:
+                for row in rows:
+                    emit(row)
+        st.records = len(all_rows)
+
+    with instrument.stage("combine.write") as st:
+        st.rows = dataio.write_csv(OUTPUT, all_rows, FIELDS)
+
+    with instrument.stage("combine.validate") as st:
+        validator.save(FIELDS, dataio.snapshot_id(OUTPUT),
+                       os.path.join(DATA_DIR, QUALITY_REPORT), os.path.join(DATA_DIR, QUARANTINE))
+        st.records = len(validator.quarantine)
+
+    # Keep the best-offer index in step with the snapshot just written.
+    with instrument.stage("combine.ranking") as st:
+        index = ranking.build_index(all_rows, dataio.snapshot_id(OUTPUT))
+        ranking.save_index(index, os.path.join(DATA_DIR, RANKING_INDEX))
+        st.records = len(index["keys"])
+
+    with instrument.stage("combine.search") as st:
+        index = search.SearchIndex.build(all_rows, dataio.snapshot_id(OUTPUT))
+        index.save(os.path.join(DATA_DIR, SEARCH_INDEX))
+        st.records = len(index.terms)
+
+    with instrument.stage("combine.rollups") as st:
+        applied = rollups.Rollups(os.path.join(DATA_DIR, ROLLUPS)).apply(all_rows, dataio.snapshot_id(OUTPUT))
+        st.records = len(all_rows) if applied else 0
 
     # Summary
     print(f"[OK] data/data.csv written — {len(all_rows)} total rows")
-    from collections import Counter
     counts = Counter(r["source"] for r in all_rows)
     for src, n in counts.items():
         print(f"       {src}: {n}")
+    if validator.quarantine:
+        print(f"[WARN] {len(validator.quarantine)} rows quarantined → data/{QUARANTINE}")
+    for src, stats in validator.sources.items():
+        for name, entry in stats["rules"].items():
+            print(f"[WARN] {src}: {entry['failed']} × {name} ({entry['severity']}), "
+                  f"e.g. {entry['examples'][0]!r}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,422 @@
+"""
+Static Dashboard — precomputed aggregates with lazy drill-down slices
+Reads:  data/data.csv
+Writes: dashboard/index.html                    (page, summary inlined)
+        dashboard/slices/bank/<slug>.json       (one per bank)
+        dashboard/slices/developer/<slug>.json  (one per developer)
+
+Everything the overview shows — projects per bank, rate and down-payment
+tiers, top developers, digital presence, cities and coordinate cells — is
+aggregated here once per data snapshot and inlined into the page as a few
+KB of JSON, so the page renders on open without touching the network. The
+project lists behind a bank or developer are written as separate slice
+files and fetched only when that bank or developer is clicked; the browser
+never sees, let alone aggregates, the full dataset.
+
+Rebuilding is skipped when the page already describes the current
+data.csv snapshot (--force to rebuild anyway).
+
+Usage:
+  python scripts/dashboard.py
+  python -m http.server -d dashboard 8000    # then open http://localhost:8000/
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+import dataio
+import instrument
+from affordability import parse_number, rate_tier
+from generate_charts import COLORS, DATA_CSV, ROOT
+from textnorm import city_of, normalize_key, slug
+
+OUT_DIR = os.path.join(ROOT, "dashboard")
+TOP_DEVELOPERS = 25
+GEO_DECIMALS = 2           # coordinate cells of ~1 km
+SUMMARY_VERSION = 1
+_SNAPSHOT_TAG = re.compile(r'<meta name="snapshot" content="([0-9a-f]*)">')
+
+
+def tier(value: str) -> str | None:
+    """'min. 8%', '11%-dən' and '16.5' all become a plain '8%' / '11%' / '16.5%'."""
+    number = parse_number(value)
+    return None if math.isnan(number) else rate_tier(number)
+
+
+def _tiers(rows: list[dict], field: str) -> dict[str, dict[str, int]]:
+    """{bank: {tier: count}} with tiers in numeric order."""
+    out: dict[str, Counter] = defaultdict(Counter)
+    for r in rows:
+        t = tier(r[field])
+        if t:
+            out[r["source"]][t] += 1
+    return {bank: dict(sorted(c.items(), key=lambda kv: float(kv[0][:-1])))
+            for bank, c in out.items()}
+
+
+def developer_of(r: dict) -> str:
+    return (r["partner_name"] or r["name"]).strip()
+
+
+def _project(r: dict) -> dict:
+    return {
+        "bank": r["source"],
+        "name": r["name"],
+        "developer": developer_of(r),
+        "city": city_of(r),
+        "address": r["address"],
+        "rate": tier(r["annual_rate"]),
+        "down_payment": tier(r["down_payment"]),
+        "term": r["term"],
+        "phone": r["phone"],
+        "website": r["website"],
+    }
+
+
+# ── aggregation ──────────────────────────────────────────────────────────────
+
+def build(rows: list[dict], snapshot: str | None = None) -> tuple[dict, dict[str, dict]]:
+    """(summary, {slice path: slice}) for the whole dataset, in one pass per view."""
+    banks = [b for b in COLORS if any(r["source"] == b for r in rows)]
+    bank_slug = {b: slug(b) for b in banks}
+    bank_index = {b: i for i, b in enumerate(banks)}
+
+    # Developers are grouped on the ranking key, so "PMD GROUP MMC" and
+    # "PMD Group" are one entry, shown under their most common spelling.
+    by_developer: dict[str, list[dict]] = defaultdict(list)
+    for r in rows:
+        if developer_of(r):
+            by_developer[normalize_key(developer_of(r))].append(r)
+    dev_slug: dict[str, str] = {}
+    taken: Counter = Counter()
+    for key in sorted(by_developer):
+        base = slug(key)
+        taken[base] += 1
+        dev_slug[key] = base if taken[base] == 1 else f"{base}-{taken[base]}"
+
+    def developer_entry(key: str) -> dict:
+        members = by_developer[key]
+        return {
+            "name": Counter(developer_of(r) for r in members).most_common(1)[0][0],
+            "slug": dev_slug[key],
+            "total": len(members),
+            "by_bank": dict(Counter(r["source"] for r in members)),
+        }
+
+    top = sorted(by_developer, key=lambda k: (-len(by_developer[k]), k))[:TOP_DEVELOPERS]
+
+    digital = {}
+    for b in banks:
+        subset = [r for r in rows if r["source"] == b]
+        digital[b] = {f: round(100 * sum(1 for r in subset if r[f].strip()) / len(subset))
+                      for f in ("website", "instagram", "facebook")}
+
+    cities: dict[str, Counter] = defaultdict(Counter)
+    cells: Counter = Counter()
+    for r in rows:
+        city = city_of(r)
+        if city:
+            cities[r["source"]][city] += 1
+        lat, lon = parse_number(r["latitude"]), parse_number(r["longitude"])
+        if not (math.isnan(lat) or math.isnan(lon)) and r["source"] in bank_index:
+            cells[round(lat, GEO_DECIMALS), round(lon, GEO_DECIMALS), bank_index[r["source"]]] += 1
+
+    summary = {
+        "version": SUMMARY_VERSION,
+        "snapshot": snapshot,
+        "rows": len(rows),
+        "banks": [{"name": b, "slug": bank_slug[b], "color": COLORS[b]} for b in banks],
+        "counts": dict(Counter(r["source"] for r in rows)),
+        "rate_tiers": _tiers(rows, "annual_rate"),
+        "downpayment_tiers": _tiers(rows, "down_payment"),
+        "developers": len(by_developer),
+        "top_developers": [developer_entry(k) for k in top],
+        "digital": digital,
+        "cities": {b: dict(c.most_common()) for b, c in cities.items()},
+        # [lat, lon, bank index, count] per rounded coordinate cell
+        "geo": [[lat, lon, b, n] for (lat, lon, b), n in sorted(cells.items())],
+    }
+
+    slices: dict[str, dict] = {}
+    for b in banks:
+        members = [r for r in rows if r["source"] == b]
+        slices[f"bank/{bank_slug[b]}.json"] = {
+            "bank": b,
+            "developers": Counter(developer_of(r) for r in members if developer_of(r)).most_common(),
+            "projects": [_project(r) for r in members],
+        }
+    for key, members in by_developer.items():
+        slices[f"developer/{dev_slug[key]}.json"] = {
+            **developer_entry(key),
+            "projects": [_project(r) for r in members],
+        }
+    return summary, slices
+
+
+# ── output ───────────────────────────────────────────────────────────────────
+
+def _compact(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def _write_text(path: str, text: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def built_snapshot(out_dir: str = OUT_DIR) -> str | None:
+    """Snapshot id the existing page was built from (None if there is no page)."""
+    path = os.path.join(out_dir, "index.html")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        m = _SNAPSHOT_TAG.search(f.read(4096))
+    return m.group(1) if m else None
+
+
+def write(summary: dict, slices: dict[str, dict], out_dir: str = OUT_DIR) -> int:
+    """Write slices, drop stale ones, then swap in the page; returns bytes written."""
+    slice_dir = os.path.join(out_dir, "slices")
+    total = 0
+    for rel, data in slices.items():
+        path = os.path.join(slice_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        text = _compact(data)
+        _write_text(path, text)
+        total += len(text.encode("utf-8"))
+
+    # "</" would end the inline <script> early.
+    inline = _compact(summary).replace("</", "<\\/")
+    page = (PAGE.replace("__SNAPSHOT__", summary["snapshot"] or "")
+                .replace("__SUMMARY__", inline))
+    _write_text(os.path.join(out_dir, "index.html"), page)
+
+    # Only now that the page no longer links to them.
+    keep = {os.path.normpath(os.path.join(slice_dir, rel)) for rel in slices}
+    for dirpath, _, files in os.walk(slice_dir):
+        for name in files:
+            path = os.path.normpath(os.path.join(dirpath, name))
+            if path not in keep:
+                os.remove(path)
+    return total + len(page.encode("utf-8"))
+
+
+@instrument.job("dashboard")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the static dashboard from data/data.csv.")
+    parser.add_argument("--out", default=OUT_DIR, help="output directory (default: dashboard/)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the snapshot is unchanged")
+    args = parser.parse_args()
+
+    snapshot = dataio.snapshot_id(DATA_CSV)
+    if not args.force and snapshot and built_snapshot(args.out) == snapshot:
+        print(f"[OK] Dashboard already built from snapshot {snapshot[:12]} – nothing to do.")
+        return
+
+    with instrument.stage("dashboard.load") as st:
+        rows = dataio.read_csv(DATA_CSV)
+        st.records = len(rows)
+    with instrument.stage("dashboard.aggregate") as st:
+        summary, slices = build(rows, snapshot)
+        st.records = len(slices)
+    with instrument.stage("dashboard.write") as st:
+        os.makedirs(args.out, exist_ok=True)
+        size = write(summary, slices, args.out)
+        st.records = len(slices) + 1
+        st.bytes = size
+
+    print(f"[OK] Dashboard: {len(slices)} slices, summary {len(_compact(summary)) / 1024:.1f} KB "
+          f"→ {os.path.abspath(os.path.join(args.out, 'index.html'))}")
+
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="snapshot" content="__SNAPSHOT__">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Mortgage Partner Market — Dashboard</title>
+<style>
+  body { font: 14px/1.4 "DejaVu Sans", system-ui, sans-serif; margin: 0; color: #222; background: #F8F9F9; }
+  header { padding: 16px 24px; background: #1B2631; color: #fff; }
+  header small { opacity: .7; }
+  main { display: grid; grid-template-columns: repeat(auto-fill, minmax(380px, 1fr)); gap: 16px; padding: 16px 24px; }
+  section { background: #fff; border-radius: 6px; padding: 12px 16px; box-shadow: 0 1px 2px rgba(0,0,0,.08); }
+  section.wide { grid-column: 1 / -1; }
+  h2 { font-size: 15px; margin: 0 0 10px; }
+  .row { display: grid; grid-template-columns: 160px 1fr 48px; align-items: center; gap: 8px; margin: 3px 0; }
+  .row .label { overflow: hidden; text-overflow: ellipsis; white-space: nowrap; }
+  .bar { display: flex; height: 14px; background: #EBEDEF; border-radius: 2px; overflow: hidden; }
+  .bar span { display: block; height: 100%; }
+  .num { text-align: right; font-weight: bold; }
+  .link { color: #2E86C1; cursor: pointer; }
+  .link:hover { text-decoration: underline; }
+  .sub { color: #777; font-size: 12px; margin: 8px 0 2px; }
+  table { border-collapse: collapse; width: 100%; font-size: 13px; }
+  th, td { text-align: left; padding: 4px 6px; border-bottom: 1px solid #EEE; }
+  th { background: #F4F6F6; position: sticky; top: 0; }
+  .scroll { max-height: 480px; overflow: auto; }
+  .legend span { display: inline-block; margin-right: 12px; }
+  .legend i { display: inline-block; width: 10px; height: 10px; margin-right: 4px; }
+</style>
+</head>
+<body>
+<header>
+  <strong>Mortgage Partner Market</strong> — partner projects of Azerbaijani banks
+  <br><small id="meta"></small>
+</header>
+<main>
+  <section><h2>Projects by bank</h2><div id="counts"></div></section>
+  <section><h2>Digital presence (% of partners)</h2><div id="digital"></div></section>
+  <section><h2>Annual rate tiers</h2><div id="rate_tiers"></div></section>
+  <section><h2>Down-payment tiers</h2><div id="downpayment_tiers"></div></section>
+  <section><h2>Top developers</h2><div id="developers"></div></section>
+  <section><h2>Cities</h2><div id="cities"></div><h2 style="margin-top:14px">Coordinates</h2><div id="geo"></div></section>
+  <section class="wide" id="detail" hidden><h2 id="detail-title"></h2><div id="detail-body"></div></section>
+</main>
+<script id="summary" type="application/json">__SUMMARY__</script>
+<script>
+"use strict";
+const S = JSON.parse(document.getElementById("summary").textContent);
+const COLOR = Object.fromEntries(S.banks.map(b => [b.name, b.color]));
+const BANK = Object.fromEntries(S.banks.map(b => [b.name, b]));
+const cache = new Map();
+
+const el = (tag, attrs = {}, ...kids) => {
+  const e = document.createElement(tag);
+  for (const [k, v] of Object.entries(attrs)) k === "onclick" ? (e.onclick = v) : e.setAttribute(k, v);
+  e.append(...kids);
+  return e;
+};
+
+// One labelled bar; parts = [[value, colour], ...] stacked, scaled to max.
+function row(label, parts, max, text, onclick) {
+  const total = parts.reduce((s, [v]) => s + v, 0);
+  const bar = el("div", { class: "bar" },
+    ...parts.map(([v, c]) => el("span", { style: `width:${100 * v / max}%;background:${c}`, title: v })));
+  const name = el("span", { class: "label" + (onclick ? " link" : ""), title: label }, label);
+  if (onclick) name.onclick = onclick;
+  return el("div", { class: "row" }, name, bar, el("span", { class: "num" }, text ?? String(total)));
+}
+
+function bankLink(name) { return () => drill(`slices/bank/${BANK[name].slug}.json`, name, renderBank); }
+
+function renderTiers(id, tiers) {
+  const box = document.getElementById(id);
+  for (const [bank, counts] of Object.entries(tiers)) {
+    const max = Math.max(...Object.values(counts));
+    box.append(el("div", { class: "sub" }, bank));
+    for (const [t, n] of Object.entries(counts)) box.append(row(t, [[n, COLOR[bank]]], max));
+  }
+}
+
+async function drill(url, title, render) {
+  const detail = document.getElementById("detail");
+  detail.hidden = false;
+  document.getElementById("detail-title").textContent = title;
+  const body = document.getElementById("detail-body");
+  body.replaceChildren("Loading…");
+  try {
+    if (!cache.has(url)) {
+      const resp = await fetch(url);
+      if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+      cache.set(url, await resp.json());
+    }
+    body.replaceChildren(render(cache.get(url)));
+  } catch (err) {
+    body.replaceChildren(`Could not load ${url}: ${err.message}. ` +
+      "Serve this directory over HTTP (python -m http.server) rather than opening the file directly.");
+  }
+  detail.scrollIntoView({ behavior: "smooth" });
+}
+
+function projectTable(projects, withBank) {
+  const cols = [["name", "Project"], ["developer", "Developer"], ["city", "City"], ["rate", "Rate"],
+                ["down_payment", "Down payment"], ["term", "Term"], ["phone", "Phone"], ["website", "Website"]];
+  if (withBank) cols.unshift(["bank", "Bank"]);
+  return el("div", { class: "scroll" }, el("table", {},
+    el("tr", {}, ...cols.map(([, h]) => el("th", {}, h))),
+    ...projects.map(p => el("tr", {}, ...cols.map(([k]) => el("td", {}, p[k] ?? ""))))));
+}
+
+function renderBank(d) {
+  const max = d.developers.length ? d.developers[0][1] : 1;
+  const devs = el("div", {}, ...d.developers.slice(0, 10).map(([n, c]) => row(n, [[c, COLOR[d.bank]]], max)));
+  return el("div", {}, el("div", { class: "sub" }, `${d.projects.length} projects · top developers`),
+            devs, el("div", { class: "sub" }, "Projects"), projectTable(d.projects, false));
+}
+
+function renderDeveloper(d) {
+  const banks = Object.entries(d.by_bank).map(([b, n]) => `${b}: ${n}`).join(" · ");
+  return el("div", {}, el("div", { class: "sub" }, `${d.total} projects · ${banks}`),
+            projectTable(d.projects, true));
+}
+
+function renderGeo() {
+  const box = document.getElementById("geo");
+  if (!S.geo.length) { box.textContent = "No coordinates in this snapshot."; return; }
+  const lats = S.geo.map(g => g[0]), lons = S.geo.map(g => g[1]);
+  const [y0, y1, x0, x1] = [Math.min(...lats), Math.max(...lats), Math.min(...lons), Math.max(...lons)];
+  const W = 340, H = 220, pad = 8, k = Math.cos((y0 + y1) / 2 * Math.PI / 180);
+  const sx = (W - 2 * pad) / Math.max((x1 - x0) * k, 1e-6), sy = (H - 2 * pad) / Math.max(y1 - y0, 1e-6);
+  const s = Math.min(sx, sy), top = Math.max(...S.geo.map(g => g[3]));
+  const dots = S.geo.map(([lat, lon, b, n]) =>
+    `<circle cx="${pad + (lon - x0) * k * s}" cy="${H - pad - (lat - y0) * s}" r="${2 + 4 * Math.sqrt(n / top)}"` +
+    ` fill="${S.banks[b].color}" fill-opacity=".55"><title>${lat}, ${lon}: ${n}</title></circle>`).join("");
+  box.innerHTML = `<svg width="${W}" height="${H}" style="background:#F4F6F6">${dots}</svg>`;
+}
+
+function render() {
+  document.getElementById("meta").textContent =
+    `${S.rows} projects · ${S.developers} developers · snapshot ${(S.snapshot || "n/a").slice(0, 12)}`;
+
+  const counts = document.getElementById("counts");
+  const maxCount = Math.max(...Object.values(S.counts));
+  for (const b of S.banks) counts.append(row(b.name, [[S.counts[b.name], b.color]], maxCount, null, bankLink(b.name)));
+
+  const digital = document.getElementById("digital");
+  for (const b of S.banks) {
+    digital.append(el("div", { class: "sub" }, b.name));
+    for (const [f, pct] of Object.entries(S.digital[b.name])) digital.append(row(f, [[pct, b.color]], 100, pct + "%"));
+  }
+
+  renderTiers("rate_tiers", S.rate_tiers);
+  renderTiers("downpayment_tiers", S.downpayment_tiers);
+
+  const devs = document.getElementById("developers");
+  const maxDev = S.top_developers.length ? S.top_developers[0].total : 1;
+  devs.append(el("div", { class: "legend" },
+    ...S.banks.map(b => el("span", {}, el("i", { style: `background:${b.color}` }), b.name))));
+  for (const d of S.top_developers) {
+    const parts = S.banks.filter(b => d.by_bank[b.name]).map(b => [d.by_bank[b.name], b.color]);
+    devs.append(row(d.name, parts, maxDev, null,
+      () => drill(`slices/developer/${d.slug}.json`, d.name, renderDeveloper)));
+  }
+
+  const cities = document.getElementById("cities");
+  const totals = {};
+  for (const [bank, cs] of Object.entries(S.cities))
+    for (const [c, n] of Object.entries(cs)) (totals[c] ??= []).push([n, COLOR[bank]]);
+  const sorted = Object.entries(totals).map(([c, p]) => [c, p, p.reduce((s, [n]) => s + n, 0)])
+                                       .sort((a, b) => b[2] - a[2]);
+  const maxCity = sorted.length ? sorted[0][2] : 1;
+  for (const [c, parts] of sorted.slice(0, 10)) cities.append(row(c, parts, maxCity));
+
+  renderGeo();
+}
+
+render();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    main()
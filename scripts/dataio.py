@@ -0,0 +1,364 @@
+"""
+Shared CSV output / input for the pipeline scripts.
+
+  dataio.save_csv(records, "data/birbank.csv", CSV_FIELDS)
+  rows = dataio.read_csv("data/birbank.csv")
+  header, table = dataio.read_table("data/birbank.csv")   # rows as plain lists
+
+Writes stream rows through a large buffer into <file>.tmp, fsync and
+rename it over the target, so a crash mid-write never leaves a truncated
+CSV for the next stage. Next to each file a sidecar <file>.meta.json
+records the row count, columns and sha256 of the bytes on disk, plus the
+file's size and mtime: a file replaced by something else (git checkout,
+a manual copy) no longer matches them and its sidecar is ignored, while
+a file that changed in place under the same stamp fails verification.
+
+Compression is optional: pass compression="gzip" / "zstd" or set
+CSV_COMPRESSION; the file gets a .gz / .zst suffix (zstd needs the
+`zstandard` package and falls back to gzip without it). Readers are
+handed the plain name and pick up whichever variant exists, verifying it
+against its sidecar when there is one.
+
+NDJSON streaming: with NDJSON_OUT set, scrapers and combine.py also emit
+each record as one JSON line the moment it is parsed, so other tools can
+consume a scrape while it runs:
+
+  NDJSON_OUT=- python scripts/birbank.py | jq .complex_name     # stdout
+  NDJSON_OUT=/tmp/stream/ python scripts/combine.py             # /tmp/stream/combine.ndjson
+  NDJSON_OUT=/tmp/x.ndjson python scripts/xalqbank.py
+
+Lines are flushed every NDJSON_BATCH records or NDJSON_FLUSH seconds,
+whichever comes first. With "-", the script's log output moves to stderr
+so stdout carries nothing but records. The CSV is still written as usual.
+"""
+
+import atexit
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BUFFER_SIZE = 1 << 20          # 1 MiB write buffer
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+META_SUFFIX = ".meta.json"
+NDJSON_ENV = "NDJSON_OUT"
+NDJSON_BATCH = 100             # records per flush
+NDJSON_FLUSH = 1.0             # …or seconds since the last flush
+
+
+class ChecksumError(ValueError):
+    """A CSV does not match the row count / checksum in its sidecar."""
+
+
+class _HashingWriter(io.RawIOBase):
+    """Raw stream hashing every byte on its way to disk (never closes raw)."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        self.raw.write(data)
+        return len(data)
+
+
+def _compression(compression: str | None) -> str | None:
+    compression = compression if compression is not None else os.environ.get("CSV_COMPRESSION") or None
+    if compression not in SUFFIXES:
+        raise ValueError(f"unknown compression {compression!r} (use gzip or zstd)")
+    if compression == "zstd" and zstandard is None:
+        print("[WARN] zstandard not installed – writing gzip instead.")
+        return "gzip"
+    return compression
+
+
+def _variants(path: str) -> list[str]:
+    return [path + suffix for suffix in SUFFIXES.values()]
+
+
+def resolve(path: str) -> str | None:
+    """Return the existing variant of path (plain, .gz or .zst), if any."""
+    for candidate in _variants(path):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_csv(path: str, rows, fields: list[str], compression: str | None = None) -> int:
+    """
+    Stream rows (any iterable of dicts) to path atomically; return rows written.
+    Keys not in fields are ignored, missing ones are written empty.
+    """
+    compression = _compression(compression)
+    target = path + SUFFIXES[compression]
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    tmp = target + ".tmp"
+
+    count = 0
+    try:
+        with open(tmp, "wb", buffering=0) as raw:
+            hashed = _HashingWriter(raw)
+            if compression == "gzip":
+                stream = gzip.GzipFile(fileobj=hashed, mode="wb",
+                                       compresslevel=GZIP_LEVEL, mtime=0)
+            elif compression == "zstd":
+                stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(
+                    hashed, closefd=False)
+            else:
+                stream = hashed
+            # One big buffer in front of the compressor / disk: csv writes
+            # row-sized strings, the file sees BUFFER_SIZE chunks.
+            text = io.TextIOWrapper(io.BufferedWriter(stream, BUFFER_SIZE),
+                                    encoding="utf-8", newline="")
+            writer = csv.DictWriter(text, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+            text.close()  # flushes the chain; compressors write their trailer
+            os.fsync(raw.fileno())
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    meta = {
+        "rows": count,
+        "fields": list(fields),
+        "bytes": hashed.size,
+        "sha256": hashed.sha256.hexdigest(),
+        "mtime_ns": os.stat(target).st_mtime_ns,
+        "compression": compression,
+        "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    _write_atomic(target + META_SUFFIX,
+                  (json.dumps(meta, ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+
+    # Drop variants written with other settings so readers never see stale data.
+    for other in _variants(path):
+        if other != target:
+            for stale in (other, other + META_SUFFIX):
+                if os.path.exists(stale):
+                    os.remove(stale)
+    return count
+
+
+def save_csv(records: list[dict], filepath: str, fields: list[str]) -> int:
+    """The scrapers' save step: write records, report, return rows written."""
+    if not records:
+        print("[WARN] No records to save.")
+        return 0
+    count = write_csv(filepath, records, fields)
+    print(f"[OK] Saved {count} records → {os.path.abspath(resolve(filepath))}")
+    return count
+
+
+def read_meta(path: str) -> dict | None:
+    """The sidecar of path, or None if there is none or it describes another file."""
+    meta_path = path + META_SUFFIX
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    st = os.stat(path)
+    if (st.st_size, st.st_mtime_ns) != (meta.get("bytes"), meta.get("mtime_ns")):
+        print(f"[WARN] {os.path.basename(path)} was replaced outside dataio – ignoring its sidecar.")
+        return None
+    return meta
+
+
+def snapshot_id(path: str) -> str | None:
+    """
+    Content id of the file behind path: the sidecar's sha256, or a hash of
+    the bytes when there is no sidecar. Used to key per-snapshot caches.
+    """
+    actual = resolve(path)
+    if actual is None:
+        return None
+    meta = read_meta(actual)
+    if meta:
+        return meta["sha256"]
+    sha = hashlib.sha256()
+    with open(actual, "rb") as f:
+        for chunk in iter(lambda: f.read(BUFFER_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def read_table(path: str) -> tuple[list[str], list[list[str]]]:
+    """
+    Read a CSV written by write_csv (or any UTF-8 CSV) as (header, rows),
+    each row a plain list of strings (blank lines dropped, ragged rows
+    kept as they are). path may name the plain file; a .gz / .zst variant
+    is used if that is what exists. Raises FileNotFoundError if none does
+    and ChecksumError if the file disagrees with its sidecar.
+    """
+    actual = resolve(path)
+    if actual is None:
+        raise FileNotFoundError(path)
+    with open(actual, "rb") as f:
+        data = f.read()
+
+    meta = read_meta(actual)
+    if meta and hashlib.sha256(data).hexdigest() != meta["sha256"]:
+        raise ChecksumError(f"{actual}: checksum does not match {actual + META_SUFFIX}")
+
+    if actual.endswith(".gz"):
+        data = gzip.decompress(data)
+    elif actual.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{actual}: reading .zst files needs the zstandard package")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+    # Decode incrementally: a full str copy of non-ASCII text costs 2-4x the bytes.
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline=""))
+    header = next(reader, [])
+    rows = list(filter(None, reader))
+
+    if meta and len(rows) != meta["rows"]:
+        raise ChecksumError(f"{actual}: {len(rows)} rows, sidecar says {meta['rows']}")
+    return header, rows
+
+
+def read_csv(path: str) -> list[dict]:
+    """read_table as a list of dicts keyed by the header."""
+    header, table = read_table(path)
+    width = len(header)
+    rows = []
+    for row in table:
+        if len(row) == width:
+            rows.append(dict(zip(header, row)))
+        else:  # ragged row: same shape csv.DictReader would give
+            rec = dict(zip(header, row))
+            for key in header[len(row):]:
+                rec[key] = None
+            if len(row) > width:
+                rec[None] = row[width:]
+            rows.append(rec)
+    return rows
+
+
+class NdjsonWriter:
+    """
+    One JSON object per line, keys in `fields` order, flushed in batches.
+    Thread-safe, so crawler workers can write straight into it.
+    """
+
+    def __init__(self, stream, fields: list[str] | None = None, owns_stream: bool = True,
+                 batch: int = NDJSON_BATCH, interval: float = NDJSON_FLUSH):
+        self.stream = stream
+        self.fields = fields
+        self.owns_stream = owns_stream
+        self.batch = batch
+        self.interval = interval
+        self.count = 0
+        self._pending: list[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def write(self, record: dict) -> None:
+        if self.fields is not None:
+            record = {f: record.get(f, "") for f in self.fields}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._pending.append(line)
+            self.count += 1
+            if (len(self._pending) >= self.batch
+                    or time.monotonic() - self._last_flush >= self.interval):
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._closed:
+            self._pending = []
+            return
+        try:
+            if self._pending:
+                self.stream.write(("\n".join(self._pending) + "\n").encode("utf-8"))
+            self.stream.flush()
+        except BrokenPipeError:
+            # The consumer stopped reading (`| head`); the CSV is still written.
+            print("[WARN] NDJSON consumer went away – no longer streaming.")
+            self._closed = True
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._closed = True
+            if self.owns_stream:
+                self.stream.close()
+
+    def __enter__(self) -> "NdjsonWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def ndjson_sink(name: str, fields: list[str] | None = None,
+                target: str | None = None) -> NdjsonWriter | None:
+    """
+    The NDJSON stream for a script, or None when streaming is off.
+    target (default: $NDJSON_OUT) is "-" for stdout, a directory (→
+    <dir>/<name>.ndjson) or a file path.
+    """
+    target = target if target is not None else os.environ.get(NDJSON_ENV)
+    if not target:
+        return None
+    if target == "-":
+        out = sys.stdout.buffer
+        sys.stdout = sys.stderr  # keep [INFO] lines out of the record stream
+        return NdjsonWriter(out, fields, owns_stream=False)
+    if target.endswith(os.sep) or os.path.isdir(target):
+        os.makedirs(target, exist_ok=True)
+        target = os.path.join(target, f"{name}.ndjson")
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    return NdjsonWriter(open(target, "wb"), fields)
+
+
+def ndjson_emitter(name: str, fields: list[str] | None = None):
+    """
+    writer.write of the script's NDJSON stream (closed at exit), or None
+    when NDJSON_OUT is not set – parse functions take it as `emit`.
+    """
+    sink = ndjson_sink(name, fields)
+    if sink is None:
+        return None
+    atexit.register(sink.close)
+    return sink.write
@@ -1,7 +1,8 @@
 """
 Mortgage Partner Market Analysis — Chart Generator
 Reads: data/data.csv
-Writes: charts/*.png  (7 charts)
+Writes: charts/*.png  (8 charts)
+        data/geo_density/*.npz  (binned coordinates, cached per data snapshot)
 
 Charts produced
 ---------------
@@ -12,9 +13,11 @@ Charts produced
 05  Top 10 developers by project count (BirBank)
 06  Digital presence coverage by bank
 07  Geographic distribution of partners (all banks)
+08  Geographic density of complex coordinates, per bank
 """
 
-import csv
+import argparse
+import hashlib
 import os
 import re
 from collections import Counter, defaultdict
@@ -25,6 +28,10 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 
+import dataio
+import instrument
+from textnorm import city_of
+
 # ── paths ────────────────────────────────────────────────────────────────────
 ROOT     = os.path.join(os.path.dirname(__file__), "..")
 DATA_CSV = os.path.join(ROOT, "data", "data.csv")
@@ -64,8 +71,7 @@ def _save(fig, name):
 
 
 def load_data():
-    with open(DATA_CSV, encoding="utf-8") as f:
-        return list(csv.DictReader(f))
+    return dataio.read_csv(DATA_CSV)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -260,21 +266,7 @@ def chart_07_geographic(rows):
     """Classify each record's city from region field or address keywords."""
     city_map = {}
     for r in rows:
-        city = ""
-        if r["region"].strip():
-            city = r["region"].strip()
-        else:
-            addr = r["address"].lower()
-            if "bakı" in addr or "baku" in addr or "ağ şəhər" in addr:
-                city = "Bakı"
-            elif "sumqayıt" in addr or "sumgait" in addr:
-                city = "Sumqayıt"
-            elif "gəncə" in addr or "ganje" in addr:
-                city = "Gəncə"
-            elif "xırdalan" in addr:
-                city = "Xırdalan"
-            elif "abşeron" in addr:
-                city = "Abşeron"
+        city = city_of(r)
         if city:
             city_map[r["name"] + r["source"]] = city
 
@@ -305,19 +297,173 @@ def chart_07_geographic(rows):
 
 
 # ─────────────────────────────────────────────────────────────────────────────
+# Chart 08 — Geographic density of complex coordinates
+# ─────────────────────────────────────────────────────────────────────────────
+# (title, lon_min, lon_max, lat_min, lat_max, bin size in degrees)
+GEO_PANELS = (
+    ("Azerbaijan",      44.7, 50.7, 38.3, 42.0, 0.05),
+    ("Baku / Absheron", 49.6, 50.4, 40.25, 40.65, 0.01),
+)
+GEO_CACHE_DIR = os.path.join(ROOT, "data", "geo_density")
+GEO_CACHE_KEEP = 4         # snapshots kept on disk
+
+
+def _coords(rows) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(lat, lon, bank index into COLORS) for every row with both coordinates."""
+    def floats(field):
+        values = [r[field] or "nan" for r in rows]
+        try:
+            return np.asarray(values, dtype=float)
+        except ValueError:  # a stray non-numeric value: parse one by one
+            return np.array([_float(v) for v in values])
+
+    lat, lon = floats("latitude"), floats("longitude")
+    code = {b: i for i, b in enumerate(COLORS)}
+    bank = np.array([code.get(r["source"], -1) for r in rows], dtype=np.int8)
+    keep = ~(np.isnan(lat) | np.isnan(lon)) & (bank >= 0)
+    return lat[keep], lon[keep], bank[keep]
+
+
+def _float(value: str) -> float:
+    try:
+        return float(value.replace(",", "."))
+    except ValueError:
+        return float("nan")
+
+
+def _geo_cache_path(snapshot: str) -> str:
+    # The panel layout is part of the key, so editing GEO_PANELS re-bins.
+    layout = hashlib.sha256(repr(GEO_PANELS).encode()).hexdigest()[:8]
+    return os.path.join(GEO_CACHE_DIR, f"{snapshot[:16]}-{layout}.npz")
+
+
+def geo_grids(rows, snapshot: str | None = None) -> list[np.ndarray]:
+    """
+    Per panel, a (bank, lat bin, lon bin) count array — each bank's points
+    binned with one np.histogram2d call, whatever the number of points.
+    With a snapshot id the grids are cached in data/geo_density/, so
+    re-rendering an unchanged data.csv skips the coordinate parsing and
+    binning (main() still loads data.csv, which the other charts need).
+    """
+    path = _geo_cache_path(snapshot) if snapshot else None
+    if path and os.path.exists(path):
+        with np.load(path) as cached:
+            return [cached[f"panel{i}"] for i in range(len(GEO_PANELS))]
+
+    lat, lon, bank = _coords(rows)
+    grids = []
+    for _, x0, x1, y0, y1, step in GEO_PANELS:
+        shape = (round((y1 - y0) / step), round((x1 - x0) / step))
+        grid = np.zeros((len(COLORS), *shape), dtype=np.int32)
+        for b in np.unique(bank):
+            sel = bank == b
+            grid[b], _, _ = np.histogram2d(lat[sel], lon[sel], bins=shape,
+                                           range=((y0, y1), (x0, x1)))
+        grids.append(grid)
+
+    if path:
+        os.makedirs(GEO_CACHE_DIR, exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, **{f"panel{i}": g for i, g in enumerate(grids)})
+        os.replace(tmp, path)
+        stale = sorted((os.path.join(GEO_CACHE_DIR, f) for f in os.listdir(GEO_CACHE_DIR)
+                        if f.endswith(".npz")), key=os.path.getmtime)
+        for old in stale[:-GEO_CACHE_KEEP]:
+            os.remove(old)
+    return grids
+
+
+def chart_08_geo_density(rows, snapshot: str | None = None):
+    """Binned complex coordinates, one translucent colour layer per bank."""
+    grids = geo_grids(rows, snapshot)
+    banks = list(COLORS)
+
+    fig, axes = plt.subplots(1, len(GEO_PANELS), figsize=(FIG_W + 4, FIG_H))
+    for ax, grid, (title, x0, x1, y0, y1, _) in zip(axes, grids, GEO_PANELS):
+        ax.grid(False)
+        ax.set_facecolor("#F8F9F9")
+        top = np.log1p(grid.max()) or 1.0
+        for b in np.flatnonzero(grid.sum(axis=(1, 2))):
+            # One RGBA image per bank: the bank's colour, alpha by log density.
+            layer = np.zeros((*grid.shape[1:], 4))
+            layer[..., :3] = matplotlib.colors.to_rgb(COLORS[banks[b]])
+            layer[..., 3] = 0.15 + 0.85 * np.log1p(grid[b]) / top
+            layer[grid[b] == 0, 3] = 0.0
+            ax.imshow(layer, extent=(x0, x1, y0, y1), origin="lower",
+                      interpolation="nearest", aspect="auto")
+        ax.set_xlim(x0, x1)
+        ax.set_ylim(y0, y1)
+        ax.set_aspect(1 / np.cos(np.radians((y0 + y1) / 2)))
+        ax.set_title(f"{title} — {int(grid.sum())} complexes", fontsize=11)
+        ax.set_xlabel("Longitude")
+    axes[0].set_ylabel("Latitude")
+
+    present = [banks[b] for b in np.flatnonzero(sum(g.sum(axis=(1, 2)) for g in grids))]
+    handles = [mpatches.Patch(color=COLORS[b], label=b) for b in present]
+    if handles:
+        axes[-1].legend(handles=handles, loc="upper right", framealpha=0.9)
+    fig.suptitle("Geographic Density of Partner Complexes\n"
+                 "Complex coordinates binned per bank (darker = more complexes)",
+                 fontsize=13)
+    _save(fig, "08_geographic_density.png")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+CHARTS = [
+    chart_01_network_size,
+    chart_02_birbank_rate_tiers,
+    chart_03_birbank_downpayment,
+    chart_04_rate_vs_downpayment,
+    chart_05_top_developers,
+    chart_06_digital_presence,
+    chart_07_geographic,
+    chart_08_geo_density,
+]
+
+# Banks each chart reads; charts not listed read every bank. Lets a refresh
+# of one source redraw only the charts it can change (see scheduler.py).
+CHART_SOURCES = {
+    "chart_02_birbank_rate_tiers": {"BirBank"},
+    "chart_03_birbank_downpayment": {"BirBank"},
+    "chart_04_rate_vs_downpayment": {"BirBank"},
+    "chart_05_top_developers": {"BirBank"},
+}
+
+# Charts that cache derived data per snapshot take its id as a second argument.
+SNAPSHOT_CHARTS = {"chart_08_geo_density"}
+
+
+def charts_for(sources=None) -> list:
+    """Charts affected by a change in any of sources (all charts if None)."""
+    if not sources:
+        return list(CHARTS)
+    sources = set(sources)
+    return [c for c in CHARTS
+            if c.__name__ not in CHART_SOURCES or CHART_SOURCES[c.__name__] & sources]
+
+
+@instrument.job("charts")
 def main():
+    parser = argparse.ArgumentParser(description="Regenerate the charts from data/data.csv.")
+    parser.add_argument("--sources", help='only charts reading these banks, e.g. "BirBank,ABB Home"')
+    args = parser.parse_args()
+    charts = charts_for(args.sources.split(",") if args.sources else None)
+
     print("Loading data...")
-    rows = load_data()
+    with instrument.stage("charts.load") as st:
+        rows = load_data()
+        st.records = len(rows)
+    snapshot = dataio.snapshot_id(DATA_CSV)
     print(f"  {len(rows)} rows loaded from {len({r['source'] for r in rows})} banks\n")
 
     print("Generating charts...")
-    chart_01_network_size(rows)
-    chart_02_birbank_rate_tiers(rows)
-    chart_03_birbank_downpayment(rows)
-    chart_04_rate_vs_downpayment(rows)
-    chart_05_top_developers(rows)
-    chart_06_digital_presence(rows)
-    chart_07_geographic(rows)
+    for chart in charts:
+        with instrument.stage(f"charts.{chart.__name__}") as st:
+            if chart.__name__ in SNAPSHOT_CHARTS:
+                chart(rows, snapshot)
+            else:
+                chart(rows)
+            st.records = len(rows)
 
     print(f"\nAll charts saved to: {os.path.abspath(CHART_DIR)}/")
 
@@ -0,0 +1,327 @@
+"""
+Shared HTTP request scheduler for all scrapers.
+
+Every outgoing request goes through one process-wide Scheduler, which keeps
+per-host state:
+
+  token bucket      → caps the request rate (requests/second, with burst)
+  concurrency limit → caps requests in flight; adapts with AIMD:
+                        + 1/limit per fast success (up to max_concurrency)
+                        × 0.5 on 429 / 5xx / connection error
+                        × 0.9 when latency exceeds LATENCY_FACTOR × best seen
+  rate              → halves on throttling, recovers by RATE_RECOVERY of the
+                        configured ceiling per success
+  cooldown          → a Retry-After header pauses the whole host
+
+Failed attempts (connection errors, timeouts, 429, 500/502/503/504) are
+retried up to `max_retries` times with full-jitter exponential backoff, or
+after the server's Retry-After if one was sent. When retries run out the
+last response is returned (callers still call `raise_for_status()`) or the
+last exception is re-raised, so existing error handling keeps working.
+
+Base-URL override: when SCRAPER_BASE_URL is set (or set_base_url() is
+called), every request keeps its path and query but is sent to that
+scheme://host instead — e.g. the local stand-in in benchmarks/mock_server.py.
+Per-host limits stay keyed by the original bank host, so each bank's policy
+still applies when all four are served from one address.
+
+Usage:
+  import http_client
+  resp = http_client.get(url, session=session, timeout=30)
+  http_client.configure("ipoteka.birbank.az", rate=5, max_concurrency=4)
+  SCRAPER_BASE_URL=http://127.0.0.1:8800 python scripts/birbank.py
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+import instrument
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_RATE = 2.0          # requests/second per host
+DEFAULT_BURST = 4
+DEFAULT_CONCURRENCY = 4
+MIN_RATE = 0.2
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5          # seconds
+BACKOFF_CAP = 30.0
+MAX_RETRY_AFTER = 120.0     # never honour absurd Retry-After values
+LATENCY_FACTOR = 3.0
+RATE_RECOVERY = 0.05
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BASE_URL_ENV = "SCRAPER_BASE_URL"
+
+# Known hosts: what each bank tolerates without throttling us.
+HOST_DEFAULTS = {
+    "ipoteka.birbank.az": {"rate": 4.0, "burst": 4, "max_concurrency": 4},
+    "ipoteka.pashabank.az": {"rate": 1.0, "burst": 2, "max_concurrency": 2},
+    "www.xalqbank.az": {"rate": 1.0, "burst": 2, "max_concurrency": 2},
+    "abbhome.az": {"rate": 2.0, "burst": 4, "max_concurrency": 4},
+}
+
+
+_base_url: str | None = os.environ.get(BASE_URL_ENV) or None
+
+
+def set_base_url(base_url: str | None) -> None:
+    """Send all requests to `base_url` (scheme://host[:port]); None restores."""
+    global _base_url
+    _base_url = base_url.rstrip("/") if base_url else None
+
+
+def rebase(url: str, base_url: str | None = None) -> str:
+    """Point an absolute URL at the override host, keeping path and query."""
+    base_url = base_url or _base_url
+    if not base_url:
+        return url
+    parts = urlsplit(url)
+    return base_url.rstrip("/") + parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After as seconds from now; accepts delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `acquire()` blocks until a token is free."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate: float) -> None:
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostState:
+    """Rate, concurrency and health bookkeeping for one host."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST,
+                 max_concurrency: int = DEFAULT_CONCURRENCY):
+        self.max_rate = rate
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst)
+        # Slow start: begin at half the allowed concurrency and earn the rest.
+        self.limit = max(1.0, max_concurrency / 2)
+        self.in_flight = 0
+        self.cond = threading.Condition()
+        self.cooldown_until = 0.0
+        self.latency: float | None = None       # EWMA, seconds
+        self.best_latency: float | None = None
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "errors": 0}
+
+    def configure(self, rate: float | None = None, burst: float | None = None,
+                  max_concurrency: int | None = None) -> None:
+        with self.cond:
+            if rate is not None:
+                self.max_rate = rate
+                self.bucket.set_rate(rate)
+            if burst is not None:
+                self.bucket.capacity = burst
+            if max_concurrency is not None:
+                self.max_concurrency = max_concurrency
+                self.limit = min(self.limit, max_concurrency)
+            self.cond.notify_all()
+
+    def acquire(self) -> None:
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+        delay = self.cooldown_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.bucket.acquire()
+
+    def release(self, elapsed: float, outcome: str = "ok",
+                retry_after: float | None = None, retrying: bool = False) -> None:
+        """outcome: "ok", "throttled" (429/5xx), "errors" (no response) or
+        "aborted" (the request failed for a reason that says nothing about
+        the host: only the slot is returned, limits and stats stay as they are)."""
+        with self.cond:
+            self.in_flight -= 1
+            if outcome == "aborted":
+                self.cond.notify_all()
+                return
+            self.stats["requests"] += 1
+            if retrying:
+                self.stats["retries"] += 1
+            if outcome == "ok":
+                self._on_success(elapsed)
+            else:
+                self.stats[outcome] += 1
+                self.limit = max(1.0, self.limit / 2)
+                self.bucket.set_rate(max(MIN_RATE, self.bucket.rate / 2))
+                if retry_after:
+                    self.cooldown_until = max(self.cooldown_until,
+                                              time.monotonic() + retry_after)
+            self.cond.notify_all()
+
+    def _on_success(self, elapsed: float) -> None:
+        self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        if self.best_latency is None or elapsed < self.best_latency:
+            self.best_latency = elapsed
+        if self.latency > LATENCY_FACTOR * max(self.best_latency, 0.05):
+            # Server is slowing down under our load — back off gently.
+            self.limit = max(1.0, self.limit * 0.9)
+            return
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate,
+                                     self.bucket.rate + RATE_RECOVERY * self.max_rate))
+
+
+def _body_size(resp: requests.Response, streamed: bool) -> int:
+    """Bytes received; for stream=True the Content-Length, since the body is the caller's to read."""
+    if not streamed:
+        return len(resp.content)
+    length = resp.headers.get("content-length", "")
+    return int(length) if length.isdigit() else 0
+
+
+class Scheduler:
+    def __init__(self, max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE, backoff_cap: float = BACKOFF_CAP):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._hosts: dict[str, HostState] = {}
+        self._configured: set[str] = set()
+        self._lock = threading.Lock()
+
+    def host(self, netloc: str) -> HostState:
+        with self._lock:
+            state = self._hosts.get(netloc)
+            if state is None:
+                state = HostState(**HOST_DEFAULTS.get(netloc, {}))
+                self._hosts[netloc] = state
+            return state
+
+    def configure(self, netloc: str, **limits) -> None:
+        self.host(netloc).configure(**limits)
+        with self._lock:
+            self._configured.add(netloc)
+
+    def is_configured(self, netloc: str) -> bool:
+        """True if the host has HOST_DEFAULTS or was configured explicitly."""
+        with self._lock:
+            return netloc in HOST_DEFAULTS or netloc in self._configured
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def request(self, method: str, url: str,
+                session: requests.Session | None = None, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        netloc = urlsplit(url).netloc
+        state = self.host(netloc)
+        url = rebase(url)
+        send = session.request if session is not None else requests.request
+
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            state.acquire()
+            start = time.monotonic()
+            try:
+                resp = send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                state.release(time.monotonic() - start, "errors", retrying=not last)
+                if last:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"[WARN] {netloc}: {type(exc).__name__} – "
+                      f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Not worth a retry (bad URL, redirect loop, broken body, …),
+                # and no sign of an overloaded host: just return the slot.
+                state.release(time.monotonic() - start, "aborted")
+                raise
+
+            elapsed = time.monotonic() - start
+            instrument.add_bytes(_body_size(resp, kwargs.get("stream", False)))
+            if resp.status_code not in RETRY_STATUSES:
+                state.release(elapsed)
+                return resp
+
+            retry_after = parse_retry_after(resp.headers.get("retry-after"))
+            state.release(elapsed, "throttled", retry_after, retrying=not last)
+            if last:
+                return resp
+            resp.close()  # hand the connection back to the pool before the retry
+            if retry_after is not None:
+                # The host cooldown makes every thread (this one included)
+                # wait in acquire(); no extra sleep here.
+                print(f"[WARN] {netloc}: HTTP {resp.status_code} – "
+                      f"Retry-After {retry_after:.1f}s ({attempt + 1}/{self.max_retries})")
+            else:
+                delay = self._backoff(attempt)
+                print(f"[WARN] {netloc}: HTTP {resp.status_code} – "
+                      f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            netloc: dict(s.stats, rate=round(s.bucket.rate, 2), concurrency=int(s.limit),
+                         latency_ms=round((s.latency or 0) * 1000, 1))
+            for netloc, s in hosts.items()
+        }
+
+
+SCHEDULER = Scheduler()
+
+
+def get(url: str, session: requests.Session | None = None, **kwargs) -> requests.Response:
+    return SCHEDULER.request("GET", url, session=session, **kwargs)
+
+
+def head(url: str, session: requests.Session | None = None, **kwargs) -> requests.Response:
+    return SCHEDULER.request("HEAD", url, session=session, **kwargs)
+
+
+def configure(netloc: str, **limits) -> None:
+    SCHEDULER.configure(netloc, **limits)
+
+
+def is_configured(netloc: str) -> bool:
+    return SCHEDULER.is_configured(netloc)
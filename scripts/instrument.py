@@ -0,0 +1,426 @@
+"""
+Lightweight per-stage instrumentation for the pipeline scripts.
+Writes: data/metrics/<job>.json  (run report)
+        data/metrics/<job>.prom  (Prometheus textfile-collector format)
+
+Each script marks its steps as stages and counts what they did:
+
+  @instrument.job("birbank")
+  def main():
+      with instrument.stage("birbank.fetch"):
+          partners = fetch_partners()         # bytes counted by http_client
+      with instrument.stage("birbank.flatten") as st:
+          records = flatten_partners(partners)
+          st.records = len(records)
+      with instrument.stage("birbank.save_csv") as st:
+          st.rows = dataio.save_csv(records, OUTPUT_FILE, CSV_FIELDS)
+
+Per stage: wall time, bytes fetched, records parsed (+ records/s) and rows
+written. Bytes are added to the innermost open stage by http_client, so
+worker threads inside a stage are counted too. When the job finishes
+(normally, by early return after instrument.fail(), or by exception) both
+files are written atomically, ready for node_exporter's textfile collector;
+a run marked failed then exits with status 1.
+Set METRICS_DIR to write somewhere else; METRICS_DIR="" disables export.
+
+Memory profiling (off by default, it slows the run down):
+
+  python scripts/combine.py --profile-memory
+  python scripts/generate_charts.py --memory-budget 'charts.*=150' --memory-budget charts.load=20
+
+adds, per stage, the Python heap peak above the stage's starting point
+(tracemalloc), the peak process RSS and the top allocation sites still
+held when the stage ends. A budget NAME=MB (fnmatch pattern, first match
+wins) caps a stage's heap peak; any stage over budget fails the run with
+exit status 1 after the report is written. The same settings can be given
+as PROFILE_MEMORY=1 and MEMORY_BUDGETS="charts.*=150,combine.read=50".
+"""
+
+import fnmatch
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_DIR = os.environ.get(
+    "METRICS_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "metrics")
+)
+METRIC_PREFIX = "ipoteka"
+
+TRACE_DEPTH = 8            # frames kept per allocation
+TOP_ALLOCATIONS = 5        # allocation sites reported per stage
+RSS_SAMPLE_INTERVAL = 0.005
+_IGNORED_FRAMES = (tracemalloc.__file__, __file__, "<frozen importlib._bootstrap>",
+                   "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+class Stage:
+    __slots__ = ("name", "wall_s", "bytes", "records", "rows",
+                 "mem_peak", "rss_peak", "top_allocations", "budget_mb")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_s = 0.0
+        self.bytes = 0
+        self.records = 0
+        self.rows = 0
+        self.mem_peak: int | None = None
+        self.rss_peak: int | None = None
+        self.top_allocations: list[dict] = []
+        self.budget_mb: float | None = None
+
+    @property
+    def over_budget(self) -> bool:
+        return (self.budget_mb is not None and self.mem_peak is not None
+                and self.mem_peak > self.budget_mb * 1024 * 1024)
+
+    @property
+    def records_per_s(self) -> float:
+        return self.records / self.wall_s if self.wall_s else 0.0
+
+    def as_dict(self) -> dict:
+        d = {
+            "name": self.name,
+            "wall_s": round(self.wall_s, 6),
+            "bytes": self.bytes,
+            "records": self.records,
+            "records_per_s": round(self.records_per_s, 1),
+            "rows": self.rows,
+        }
+        if self.mem_peak is not None:
+            d["memory"] = {
+                "heap_peak_kb": round(self.mem_peak / 1024, 1),
+                "rss_peak_kb": round(self.rss_peak / 1024, 1) if self.rss_peak else None,
+                "budget_mb": self.budget_mb,
+                "over_budget": self.over_budget,
+                "top_allocations": self.top_allocations,
+            }
+        return d
+
+
+def _rss_bytes() -> int | None:
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _max_rss_bytes() -> int | None:
+    """Process-lifetime RSS high-water mark (fallback when /proc is missing)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def parse_budgets(specs) -> list[tuple[str, float]]:
+    """["charts.*=150", "combine.read=50"] -> [("charts.*", 150.0), ...]"""
+    budgets = []
+    for spec in specs:
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            pattern, sep, mb = item.rpartition("=")
+            if not sep or not pattern.strip():
+                raise ValueError(f"memory budget must be NAME=MB, got {item!r}")
+            budgets.append((pattern.strip(), float(mb)))
+    return budgets
+
+
+class MemoryProfiler:
+    """
+    Per-stage heap peak (tracemalloc), RSS peak and top allocation sites.
+
+    tracemalloc has a single global peak, so on every stage boundary the
+    current peak is folded into all open stages before it is reset; nested
+    stages therefore still report correct peaks for their parents.
+    """
+
+    def __init__(self, budgets: list[tuple[str, float]] | None = None,
+                 top: int = TOP_ALLOCATIONS):
+        self.budgets = budgets or []
+        self.top = top
+        self._frames: list[dict] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._started_tracing = False
+
+    def budget_for(self, name: str) -> float | None:
+        for pattern, mb in self.budgets:
+            if fnmatch.fnmatchcase(name, pattern):
+                return mb
+        return None
+
+    def begin(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_DEPTH)
+            self._started_tracing = True
+        if _rss_bytes() is not None:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+            self._sampler.start()
+
+    def end(self) -> None:
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def _sample_rss(self) -> None:
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            rss = _rss_bytes()
+            with self._lock:
+                for frame in self._frames:
+                    frame["rss"] = max(frame["rss"], rss)
+
+    def _fold_peak(self) -> None:
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in self._frames:
+            frame["peak"] = max(frame["peak"], peak)
+        tracemalloc.reset_peak()
+
+    def start(self, st: Stage) -> None:
+        st.budget_mb = self.budget_for(st.name)
+        snapshot = tracemalloc.take_snapshot()
+        with self._lock:
+            self._fold_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            self._frames.append({"stage": st, "base": base, "peak": base,
+                                 "rss": _rss_bytes() or 0, "snapshot": snapshot})
+
+    def stop(self, st: Stage) -> None:
+        with self._lock:
+            self._fold_peak()
+            frame = next(f for f in reversed(self._frames) if f["stage"] is st)
+            self._frames.remove(frame)
+        st.mem_peak = frame["peak"] - frame["base"]
+        st.rss_peak = frame["rss"] or _max_rss_bytes()
+
+        filters = [tracemalloc.Filter(False, name) for name in _IGNORED_FRAMES]
+        diff = tracemalloc.take_snapshot().filter_traces(filters).compare_to(
+            frame["snapshot"].filter_traces(filters), "lineno")
+        st.top_allocations = [
+            {"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+             "kb": round(s.size_diff / 1024, 1), "count": s.count_diff}
+            for s in diff if s.size_diff > 0
+        ][:self.top]
+        if st.over_budget:
+            print(f"[ERROR] {st.name}: heap peak {st.mem_peak / 1048576:.1f} MB "
+                  f"exceeds budget {st.budget_mb:g} MB")
+
+
+class Run:
+    def __init__(self, job: str = ""):
+        self.job = job
+        self.started = time.time()
+        self.finished: float | None = None
+        self.stages: list[Stage] = []
+        self.error: str | None = None
+        self._open: list[Stage] = []
+        self._lock = threading.Lock()
+        self.profiler: MemoryProfiler | None = None
+
+    def add_bytes(self, n: int) -> None:
+        with self._lock:
+            if self._open:
+                self._open[-1].bytes += n
+
+    def report(self) -> dict:
+        finished = self.finished or time.time()
+        return {
+            "job": self.job,
+            "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+            "finished_at": datetime.fromtimestamp(finished, timezone.utc).isoformat(),
+            "wall_s": round(finished - self.started, 6),
+            "success": self.error is None,
+            "error": self.error,
+            "stages": [s.as_dict() for s in self.stages],
+        }
+
+    def over_budget(self) -> list[Stage]:
+        return [s for s in self.stages if s.over_budget]
+
+
+RUN = Run()
+
+
+@contextmanager
+def stage(name: str):
+    st = Stage(name)
+    profiler = RUN.profiler
+    with RUN._lock:
+        RUN._open.append(st)
+    if profiler:
+        profiler.start(st)
+    start = time.perf_counter()
+    try:
+        yield st
+    finally:
+        st.wall_s = time.perf_counter() - start
+        if profiler:
+            profiler.stop(st)
+        with RUN._lock:
+            RUN._open.remove(st)
+            RUN.stages.append(st)
+
+
+def add_bytes(n: int) -> None:
+    RUN.add_bytes(n)
+
+
+def fail(reason: str) -> None:
+    """Mark the current run as failed (for early returns without an exception)."""
+    RUN.error = reason
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(run: Run) -> str:
+    job = _label(run.job)
+    metrics = [
+        ("stage_duration_seconds", "Wall time of a pipeline stage.", lambda s: s.wall_s),
+        ("stage_bytes_fetched", "Bytes downloaded during a stage.", lambda s: s.bytes),
+        ("stage_records", "Records parsed during a stage.", lambda s: s.records),
+        ("stage_records_per_second", "Records parsed per second.", lambda s: s.records_per_s),
+        ("stage_rows_written", "Rows written during a stage.", lambda s: s.rows),
+    ]
+    lines = []
+    for name, help_text, value in metrics:
+        full = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} gauge")
+        for s in run.stages:
+            lines.append(f'{full}{{job="{job}",stage="{_label(s.name)}"}} {value(s):g}')
+
+    profiled = [s for s in run.stages if s.mem_peak is not None]
+    for name, help_text, value in (
+        ("stage_heap_peak_bytes", "Python heap peak above the stage's start.", lambda s: s.mem_peak),
+        ("stage_rss_peak_bytes", "Peak resident set size during a stage.", lambda s: s.rss_peak or 0),
+    ):
+        if not profiled:
+            break
+        full = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} gauge")
+        for s in profiled:
+            lines.append(f'{full}{{job="{job}",stage="{_label(s.name)}"}} {value(s):g}')
+
+    finished = run.finished or time.time()
+    for name, help_text, value in (
+        ("run_duration_seconds", "Wall time of the whole run.", finished - run.started),
+        ("run_success", "1 if the last run succeeded, else 0.", 0 if run.error else 1),
+        ("run_last_timestamp_seconds", "Unix time the last run finished.", finished),
+    ):
+        full = f"{METRIC_PREFIX}_{name}"
+        lines += [f"# HELP {full} {help_text}", f"# TYPE {full} gauge",
+                  f'{full}{{job="{job}"}} {value:g}']
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def export(run: Run | None = None, directory: str | None = None) -> None:
+    run = run or RUN
+    directory = METRICS_DIR if directory is None else directory
+    if not directory or not run.job:
+        return
+    os.makedirs(directory, exist_ok=True)
+    _write_atomic(os.path.join(directory, f"{run.job}.json"),
+                  json.dumps(run.report(), ensure_ascii=False, indent=2) + "\n")
+    _write_atomic(os.path.join(directory, f"{run.job}.prom"), prometheus_text(run))
+
+
+def memory_options(argv: list[str] | None = None) -> tuple[bool, list[tuple[str, float]]]:
+    """
+    Read --profile-memory / --memory-budget NAME=MB (and the PROFILE_MEMORY /
+    MEMORY_BUDGETS env vars), removing the flags from argv so a script's own
+    argparse never sees them. A budget implies profiling.
+    """
+    argv = sys.argv if argv is None else argv
+    enabled = os.environ.get("PROFILE_MEMORY", "") not in ("", "0")
+    specs = [os.environ["MEMORY_BUDGETS"]] if os.environ.get("MEMORY_BUDGETS") else []
+    rest = argv[:1]
+    args = iter(argv[1:])
+    for arg in args:
+        if arg == "--profile-memory":
+            enabled = True
+        elif arg == "--memory-budget":
+            specs.append(next(args, ""))
+        elif arg.startswith("--memory-budget="):
+            specs.append(arg.split("=", 1)[1])
+        else:
+            rest.append(arg)
+    argv[:] = rest
+    budgets = parse_budgets(specs)
+    return enabled or bool(budgets), budgets
+
+
+def print_memory_report(run: Run) -> None:
+    profiled = [s for s in run.stages if s.mem_peak is not None]
+    if not profiled:
+        return
+    print(f"\n[MEM] {'stage':<36} {'heap peak':>10} {'rss peak':>10} {'budget':>8}")
+    for s in profiled:
+        budget = f"{s.budget_mb:g} MB" if s.budget_mb is not None else "-"
+        rss = f"{s.rss_peak / 1048576:.1f} MB" if s.rss_peak else "-"
+        flag = "  OVER" if s.over_budget else ""
+        print(f"      {s.name:<36} {s.mem_peak / 1048576:>7.1f} MB {rss:>10} {budget:>8}{flag}")
+        for a in s.top_allocations:
+            print(f"        {a['kb']:>10,.1f} KB  {a['site']}")
+
+
+def job(name: str):
+    """Decorator for a script's main(): start a fresh run, export it on exit."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            global RUN
+            RUN = Run(name)
+            profile, budgets = memory_options()
+            if profile:
+                RUN.profiler = MemoryProfiler(budgets)
+                RUN.profiler.begin()
+            try:
+                result = fn(*args, **kwargs)
+            except SystemExit as exc:
+                if exc.code not in (0, None):
+                    RUN.error = f"exit status {exc.code}"
+                raise
+            except BaseException as exc:
+                RUN.error = f"{type(exc).__name__}: {exc}"
+                raise
+            finally:
+                if RUN.profiler:
+                    RUN.profiler.end()
+                    over = RUN.over_budget()
+                    if over and RUN.error is None:
+                        RUN.error = "memory budget exceeded: " + ", ".join(s.name for s in over)
+                    print_memory_report(RUN)
+                RUN.finished = time.time()
+                export(RUN)
+            if RUN.error:  # instrument.fail() or a blown memory budget
+                raise SystemExit(1)
+            return result
+        return wrapper
+    return decorate
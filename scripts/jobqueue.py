@@ -0,0 +1,404 @@
+"""
+Work Queue – scrape / crawl / combine / chart jobs across worker processes
+Queue:  data/jobs.sqlite  (SQLite; WAL mode, or DELETE across hosts)
+Output: the usual data/ and charts/ files, written by the jobs themselves
+
+Jobs are rows in one SQLite table; any number of `worker` processes take
+them with lease / ack semantics:
+
+  lease     one transaction picks the oldest runnable job and stamps it
+            with the worker's id and a lease deadline (LEASE_SECONDS); a
+            heartbeat thread keeps extending it while the job runs
+  ack       marks it done – only the current lease holder can, so a worker
+            that stalled past its lease cannot overwrite the new owner's run
+  nack      puts it back with a backoff, or fails it after MAX_ATTEMPTS
+  expiry    a crashed worker's job is leased again once its deadline passes
+
+The queue runs in WAL mode, which only works for processes on one host
+(its shared-memory index is not shared over a network filesystem). To run
+workers on several hosts that share data/ over a filesystem with working
+POSIX locks, set JOBQUEUE_JOURNAL=DELETE for every worker and producer:
+rollback journaling is slower but safe there.
+
+A job only becomes runnable once every job it depends on is done, and a
+key (e.g. "scrape:birbank") keeps the same work from being queued twice
+while a copy has not started yet: the later enqueue reuses that copy and
+adds its own dependencies to it. Once a copy has been leased, it may
+already have read its inputs, so a new job is queued behind it instead.
+
+Job kinds:
+  scrape   {"source": "birbank"}     runs the source's scraper (scheduler.SOURCES)
+  crawl    {"slug": "..."}           one ABB Home detail page, appended to the
+                                     abbhome_projects checkpoint
+  combine  {}                        combine.py
+  charts   {"sources": "BirBank,…"}  generate_charts.py [--sources]
+  projects {}                        abbhome_projects.py – merges the crawl
+                                     checkpoint into data/abbhome_projects.csv
+
+Usage:
+  python scripts/jobqueue.py enqueue refresh          # 4 scrapes → combine → charts
+  python scripts/jobqueue.py enqueue refresh --only birbank,xalqbank
+  python scripts/jobqueue.py enqueue crawl            # one job per ABB Home partner → merge
+  python scripts/jobqueue.py worker [--kinds scrape,crawl] [--drain]
+  python scripts/jobqueue.py status
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import dataio
+from scheduler import SOURCES, run_script
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+QUEUE_FILE = os.path.join(DATA_DIR, "jobs.sqlite")
+# WAL for one host; DELETE when the queue file is shared between hosts.
+JOURNAL_MODE = os.environ.get("JOBQUEUE_JOURNAL", "WAL").upper()
+
+LEASE_SECONDS = 120.0
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 60.0         # first retry after a failure, doubled per attempt
+IDLE_SLEEP = 2.0
+KINDS = ("scrape", "crawl", "combine", "charts", "projects")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    args         TEXT NOT NULL DEFAULT '{}',
+    key          TEXT,
+    state        TEXT NOT NULL DEFAULT 'queued',   -- queued | leased | done | failed
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    not_before   REAL NOT NULL DEFAULT 0,
+    lease_owner  TEXT,
+    lease_until  REAL,
+    error        TEXT,
+    created_at   REAL NOT NULL,
+    finished_at  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (state, not_before, id);
+DROP INDEX IF EXISTS jobs_pending_key;
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_unstarted_key ON jobs (key)
+    WHERE key IS NOT NULL AND state = 'queued' AND attempts = 0;
+CREATE TABLE IF NOT EXISTS deps (
+    job_id     INTEGER NOT NULL REFERENCES jobs (id),
+    depends_on INTEGER NOT NULL REFERENCES jobs (id),
+    PRIMARY KEY (job_id, depends_on)
+);
+"""
+
+# A job is runnable when it is queued and due (or its lease ran out) and
+# nothing it depends on is unfinished.
+_RUNNABLE = """
+SELECT id FROM jobs AS j
+WHERE ((state = 'queued' AND not_before <= ?) OR (state = 'leased' AND lease_until < ?))
+  AND attempts < max_attempts
+  AND kind IN ({kinds})
+  AND NOT EXISTS (SELECT 1 FROM deps AS d JOIN jobs AS p ON p.id = d.depends_on
+                  WHERE d.job_id = j.id AND p.state != 'done')
+ORDER BY id LIMIT 1
+"""
+
+# Everything downstream of a job, transitively.
+_DEPENDENTS = """
+WITH RECURSIVE down(id) AS (
+    SELECT job_id FROM deps WHERE depends_on = ?
+    UNION SELECT d.job_id FROM deps AS d JOIN down ON d.depends_on = down.id
+)
+SELECT id FROM down
+"""
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _iso(ts: float | None) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds") if ts else "-"
+
+
+class JobQueue:
+    def __init__(self, path: str = QUEUE_FILE):
+        if JOURNAL_MODE not in ("WAL", "DELETE"):
+            raise ValueError(f"JOBQUEUE_JOURNAL must be WAL or DELETE, not {JOURNAL_MODE!r}")
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One connection per call: workers, heartbeat threads and other hosts
+        # all coordinate through SQLite's own locking.
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+            yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _fail(db: sqlite3.Connection, job_id: int, error: str, now: float) -> None:
+        """Fail a job and everything still waiting on it."""
+        db.execute("UPDATE jobs SET state = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                   (error, now, job_id))
+        for row in db.execute(_DEPENDENTS, (job_id,)).fetchall():
+            db.execute("UPDATE jobs SET state = 'failed', error = ?, finished_at = ? "
+                       "WHERE id = ? AND state = 'queued'",
+                       (f"dependency #{job_id} failed", now, row["id"]))
+
+    # ── producer side ────────────────────────────────────────────────────
+
+    def enqueue(self, kind: str, args: dict | None = None, key: str | None = None,
+                after: list[int] | None = None, max_attempts: int = MAX_ATTEMPTS) -> int:
+        """
+        Queue a job; returns its id. If a job with the same key is queued
+        and has not started, that job's id is returned and `after` is
+        added to its dependencies.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"unknown job kind {kind!r}")
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = None
+            if key is not None:
+                row = db.execute("SELECT id FROM jobs WHERE key = ? AND state = 'queued' "
+                                 "AND attempts = 0", (key,)).fetchone()
+            if row:
+                job_id = row["id"]
+            else:
+                job_id = db.execute(
+                    "INSERT INTO jobs (kind, args, key, max_attempts, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (kind, json.dumps(args or {}, ensure_ascii=False), key, max_attempts, time.time()),
+                ).lastrowid
+            db.executemany("INSERT OR IGNORE INTO deps (job_id, depends_on) VALUES (?, ?)",
+                           [(job_id, dep) for dep in after or []])
+            db.execute("COMMIT")
+            return job_id
+
+    # ── worker side ──────────────────────────────────────────────────────
+
+    def lease(self, owner: str, kinds: tuple[str, ...] = KINDS,
+              seconds: float = LEASE_SECONDS) -> sqlite3.Row | None:
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            # Leases that ran out on their last attempt will never be retried.
+            for dead in db.execute("SELECT id FROM jobs WHERE state = 'leased' AND lease_until < ? "
+                                   "AND attempts >= max_attempts", (now,)).fetchall():
+                self._fail(db, dead["id"], "lease expired", now)
+            marks = ",".join("?" * len(kinds))
+            row = db.execute(_RUNNABLE.format(kinds=marks), (now, now, *kinds)).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute("UPDATE jobs SET state = 'leased', lease_owner = ?, lease_until = ?, "
+                       "attempts = attempts + 1 WHERE id = ?", (owner, now + seconds, row["id"]))
+            job = db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            db.execute("COMMIT")
+            return job
+
+    def heartbeat(self, job_id: int, owner: str, seconds: float = LEASE_SECONDS) -> bool:
+        """Extend the lease; False if this worker no longer holds it."""
+        with self._connect() as db:
+            cur = db.execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND state = 'leased' "
+                             "AND lease_owner = ?", (time.time() + seconds, job_id, owner))
+            return cur.rowcount == 1
+
+    def ack(self, job_id: int, owner: str) -> bool:
+        with self._connect() as db:
+            cur = db.execute("UPDATE jobs SET state = 'done', finished_at = ?, error = NULL "
+                             "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                             (time.time(), job_id, owner))
+            return cur.rowcount == 1
+
+    def nack(self, job_id: int, owner: str, error: str) -> str | None:
+        """Requeue with backoff or fail for good; returns the new state."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            job = db.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND state = 'leased' "
+                             "AND lease_owner = ?", (job_id, owner)).fetchone()
+            if job is None:
+                db.execute("COMMIT")
+                return None
+            if job["attempts"] >= job["max_attempts"]:
+                state = "failed"
+                self._fail(db, job_id, error, now)
+            else:
+                state = "queued"
+                delay = RETRY_DELAY * 2 ** (job["attempts"] - 1)
+                db.execute("UPDATE jobs SET state = 'queued', error = ?, not_before = ?, "
+                           "lease_owner = NULL, lease_until = NULL WHERE id = ?",
+                           (error, now + delay, job_id))
+            db.execute("COMMIT")
+            return state
+
+    def status(self) -> list[sqlite3.Row]:
+        with self._connect() as db:
+            return db.execute("SELECT kind, state, COUNT(*) AS n FROM jobs "
+                              "GROUP BY kind, state ORDER BY kind, state").fetchall()
+
+    def recent(self, limit: int = 20) -> list[sqlite3.Row]:
+        with self._connect() as db:
+            return db.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+
+
+# ── job bodies ───────────────────────────────────────────────────────────
+
+_crawler = None
+
+
+def _crawl_one(slug: str) -> None:
+    """Fetch one ABB Home detail page into the abbhome_projects checkpoint."""
+    global _crawler
+    import abbhome_projects
+
+    snapshot = dataio.snapshot_id(abbhome_projects.INPUT_FILE)
+    if _crawler is None or _crawler.snapshot != snapshot:
+        _crawler = abbhome_projects.ProjectCrawler(workers=1, snapshot=snapshot)
+    partner = next((p for p in abbhome_projects.read_partners() if p["slug"] == slug), None)
+    if partner is None:
+        raise LookupError(f"{slug} is not in abbhome.csv")
+    if _crawler.crawl_one(partner) is None:
+        raise RuntimeError(f"{slug}: page fetch failed")
+
+
+def run_job(job: sqlite3.Row) -> None:
+    """Run one job to completion; raises on failure."""
+    kind, args = job["kind"], json.loads(job["args"])
+    if kind == "scrape":
+        status = run_script(SOURCES[args["source"]].script)
+    elif kind == "combine":
+        status = run_script("combine.py")
+    elif kind == "charts":
+        extra = ("--sources", args["sources"]) if args.get("sources") else ()
+        status = run_script("generate_charts.py", *extra)
+    elif kind == "projects":
+        status = run_script("abbhome_projects.py")
+    elif kind == "crawl":
+        _crawl_one(args["slug"])
+        status = 0
+    else:
+        raise ValueError(f"unknown job kind {kind!r}")
+    if status != 0:
+        raise RuntimeError(f"exit {status}")
+
+
+def work(queue: JobQueue, kinds: tuple[str, ...] = KINDS, drain: bool = False,
+         owner: str | None = None) -> int:
+    """Lease and run jobs until stopped (or, with drain, until none are runnable)."""
+    owner = owner or worker_id()
+    done = 0
+    while True:
+        job = queue.lease(owner, kinds)
+        if job is None:
+            if drain:
+                return done
+            time.sleep(IDLE_SLEEP)
+            continue
+
+        label = f"#{job['id']} {job['kind']} {job['args']}"
+        print(f"[INFO] {owner}: {label} (attempt {job['attempts']}/{job['max_attempts']})")
+        stop = threading.Event()
+
+        def beat(job_id=job["id"]):
+            while not stop.wait(LEASE_SECONDS / 3):
+                if not queue.heartbeat(job_id, owner):
+                    print(f"[WARN] {owner}: lost the lease on #{job_id}")
+                    return
+
+        beater = threading.Thread(target=beat, daemon=True)
+        beater.start()
+        try:
+            run_job(job)
+        except Exception as exc:
+            state = queue.nack(job["id"], owner, f"{type(exc).__name__}: {exc}")
+            print(f"[WARN] {label} failed: {exc} → {state or 'lease lost'}")
+        else:
+            if queue.ack(job["id"], owner):
+                done += 1
+                print(f"[OK] {label}")
+            else:
+                print(f"[WARN] {label} finished after its lease was taken over – not acked")
+        finally:
+            stop.set()
+            beater.join()
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+
+def enqueue_refresh(queue: JobQueue, names: list[str]) -> list[int]:
+    scrapes = [queue.enqueue("scrape", {"source": n}, key=f"scrape:{n}") for n in names]
+    combine = queue.enqueue("combine", key="combine", after=scrapes)
+    labels = ",".join(sorted(SOURCES[n].label for n in names))
+    charts = queue.enqueue("charts", {"sources": labels}, key=f"charts:{labels}", after=[combine])
+    return [*scrapes, combine, charts]
+
+
+def enqueue_crawl(queue: JobQueue) -> list[int]:
+    import abbhome_projects
+
+    slugs = [p["slug"] for p in abbhome_projects.read_partners()]
+    crawls = [queue.enqueue("crawl", {"slug": s}, key=f"crawl:{s}") for s in slugs]
+    return [*crawls, queue.enqueue("projects", key="projects", after=crawls)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite-backed job queue and worker.")
+    parser.add_argument("--queue", default=QUEUE_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    enq = sub.add_parser("enqueue")
+    enq.add_argument("what", choices=["refresh", "crawl"])
+    enq.add_argument("--only", help="comma-separated sources for refresh (default: all)")
+    wrk = sub.add_parser("worker")
+    wrk.add_argument("--kinds", default=",".join(KINDS))
+    wrk.add_argument("--drain", action="store_true", help="exit once no job is runnable")
+    sub.add_parser("status")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue)
+    if args.command == "enqueue":
+        if args.what == "refresh":
+            names = args.only.split(",") if args.only else list(SOURCES)
+            unknown = [n for n in names if n not in SOURCES]
+            if unknown:
+                parser.error(f"unknown source(s): {', '.join(unknown)}")
+            ids = enqueue_refresh(queue, names)
+        else:
+            ids = enqueue_crawl(queue)
+        print(f"[OK] {len(ids)} job(s) queued in {os.path.abspath(args.queue)}")
+    elif args.command == "worker":
+        kinds = tuple(k for k in args.kinds.split(",") if k)
+        bad = [k for k in kinds if k not in KINDS]
+        if bad:
+            parser.error(f"unknown kind(s): {', '.join(bad)}")
+        try:
+            n = work(queue, kinds, args.drain)
+            print(f"[OK] Queue drained – {n} job(s) done by this worker.")
+        except KeyboardInterrupt:
+            # The leased job is picked up again once its lease runs out.
+            print("[INFO] Worker stopped.")
+            sys.exit(130)
+    else:
+        for row in queue.status():
+            print(f"  {row['kind']:<9} {row['state']:<7} {row['n']:>5}")
+        print()
+        for job in queue.recent(10):
+            err = f"  {job['error']}" if job["error"] else ""
+            print(f"  #{job['id']:<5} {job['kind']:<9} {job['state']:<7} "
+                  f"{job['attempts']}/{job['max_attempts']}  {_iso(job['finished_at'])}  "
+                  f"{job['args']}{err}")
+
+
+if __name__ == "__main__":
+    main()
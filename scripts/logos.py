@@ -0,0 +1,301 @@
+"""
+Partner Logo Downloader
+Reads: data/birbank.csv, data/pashabank.csv, data/xalqbank.csv, data/abbhome.csv
+Writes: data/logos/<sha256>.<ext>, data/logos/thumbs/<sha256>.png,
+        data/logos/manifest.json
+
+Logo sources
+------------
+birbank.csv     → partner_logo_url, complex_logo_url
+pashabank.csv   → logo_url  (partner-card__logo)
+xalqbank.csv    → logo_url  (loan__icon img)
+abbhome.csv     → logo_url  (mainImage.url)
+
+Every unique URL is fetched once, concurrently, through the shared
+http_client scheduler with at most PER_HOST_LIMIT requests in flight against
+any single host. Files are stored under the SHA-256 of their content, so
+partners sharing the same image (BirBank repeats the partner logo on every
+complex) end up pointing at one file.
+
+Manifest structure:
+  {
+    "logos": {
+      "<logo_url>": {
+        "path"          → data/logos/<sha256>.<ext> (relative to data/)
+        "thumbnail"     → data/logos/thumbs/<sha256>.png, "" if not made
+        "sha256", "content_type",
+        "etag", "last_modified"   → validators for the next conditional GET
+      }
+    }
+  }
+
+On reruns the stored ETag / Last-Modified are sent as If-None-Match /
+If-Modified-Since; a 304 keeps the existing entry without a download (a
+304 with nothing to keep is refetched unconditionally). Hosts without
+limits of their own get PER_HOST_RATE / PER_HOST_LIMIT; the banks' own
+hosts keep their http_client.HOST_DEFAULTS.
+Thumbnails are rendered in a process pool (requires Pillow; skipped with a
+warning if it is not installed).
+"""
+
+import csv
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+import http_client
+import instrument
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+LOGO_DIR = os.path.join(DATA_DIR, "logos")
+THUMB_DIR = os.path.join(LOGO_DIR, "thumbs")
+MANIFEST_FILE = os.path.join(LOGO_DIR, "manifest.json")
+
+# (csv file, logo columns)
+SOURCES = [
+    ("birbank.csv", ["partner_logo_url", "complex_logo_url"]),
+    ("pashabank.csv", ["logo_url"]),
+    ("xalqbank.csv", ["logo_url"]),
+    ("abbhome.csv", ["logo_url"]),
+]
+
+MAX_WORKERS = 16
+PER_HOST_LIMIT = 4
+PER_HOST_RATE = 10.0  # logo CDNs tolerate far more than the bank pages
+THUMB_SIZE = (128, 128)
+
+HEADERS = {
+    "accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+    "accept-language": "en-GB,en-US;q=0.9,en;q=0.8",
+    "dnt": "1",
+    "user-agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/145.0.0.0 Safari/537.36"
+    ),
+}
+
+CONTENT_TYPE_EXT = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+    "image/svg+xml": ".svg",
+    "image/avif": ".avif",
+}
+
+
+def collect_logo_urls() -> list[str]:
+    """Unique logo URLs across all source CSVs, in first-seen order."""
+    seen: dict[str, None] = {}
+    for filename, columns in SOURCES:
+        path = os.path.join(DATA_DIR, filename)
+        if not os.path.exists(path):
+            print(f"[WARN] {filename} not found – skipping.")
+            continue
+        with open(path, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for col in columns:
+                    url = (row.get(col) or "").strip()
+                    if url.startswith("http"):
+                        seen.setdefault(url, None)
+    return list(seen)
+
+
+def load_manifest(path: str = MANIFEST_FILE) -> dict:
+    if not os.path.exists(path):
+        return {"logos": {}}
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as exc:
+        print(f"[WARN] Manifest unreadable, starting fresh: {exc}")
+        return {"logos": {}}
+    manifest.setdefault("logos", {})
+    return manifest
+
+
+def save_manifest(manifest: dict, path: str = MANIFEST_FILE) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _extension(url: str, content_type: str) -> str:
+    ext = CONTENT_TYPE_EXT.get(content_type.split(";")[0].strip().lower())
+    if ext:
+        return ext
+    _, ext = os.path.splitext(urlsplit(url).path)
+    return ext.lower() if 1 < len(ext) <= 5 else ".bin"
+
+
+class LogoFetcher:
+    """Thread-pooled downloader; per-host limits come from http_client."""
+
+    def __init__(self, manifest: dict, per_host: int = PER_HOST_LIMIT):
+        self.manifest = manifest
+        self.per_host = per_host
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            self._local.session = session
+        return session
+
+    def fetch(self, url: str) -> tuple[str, dict | None, str]:
+        """Return (url, entry, status) where status is new/unchanged/cached/error."""
+        previous = self.manifest["logos"].get(url)
+        headers = {}
+        if previous and os.path.exists(os.path.join(DATA_DIR, previous["path"])):
+            if previous.get("etag"):
+                headers["if-none-match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["if-modified-since"] = previous["last_modified"]
+        else:
+            previous = None
+
+        try:
+            resp = http_client.get(url, session=self._session(), headers=headers, timeout=30)
+            if resp.status_code == 304:
+                if previous:
+                    return url, previous, "unchanged"
+                # Nothing on disk to keep: ask again without validators.
+                resp = http_client.get(url, session=self._session(),
+                                       headers={"cache-control": "no-cache"}, timeout=30)
+                if resp.status_code == 304:
+                    raise requests.HTTPError("304 Not Modified without a cached copy", response=resp)
+            resp.raise_for_status()
+        except requests.RequestException as exc:
+            print(f"[ERROR] {url}: {exc}")
+            return url, previous, "error"
+
+        body = resp.content
+        digest = hashlib.sha256(body).hexdigest()
+        content_type = resp.headers.get("content-type", "")
+        rel_path = os.path.join("logos", digest + _extension(url, content_type))
+        abs_path = os.path.join(DATA_DIR, rel_path)
+        status = "cached"
+        if not os.path.exists(abs_path):
+            # Content-addressed: concurrent writers of the same hash write
+            # identical bytes, so a plain tmp + rename is enough.
+            tmp = f"{abs_path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, abs_path)
+            status = "new"
+
+        thumbnail = ""
+        if previous and previous.get("sha256") == digest:
+            thumbnail = previous.get("thumbnail", "")
+        entry = {
+            "path": rel_path,
+            "thumbnail": thumbnail,
+            "sha256": digest,
+            "content_type": content_type,
+            "etag": resp.headers.get("etag", ""),
+            "last_modified": resp.headers.get("last-modified", ""),
+        }
+        return url, entry, status
+
+    def fetch_all(self, urls: list[str], workers: int = MAX_WORKERS) -> dict[str, int]:
+        for host in {urlsplit(u).netloc for u in urls}:
+            if not http_client.is_configured(host):
+                http_client.configure(host, rate=PER_HOST_RATE, burst=self.per_host,
+                                      max_concurrency=self.per_host)
+        stats: dict[str, int] = defaultdict(int)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for url, entry, status in pool.map(self.fetch, urls):
+                stats[status] += 1
+                if entry:
+                    self.manifest["logos"][url] = entry
+        return dict(stats)
+
+
+def _make_thumbnail(src: str, dst: str) -> str | None:
+    """Worker: render one thumbnail. Returns dst on success."""
+    from PIL import Image
+
+    try:
+        with Image.open(src) as img:
+            img.thumbnail(THUMB_SIZE)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            img.save(dst, "PNG", optimize=True)
+        return dst
+    except (OSError, ValueError):
+        return None
+
+
+def make_thumbnails(manifest: dict) -> int:
+    """Render missing thumbnails for each unique content hash in a process pool."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("[WARN] Pillow not installed – skipping thumbnails.")
+        return 0
+
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    jobs: dict[str, str] = {}  # sha256 → source image
+    for entry in manifest["logos"].values():
+        if entry.get("thumbnail") or entry["sha256"] in jobs:
+            continue
+        if entry["path"].endswith(".svg"):
+            continue
+        jobs[entry["sha256"]] = os.path.join(DATA_DIR, entry["path"])
+    if not jobs:
+        return 0
+
+    digests = list(jobs)
+    dsts = [os.path.join(THUMB_DIR, d + ".png") for d in digests]
+    with ProcessPoolExecutor() as pool:
+        results = list(pool.map(_make_thumbnail, [jobs[d] for d in digests], dsts))
+
+    done = {d: os.path.join("logos", "thumbs", d + ".png")
+            for d, res in zip(digests, results) if res}
+    for entry in manifest["logos"].values():
+        if entry["sha256"] in done:
+            entry["thumbnail"] = done[entry["sha256"]]
+    return len(done)
+
+
+@instrument.job("logos")
+def main() -> None:
+    urls = collect_logo_urls()
+    print(f"[INFO] Unique logo URLs: {len(urls)}")
+    if not urls:
+        return
+
+    os.makedirs(LOGO_DIR, exist_ok=True)
+    manifest = load_manifest()
+    with instrument.stage("logos.fetch") as st:
+        stats = LogoFetcher(manifest).fetch_all(urls)
+        st.records = len(urls)
+    print("[INFO] " + ", ".join(f"{k}: {v}" for k, v in sorted(stats.items())))
+
+    unique_files = len({e["sha256"] for e in manifest["logos"].values()})
+    print(f"[INFO] {len(manifest['logos'])} URLs → {unique_files} unique files")
+
+    with instrument.stage("logos.thumbnails") as st:
+        thumbs = make_thumbnails(manifest)
+        st.rows = thumbs
+    if thumbs:
+        print(f"[INFO] Thumbnails rendered: {thumbs}")
+
+    save_manifest(manifest)
+    print(f"[OK] Manifest → {os.path.abspath(MANIFEST_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
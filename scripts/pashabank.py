@@ -18,13 +18,21 @@ HTML structure (per partner card):
                                   └── img[alt=globus]   → website
 """
 
-import csv
 import os
+from collections.abc import Callable
 import requests
 from bs4 import BeautifulSoup, Tag
 
+import dataio
+import instrument
+import probe
+import sessions
+from textnorm import clean, tag_text
+
 BASE_URL = "https://ipoteka.pashabank.az"
 PARTNERS_URL = f"{BASE_URL}/az/ipoteka/partners/partners"
+# Change probe: only this block of the page feeds the CSV.
+PROBE_BLOCK = ('id="partners-list"', "<footer")
 
 HEADERS = {
     "accept": (
@@ -53,19 +61,9 @@ HEADERS = {
     ),
 }
 
-# Session cookie – update if the site returns 403/access-denied
-COOKIES = {
-    "TS0101a0bc": (
-        "0156ac68395bdba6df942001e74f28141df37924c3c4e81c01cfcdf80b7975b0"
-        "7d7cb2b4bde7b75e563fb44bc533f18243eb69318d"
-    ),
-    "_ym_uid": "1771259678215569637",
-    "_ym_d": "1771259678",
-    "_fbp": "fb.1.1771259678263.754891232871962398",
-    "_ym_isad": "2",
-    "_clck": "1lgkjbb%5E2%5Eg3m%5E0%5E2238",
-    "_clsk": "g4ecnq%5E1771259679121%5E1%5E1%5Ea.clarity.ms%2Fcollect",
-}
+# WAF / session cookies: obtained by a warm-up request and kept in
+# data/sessions/, refreshed on 403 (see sessions.py).
+SESSION = sessions.SessionStore(BASE_URL, HEADERS)
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "pashabank.csv")
@@ -82,27 +80,25 @@ CSV_FIELDS = [
 ]
 
 
-def fetch_page(url: str) -> BeautifulSoup | None:
-    session = requests.Session()
-    session.headers.update(HEADERS)
-    session.cookies.update(COOKIES)
+def fetch_html(url: str, headers: dict | None = None) -> requests.Response | None:
+    """GET the page; may be a 304 if headers carry the probe's validators."""
     try:
-        resp = session.get(url, timeout=30)
+        resp = SESSION.get(url, headers=headers, timeout=30)
         resp.raise_for_status()
         resp.encoding = "utf-8"  # force correct decoding for Azerbaijani characters
-        return BeautifulSoup(resp.text, "html.parser")
+        return resp
     except requests.RequestException as exc:
         print(f"[ERROR] {exc}")
         return None
 
 
-def _text(tag: Tag | None) -> str:
-    return tag.get_text(" ", strip=True) if tag else ""
+def fetch_page(url: str) -> BeautifulSoup | None:
+    resp = fetch_html(url)
+    return BeautifulSoup(resp.text, "html.parser") if resp is not None else None
 
 
 def _badge_text(badge: Tag) -> str:
-    p = badge.find("p")
-    return _text(p)
+    return tag_text(badge.find("p"))
 
 
 def parse_term_li(li: Tag) -> str:
@@ -111,13 +107,14 @@ def parse_term_li(li: Tag) -> str:
     value = li.find("span", class_=lambda c: c and "fw-normal" in c)
     parts = []
     if prefix:
-        parts.append(_text(prefix))
+        parts.append(tag_text(prefix))
     if value:
-        parts.append(_text(value))
-    return " ".join(parts).strip() if parts else _text(li)
+        parts.append(tag_text(value))
+    return clean(" ".join(parts)) if parts else tag_text(li)
 
 
-def parse_partners(soup: BeautifulSoup) -> list[dict]:
+def parse_partners(soup: BeautifulSoup,
+                   emit: Callable[[dict], None] | None = None) -> list[dict]:
     partners_list = soup.find(id="partners-list")
     if not partners_list:
         print("[WARN] #partners-list not found.")
@@ -134,12 +131,12 @@ def parse_partners(soup: BeautifulSoup) -> list[dict]:
         title_div = card.find("div", class_="title")
         if title_div:
             heading = title_div.find(["h3", "h4"])
-            record["name"] = _text(heading)
+            record["name"] = tag_text(heading)
 
         # --- Logo URL ---
         logo_img = card.find("img", class_="partner-card__logo")
         if logo_img:
-            src = logo_img.get("src", "")
+            src = clean(logo_img.get("src"))
             if src.startswith("http"):
                 record["logo_url"] = src
             elif src.startswith("/"):
@@ -173,33 +170,37 @@ def parse_partners(soup: BeautifulSoup) -> list[dict]:
                 record["website"] = text
 
         records.append(record)
+        if emit:
+            emit(record)
 
     return records
 
 
-def save_csv(records: list[dict], filepath: str) -> None:
-    if not records:
-        print("[WARN] No records to save.")
-        return
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
-        writer.writeheader()
-        writer.writerows(records)
-    print(f"[OK] Saved {len(records)} records → {os.path.abspath(filepath)}")
-
-
+@instrument.job("pashabank")
 def main() -> None:
+    emit = dataio.ndjson_emitter("pashabank", CSV_FIELDS)  # None unless NDJSON_OUT is set
     print(f"[INFO] Fetching {PARTNERS_URL}")
-    soup = fetch_page(PARTNERS_URL)
-    if soup is None:
+    chk = probe.Probe(OUTPUT_FILE)
+    with instrument.stage("pashabank.fetch"):
+        resp = fetch_html(PARTNERS_URL, chk.headers())
+    if resp is None:
+        instrument.fail("page fetch failed")
         return
+    fingerprint = probe.block_hash(resp.text, *PROBE_BLOCK)
+    if chk.unchanged(fingerprint, resp):
+        chk.skip(resp)
+        return
+    soup = BeautifulSoup(resp.text, "html.parser")
 
     title = soup.find("title")
-    print(f"[INFO] Page: {_text(title)}")
-
-    partners = parse_partners(soup)
-    save_csv(partners, OUTPUT_FILE)
+    print(f"[INFO] Page: {tag_text(title)}")
+
+    with instrument.stage("pashabank.parse") as st:
+        partners = parse_partners(soup, emit)
+        st.records = len(partners)
+    with instrument.stage("pashabank.save_csv") as st:
+        st.rows = dataio.save_csv(partners, OUTPUT_FILE, CSV_FIELDS)
+    chk.save(fingerprint, resp)
 
     # Quick preview
     if partners:
@@ -0,0 +1,150 @@
+"""
+Change Probe – skip the full fetch / parse when a source has not changed
+State: data/<source>.csv.probe.json  (one per scraper output)
+
+Each scraper fingerprints the part of the response that its CSV is built
+from, and compares it with the fingerprint stored after its last full run:
+
+  BirBank     a size=1 API call; total count + the first partner's JSON
+  HTML pages  a conditional GET (If-None-Match / If-Modified-Since → 304),
+              else the sha256 of just the data block (#partners-list, the
+              partner cards, __NEXT_DATA__) instead of the whole page
+
+If they match, the scraper stops before parsing and leaves its CSV (and so
+the CSV's snapshot id) untouched, which is what keeps scheduler.py from
+running combine and the charts. A stored fingerprint is only trusted while
+the CSV it describes is still the one on disk, and for at most MAX_AGE
+after the last full run, since a cheap probe can miss an edit deep inside
+a payload. Set FULL_FETCH=1 to ignore the probe for one run.
+
+Usage (inside a scraper):
+  chk = probe.Probe(OUTPUT_FILE)
+  resp = fetch_html(URL, chk.headers())
+  fingerprint = probe.block_hash(resp.text, 'id="partners-list"')
+  if chk.unchanged(fingerprint, resp):
+      chk.skip(resp)
+      return
+  ...parse, save...
+  chk.save(fingerprint, resp)
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import dataio
+
+SUFFIX = ".probe.json"
+MAX_AGE = 24 * 3600        # force a full run at least this often (seconds)
+FORCE_ENV = "FULL_FETCH"
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds")
+
+
+def block_hash(text: str, start: str, end: str | None = None) -> str | None:
+    """
+    sha256 of text from the first `start` marker up to the next `end` marker
+    (or the end of the document); None if `start` is not in the page, so a
+    changed layout always falls through to the full parse.
+    """
+    lo = text.find(start)
+    if lo < 0:
+        return None
+    hi = text.find(end, lo + len(start)) if end else -1
+    block = text[lo:hi] if hi >= 0 else text[lo:]
+    return hashlib.sha256(block.encode("utf-8")).hexdigest()
+
+
+def json_hash(value) -> str:
+    return hashlib.sha256(
+        json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class Probe:
+    def __init__(self, output: str):
+        self.output = output
+        self.path = output + SUFFIX
+        self.entry = self._load()
+
+    def _load(self) -> dict | None:
+        """The stored entry, or None if it can't be trusted for this run."""
+        if os.environ.get(FORCE_ENV, "") not in ("", "0"):
+            return None
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as exc:  # ValueError: JSONDecodeError, bad UTF-8
+            print(f"[WARN] {os.path.basename(self.path)} unreadable ({exc}) – doing a full fetch.")
+            return None
+        if not isinstance(entry, dict):
+            return None
+        if time.time() - entry.get("full_at", 0) > MAX_AGE:
+            return None
+        if entry.get("snapshot") != dataio.snapshot_id(self.output):
+            return None
+        return entry
+
+    @property
+    def armed(self) -> bool:
+        """True if a matching fingerprint would let this run stop early."""
+        return self.entry is not None
+
+    def headers(self) -> dict:
+        """Conditional-request headers from the last response's validators."""
+        if not self.entry:
+            return {}
+        headers = {}
+        if self.entry.get("etag"):
+            headers["If-None-Match"] = self.entry["etag"]
+        if self.entry.get("last_modified"):
+            headers["If-Modified-Since"] = self.entry["last_modified"]
+        return headers
+
+    def unchanged(self, fingerprint: str | None, resp=None) -> bool:
+        if not self.entry:
+            return False
+        if resp is not None and resp.status_code == 304:
+            return True
+        return fingerprint is not None and fingerprint == self.entry.get("fingerprint")
+
+    def skip(self, resp=None) -> None:
+        """Report the short-circuit and keep the validators current."""
+        entry = dict(self.entry or {})
+        entry.update(self._validators(resp), checked_at=_iso(time.time()))
+        self._write(entry)
+        how = "304 Not Modified" if resp is not None and resp.status_code == 304 else "same fingerprint"
+        print(f"[OK] {os.path.basename(self.output)} unchanged ({how}) – skipping parse and save.")
+
+    def save(self, fingerprint: str | None, resp=None) -> None:
+        """Record a full run; call after the CSV has been written."""
+        now = time.time()
+        entry = {
+            "fingerprint": fingerprint,
+            "snapshot": dataio.snapshot_id(self.output),
+            "full_at": now,
+            "checked_at": _iso(now),
+            **self._validators(resp),
+        }
+        self._write(entry)
+
+    @staticmethod
+    def _validators(resp) -> dict:
+        if resp is None or resp.status_code == 304:
+            return {}
+        return {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+
+    def _write(self, entry: dict) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
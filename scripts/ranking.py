@@ -0,0 +1,197 @@
+"""
+Best-Offer Ranking Index
+Reads:  data/data.csv
+Output: data/ranking_index.json  (rebuilt by combine.py on every run)
+
+Answers "which bank finances developer / complex X cheapest at price Y"
+without scanning data.csv: for every developer and complex name and every
+price band, the bank offers are pre-sorted by total cost (down payment +
+all installments, see affordability.py) at the band's mid price. Offers
+whose loan falls outside the bank's limits at that price are left out,
+and each bank appears once per key (its cheapest offer).
+
+Lookups are two binary searches — price → band over the band edges and
+name → entry over the sorted keys — so a query process only loads the
+JSON file and never re-parses or re-prices the dataset.
+
+Usage:
+  python scripts/ranking.py "PMD Group" 150000
+  python scripts/ranking.py "Zərifə Əliyeva 53" 90000 --top 3
+  python scripts/ranking.py --rebuild
+"""
+
+import argparse
+import json
+import os
+from bisect import bisect_left
+
+import numpy as np
+
+import dataio
+import instrument
+from affordability import AffordabilityEngine
+from textnorm import normalize_key
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DATA_CSV = os.path.join(DATA_DIR, "data.csv")
+INDEX_FILE = os.path.join(DATA_DIR, "ranking_index.json")
+
+# Upper edges of the price bands (AZN); prices above the last edge use the last band.
+BAND_EDGES = [50_000, 100_000, 150_000, 200_000, 300_000, 500_000, 750_000, 1_000_000]
+INDEX_VERSION = 1
+
+
+def band_prices(edges: list[float] = BAND_EDGES) -> list[float]:
+    """Mid price of each band: (0, e0], (e0, e1], …"""
+    lows = [0.0] + list(edges[:-1])
+    return [(lo + hi) / 2 for lo, hi in zip(lows, edges)]
+
+
+def band_of(price: float, edges: list[float] = BAND_EDGES) -> int:
+    return min(bisect_left(edges, price), len(edges) - 1)
+
+
+def _offer_keys(offer: dict) -> set[str]:
+    """Developer and complex keys an offer is filed under."""
+    names = {offer.get("name", ""), offer.get("partner_name", "")}
+    return {k for k in map(normalize_key, names) if k}
+
+
+def build_index(rows: list[dict], snapshot: str | None = None,
+                edges: list[float] = BAND_EDGES) -> dict:
+    engine = AffordabilityEngine(rows, snapshot)
+    prices = np.asarray(band_prices(edges))
+
+    loan = engine.ltv[:, None] * prices[None, :]
+    monthly = loan * engine.annuity[:, None]
+    cost = loan * engine.repay[:, None] + (prices[None, :] - loan)
+    feasible = (loan >= engine.min_loan[:, None]) & (loan <= engine.max_loan[:, None])
+
+    by_key: dict[str, list[int]] = {}
+    for i, offer in enumerate(engine.offers):
+        for key in _offer_keys(offer):
+            by_key.setdefault(key, []).append(i)
+
+    keys = sorted(by_key)
+    entries = []
+    for key in keys:
+        members = np.asarray(by_key[key])
+        n_sources = len({engine.offers[i]["source"] for i in members})
+        per_band = []
+        for b in range(len(edges)):
+            ranked = []
+            seen_sources = set()
+            for i in members[np.argsort(cost[members, b], kind="stable")]:
+                source = engine.offers[i]["source"]
+                if not feasible[i, b] or source in seen_sources:
+                    continue
+                seen_sources.add(source)
+                ranked.append([int(i), round(float(cost[i, b]), 2), round(float(monthly[i, b]), 2)])
+                if len(seen_sources) == n_sources:
+                    break
+            per_band.append(ranked)
+        entries.append(per_band)
+
+    offers = [
+        {f: o.get(f, "") for f in ("source", "name", "partner_name",
+                                   "down_payment", "annual_rate", "term")}
+        for o in engine.offers
+    ]
+    return {
+        "version": INDEX_VERSION,
+        "snapshot": snapshot,
+        "band_edges": list(edges),
+        "band_prices": list(prices),
+        "offers": offers,
+        "keys": keys,
+        "entries": entries,
+    }
+
+
+def save_index(index: dict, path: str = INDEX_FILE) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        # dumps, not dump: json.dump streams through the pure-Python encoder.
+        f.write(json.dumps(index, ensure_ascii=False, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+def rebuild(data_csv: str = DATA_CSV, path: str = INDEX_FILE) -> dict:
+    index = build_index(dataio.read_csv(data_csv), dataio.snapshot_id(data_csv))
+    save_index(index, path)
+    return index
+
+
+class RankingIndex:
+    def __init__(self, index: dict):
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"unsupported ranking index version {index.get('version')!r}")
+        self.snapshot = index["snapshot"]
+        self.edges = index["band_edges"]
+        self.prices = index["band_prices"]
+        self.offers = index["offers"]
+        self.keys = index["keys"]
+        self.entries = index["entries"]
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE) -> "RankingIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def is_stale(self, data_csv: str = DATA_CSV) -> bool:
+        return self.snapshot != dataio.snapshot_id(data_csv)
+
+    def lookup(self, name: str, price: float, top: int | None = None) -> list[dict]:
+        """Bank offers for name at price, cheapest first; [] if the name is unknown."""
+        key = normalize_key(name)
+        pos = bisect_left(self.keys, key)
+        if pos == len(self.keys) or self.keys[pos] != key:
+            return []
+        band = band_of(price, self.edges)
+        ranked = self.entries[pos][band][:top]
+        return [
+            {**self.offers[i], "band_price": self.prices[band],
+             "total_cost": cost, "monthly_payment": monthly}
+            for i, cost, monthly in ranked
+        ]
+
+
+@instrument.job("ranking")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cheapest bank offers per developer / complex.")
+    parser.add_argument("name", nargs="?", help="developer or complex name")
+    parser.add_argument("price", nargs="?", type=float, help="property price in AZN")
+    parser.add_argument("--top", type=int, default=None)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from data.csv")
+    args = parser.parse_args()
+
+    if args.rebuild or not os.path.exists(INDEX_FILE):
+        with instrument.stage("ranking.build") as st:
+            index = rebuild()
+            st.records = len(index["keys"])
+        print(f"[OK] {len(index['keys'])} keys → {os.path.abspath(INDEX_FILE)}")
+    if not args.name:
+        return
+    if args.price is None:
+        parser.error("price is required with a name")
+
+    with instrument.stage("ranking.lookup") as st:
+        idx = RankingIndex.load()
+        results = idx.lookup(args.name, args.price, args.top)
+        st.records = len(results)
+    if idx.is_stale():
+        print("[WARN] data.csv changed since the index was built – run combine.py or --rebuild.")
+    if not results:
+        print(f"[WARN] No feasible offers for {args.name!r} at {args.price:,.0f} AZN.")
+        return
+
+    band = band_of(args.price, idx.edges)
+    print(f"Offers for {args.name!r}, band ≤ {idx.edges[band]:,.0f} AZN "
+          f"(priced at {idx.prices[band]:,.0f}):")
+    for rank, r in enumerate(results, 1):
+        print(f"  {rank}. {r['source']:<11} {r['name'][:32]:<32} "
+              f"{r['annual_rate']:>9} {r['monthly_payment']:>9,.0f}/mo  total {r['total_cost']:>11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
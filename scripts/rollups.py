@@ -0,0 +1,362 @@
+"""
+Trend Rollups – incrementally maintained aggregates over combined snapshots
+Store:  data/rollups.sqlite  (SQLite, WAL mode)
+Reads:  data/data.csv  (via combine.py, or any archived copy with `add`)
+
+Every combined snapshot is folded once into day and week buckets of
+additive counters per source, developer, region, rate tier and overall:
+
+  rows       projects in the group, summed over the bucket's snapshots
+  partners   distinct developers in the group, summed likewise
+  rate       sum and count of parsed annual rates
+  down       sum and count of parsed down payments
+  last_*     the same figures for the latest snapshot in the bucket (0 / NULL
+             for a group that snapshot does not contain)
+
+Applying a snapshot costs one pass over that snapshot's rows and one
+upsert per (grain, dimension, key) it touches – independent of how much
+history is stored – and is idempotent per bucket: each grain records the
+(snapshot id, bucket) pairs it has folded in, so re-running combine.py
+on the same data adds nothing, while the same content seen on a later
+day (unchanged data, or a revert A → B → A) still lands in that day's
+and, if new there, that week's bucket. Averages are derived at query
+time (per-snapshot means divide by the bucket's snapshot count, so a
+group missing from some snapshots counts as zero there), and a series
+is one primary-key range scan, so trend queries do not slow down as
+snapshots accumulate.
+
+combine.py applies every snapshot it writes. Older archived copies of
+data.csv can be backfilled with `add`, in any order.
+
+Usage:
+  python scripts/rollups.py add archive/2024-05-01/data.csv --at 2024-05-01
+  python scripts/rollups.py trend --dim source --key BirBank --grain week
+  python scripts/rollups.py trend --dim region --grain day --limit 7
+  python scripts/rollups.py chart --dim source --grain week
+  python scripts/rollups.py status
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import dataio
+import instrument
+from affordability import parse_number, rate_tier
+from textnorm import city_of, normalize_key
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DATA_CSV = os.path.join(DATA_DIR, "data.csv")
+ROLLUP_FILE = os.path.join(DATA_DIR, "rollups.sqlite")
+
+GRAINS = ("day", "week")
+DIMENSIONS = ("all", "source", "developer", "region", "rate_tier")
+DEFAULT_LIMIT = 12         # buckets per trend
+CHART_SERIES = 8           # keys drawn per trend chart
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    snapshot   TEXT NOT NULL,
+    grain      TEXT NOT NULL,
+    bucket     TEXT NOT NULL,
+    taken_at   REAL NOT NULL,
+    rows       INTEGER NOT NULL,
+    applied_at REAL NOT NULL,
+    PRIMARY KEY (snapshot, grain, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollups (
+    grain         TEXT NOT NULL,      -- day | week
+    dim           TEXT NOT NULL,      -- all | source | developer | region | rate_tier
+    key           TEXT NOT NULL,      -- '' for dim = 'all'
+    bucket        TEXT NOT NULL,      -- 2024-05-01 | 2024-W18
+    snapshots     INTEGER NOT NULL,
+    rows_sum      INTEGER NOT NULL,
+    partners_sum  INTEGER NOT NULL,
+    rate_sum      REAL NOT NULL,
+    rate_n        INTEGER NOT NULL,
+    down_sum      REAL NOT NULL,
+    down_n        INTEGER NOT NULL,
+    last_at       REAL NOT NULL,
+    last_rows     INTEGER NOT NULL,
+    last_partners INTEGER NOT NULL,
+    last_rate     REAL,
+    last_down     REAL,
+    PRIMARY KEY (grain, dim, key, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollups_bucket ON rollups (grain, dim, bucket);
+"""
+
+# Groups of the bucket whose latest figures predate the snapshot being
+# applied; those it contains are overwritten by _UPSERT right after.
+_RESET_LAST = """
+UPDATE rollups SET last_at = ?, last_rows = 0, last_partners = 0, last_rate = NULL, last_down = NULL
+WHERE grain = ? AND dim IN ({dims}) AND bucket = ? AND last_at < ?
+""".format(dims=", ".join(f"'{d}'" for d in DIMENSIONS))
+
+_UPSERT = """
+INSERT INTO rollups VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (grain, dim, key, bucket) DO UPDATE SET
+    snapshots     = snapshots + 1,
+    rows_sum      = rows_sum + excluded.rows_sum,
+    partners_sum  = partners_sum + excluded.partners_sum,
+    rate_sum      = rate_sum + excluded.rate_sum,
+    rate_n        = rate_n + excluded.rate_n,
+    down_sum      = down_sum + excluded.down_sum,
+    down_n        = down_n + excluded.down_n,
+    last_rows     = CASE WHEN excluded.last_at >= last_at THEN excluded.last_rows ELSE last_rows END,
+    last_partners = CASE WHEN excluded.last_at >= last_at THEN excluded.last_partners ELSE last_partners END,
+    last_rate     = CASE WHEN excluded.last_at >= last_at THEN excluded.last_rate ELSE last_rate END,
+    last_down     = CASE WHEN excluded.last_at >= last_at THEN excluded.last_down ELSE last_down END,
+    last_at       = MAX(last_at, excluded.last_at)
+"""
+
+# Per-snapshot means divide by every snapshot in the bucket (the 'all' row),
+# not just the ones the group appeared in.
+_SERIES = """
+SELECT r.bucket, r.key, a.snapshots,
+       1.0 * r.rows_sum / a.snapshots     AS projects,
+       1.0 * r.partners_sum / a.snapshots AS partners,
+       r.rate_sum / NULLIF(r.rate_n, 0)   AS rate,
+       r.down_sum / NULLIF(r.down_n, 0)   AS down_payment,
+       r.last_rows, r.last_partners, r.last_rate, r.last_down
+FROM rollups AS r
+JOIN rollups AS a ON a.grain = r.grain AND a.dim = 'all' AND a.key = '' AND a.bucket = r.bucket
+"""
+
+
+def bucket_of(ts: float, grain: str) -> str:
+    day = datetime.fromtimestamp(ts, timezone.utc).date()
+    if grain == "day":
+        return day.isoformat()
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def group_stats(rows: list[dict]) -> dict[tuple[str, str], list]:
+    """
+    One pass over a snapshot: {(dim, key): [rows, partners, rate_sum,
+    rate_n, down_sum, down_n]}, with partners as a set until the end.
+    """
+    stats: dict[tuple[str, str], list] = defaultdict(lambda: [0, set(), 0.0, 0, 0.0, 0])
+    for r in rows:
+        developer = normalize_key(r["partner_name"] or r["name"])
+        rate, down = parse_number(r["annual_rate"]), parse_number(r["down_payment"])
+        keys = [("all", ""), ("source", r["source"])]
+        if developer:
+            keys.append(("developer", developer))
+        city = city_of(r)
+        if city:
+            keys.append(("region", city))
+        if rate == rate:  # not NaN
+            keys.append(("rate_tier", rate_tier(rate)))
+        for key in keys:
+            s = stats[key]
+            s[0] += 1
+            if developer:
+                s[1].add(developer)
+            if rate == rate:
+                s[2] += rate
+                s[3] += 1
+            if down == down:
+                s[4] += down
+                s[5] += 1
+    for s in stats.values():
+        s[1] = len(s[1])
+    return stats
+
+
+class Rollups:
+    def __init__(self, path: str = ROLLUP_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            yield db
+        finally:
+            db.close()
+
+    def apply(self, rows: list[dict], snapshot: str, taken_at: float | None = None) -> bool:
+        """
+        Fold one snapshot into its day and week buckets; False if both
+        buckets already hold this snapshot.
+        """
+        taken_at = time.time() if taken_at is None else taken_at
+        stats = group_stats(rows)
+        applied = False
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            for grain in GRAINS:
+                bucket = bucket_of(taken_at, grain)
+                cur = db.execute("INSERT OR IGNORE INTO observations VALUES (?, ?, ?, ?, ?, ?)",
+                                 (snapshot, grain, bucket, taken_at, len(rows), time.time()))
+                if cur.rowcount == 0:
+                    continue
+                applied = True
+                db.execute(_RESET_LAST, (taken_at, grain, bucket, taken_at))
+                db.executemany(_UPSERT, [
+                    (grain, dim, key, bucket, n, partners, rate_sum, rate_n, down_sum, down_n,
+                     taken_at, n, partners,
+                     rate_sum / rate_n if rate_n else None,
+                     down_sum / down_n if down_n else None)
+                    for (dim, key), (n, partners, rate_sum, rate_n, down_sum, down_n) in stats.items()
+                ])
+            db.execute("COMMIT")
+        return applied
+
+    def series(self, dim: str, key: str, grain: str = "week",
+               limit: int = DEFAULT_LIMIT) -> list[sqlite3.Row]:
+        """The last `limit` buckets of one group, oldest first."""
+        with self._connect() as db:
+            rows = db.execute(_SERIES + "WHERE r.grain = ? AND r.dim = ? AND r.key = ? "
+                              "ORDER BY r.bucket DESC LIMIT ?",
+                              (grain, dim, "" if dim == "all" else key, limit)).fetchall()
+        return rows[::-1]
+
+    def latest(self, dim: str, grain: str = "week", limit: int = DEFAULT_LIMIT) -> list[sqlite3.Row]:
+        """Every group of a dimension over the last `limit` buckets."""
+        with self._connect() as db:
+            buckets = [r["bucket"] for r in db.execute(
+                "SELECT bucket FROM rollups WHERE grain = ? AND dim = 'all' AND key = '' "
+                "ORDER BY bucket DESC LIMIT ?", (grain, limit))]
+            if not buckets:
+                return []
+            return db.execute(_SERIES + "WHERE r.grain = ? AND r.dim = ? AND r.bucket >= ? "
+                              "ORDER BY r.key, r.bucket", (grain, dim, buckets[-1])).fetchall()
+
+    def status(self) -> dict:
+        with self._connect() as db:
+            snaps = db.execute("SELECT COUNT(DISTINCT snapshot) AS n, COUNT(DISTINCT bucket) AS days, "
+                               "MIN(taken_at) AS first, MAX(taken_at) AS last "
+                               "FROM observations WHERE grain = 'day'").fetchone()
+            groups = db.execute("SELECT grain, dim, COUNT(DISTINCT key) AS keys, COUNT(*) AS n "
+                                "FROM rollups GROUP BY grain, dim ORDER BY grain, dim").fetchall()
+        return {"snapshots": snaps, "groups": groups}
+
+
+def apply_csv(path: str, taken_at: float | None = None, store: str = ROLLUP_FILE) -> bool:
+    """Fold a data.csv (or an archived copy) into the rollups."""
+    snapshot = dataio.snapshot_id(path)
+    if snapshot is None:
+        raise FileNotFoundError(f"{path} has no snapshot id – write it with dataio first")
+    if taken_at is None:
+        taken_at = os.path.getmtime(dataio.resolve(path))
+    return Rollups(store).apply(dataio.read_csv(path), snapshot, taken_at)
+
+
+# ── output ───────────────────────────────────────────────────────────────────
+
+def _fmt(value, spec: str = ".1f") -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def print_series(rows: list[sqlite3.Row]) -> None:
+    print(f"  {'bucket':<11} {'key':<28} {'snaps':>5} {'projects':>9} {'partners':>9} "
+          f"{'rate %':>7} {'down %':>7} {'last':>6}")
+    for r in rows:
+        print(f"  {r['bucket']:<11} {r['key'][:28] or '(all)':<28} {r['snapshots']:>5} "
+              f"{r['projects']:>9.1f} {r['partners']:>9.1f} {_fmt(r['rate']):>7} "
+              f"{_fmt(r['down_payment']):>7} {r['last_rows']:>6}")
+
+
+def chart(store: Rollups, dim: str, grain: str, limit: int) -> str:
+    """Projects and average rate per group over time, read from the rollups only."""
+    import matplotlib.pyplot as plt
+    from generate_charts import CHART_DIR, COLORS
+
+    series: dict[str, list[sqlite3.Row]] = defaultdict(list)
+    for r in store.latest(dim, grain, limit):
+        series[r["key"]].append(r)
+    if not series:
+        raise SystemExit("[ERROR] No rollups yet – run combine.py or `rollups.py add` first.")
+    top = sorted(series, key=lambda k: -series[k][-1]["last_rows"])[:CHART_SERIES]
+    buckets = sorted({r["bucket"] for k in top for r in series[k]})
+    x = {b: i for i, b in enumerate(buckets)}
+
+    fig, (left, right) = plt.subplots(1, 2, figsize=(14, 5.5))
+    for key in top:
+        pts = series[key]
+        color = COLORS.get(key)
+        label = key or "All banks"
+        left.plot([x[r["bucket"]] for r in pts], [r["projects"] for r in pts],
+                  marker="o", label=label, color=color)
+        rated = [r for r in pts if r["rate"] is not None]
+        right.plot([x[r["bucket"]] for r in rated], [r["rate"] for r in rated],
+                   marker="o", label=label, color=color)
+    for ax, ylabel in ((left, "Projects (mean per snapshot)"), (right, "Average annual rate (%)")):
+        ax.set_xticks(range(len(buckets)), buckets, rotation=45, ha="right")
+        ax.set_ylabel(ylabel)
+        ax.grid(axis="y", visible=True)
+    left.legend(fontsize=9)
+    fig.suptitle(f"Trends by {dim.replace('_', ' ')} per {grain}\n"
+                 f"Rolled up from every combined snapshot", fontsize=13)
+    fig.tight_layout()
+    name = f"trends_{dim}_{grain}.png"
+    fig.savefig(os.path.join(CHART_DIR, name), bbox_inches="tight")
+    plt.close(fig)
+    return name
+
+
+@instrument.job("rollups")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incremental trend rollups over data.csv snapshots.")
+    parser.add_argument("--store", default=ROLLUP_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="fold snapshot CSVs into the rollups")
+    add.add_argument("csv", nargs="*", default=[DATA_CSV])
+    add.add_argument("--at", help="snapshot date (YYYY-MM-DD[THH:MM]); default: the file's mtime")
+    for name in ("trend", "chart"):
+        p = sub.add_parser(name)
+        p.add_argument("--dim", choices=DIMENSIONS, default="source")
+        p.add_argument("--key", help="one group (trend only); default: every group")
+        p.add_argument("--grain", choices=GRAINS, default="week")
+        p.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="buckets (default: %(default)s)")
+    sub.add_parser("status")
+    args = parser.parse_args()
+
+    store = Rollups(args.store)
+    if args.command == "add":
+        taken_at = None
+        if args.at:
+            taken_at = datetime.fromisoformat(args.at).replace(tzinfo=timezone.utc).timestamp()
+        for path in args.csv:
+            with instrument.stage("rollups.apply") as st:
+                applied = apply_csv(path, taken_at, args.store)
+                st.records = 1 if applied else 0
+            print(f"[{'OK' if applied else 'INFO'}] {path}: "
+                  f"{'applied' if applied else 'already in its day and week buckets'}")
+    elif args.command == "trend":
+        key = args.key
+        if args.dim == "developer" and key:
+            key = normalize_key(key)
+        rows = store.series(args.dim, key, args.grain, args.limit) if key or args.dim == "all" \
+            else store.latest(args.dim, args.grain, args.limit)
+        if not rows:
+            print("[WARN] Nothing rolled up for that selection.")
+            return
+        print_series(rows)
+    elif args.command == "chart":
+        name = chart(store, args.dim, args.grain, args.limit)
+        print(f"  [saved] {name}")
+    else:
+        info = store.status()
+        snaps = info["snapshots"]
+        print(f"  {snaps['n']} snapshot(s) on {snaps['days']} day(s)"
+              + (f", {bucket_of(snaps['first'], 'day')} → {bucket_of(snaps['last'], 'day')}"
+                 if snaps["n"] else ""))
+        for g in info["groups"]:
+            print(f"  {g['grain']:<5} {g['dim']:<10} {g['keys']:>5} keys {g['n']:>7} buckets")
+
+
+if __name__ == "__main__":
+    main()
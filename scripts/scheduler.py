@@ -0,0 +1,291 @@
+"""
+Refresh Scheduler (daemon)
+State:  data/scheduler_state.json
+
+Keeps the dataset fresh without anyone running the scripts by hand:
+
+  - each bank's scraper runs on its own interval (± jitter), as a child
+    process, with at most one fetch in flight per source;
+  - a source "changed" when its output CSV's content hash differs after
+    the run (scrapers whose change probe finds nothing new leave the CSV
+    untouched, see probe.py); only then is combine.py re-run, once all in-flight fetches
+    have finished, followed by generate_charts.py for just the charts
+    that read the changed banks;
+  - failures back off exponentially (capped at the source's interval);
+  - next-due times, last hashes and pending downstream work are persisted
+    after every change, so a restart resumes the schedule instead of
+    refetching everything at once. Sources with no history get their first
+    run spread over STARTUP_SPREAD seconds.
+
+Usage:
+  python scripts/scheduler.py                              # run forever
+  python scripts/scheduler.py --once                       # due sources + downstream, then exit
+  python scripts/scheduler.py --once --force --only birbank
+  python scripts/scheduler.py --interval birbank=1800 --interval xalqbank=43200
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import dataio
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, "..", "data")
+STATE_FILE = os.path.join(DATA_DIR, "scheduler_state.json")
+
+HOUR = 3600
+JITTER = 0.1               # ± fraction of the interval
+STARTUP_SPREAD = 300       # seconds over which never-run sources start
+FAILURE_BACKOFF = 300      # first retry after a failure, doubled each time
+DOWNSTREAM_RETRY = 300     # retry a failed combine / charts run after this
+FETCH_TIMEOUT = 15 * 60
+TICK = 1.0                 # max sleep while work is in flight
+
+
+@dataclass
+class Source:
+    name: str
+    script: str
+    output: str
+    label: str              # value of the `source` column in data.csv
+    interval: float
+
+
+SOURCES = {
+    "pashabank": Source("pashabank", "pashabank.py", "pashabank.csv", "PASHA Bank", 12 * HOUR),
+    "abbhome": Source("abbhome", "abbhome.py", "abbhome.csv", "ABB Home", 12 * HOUR),
+    "xalqbank": Source("xalqbank", "xalqbank.py", "xalqbank.csv", "Xalq Bank", 12 * HOUR),
+    "birbank": Source("birbank", "birbank.py", "birbank.csv", "BirBank", 6 * HOUR),
+}
+
+
+def _iso(ts: float | None) -> str | None:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="seconds") if ts else None
+
+
+def run_script(script: str, *args: str, timeout: float = FETCH_TIMEOUT) -> int:
+    """Run scripts/<script> in a child process; return its exit status."""
+    cmd = [sys.executable, os.path.join(SCRIPT_DIR, script), *args]
+    try:
+        return subprocess.run(cmd, timeout=timeout).returncode
+    except subprocess.TimeoutExpired:
+        print(f"[ERROR] {script} timed out after {timeout:.0f}s")
+        return -1
+
+
+def fetch_source(src: Source) -> dict:
+    """One refresh of src: run its scraper and report whether the output changed."""
+    path = os.path.join(DATA_DIR, src.output)
+    before = dataio.snapshot_id(path)
+    status = run_script(src.script)
+    after = dataio.snapshot_id(path)
+    return {"status": status, "snapshot": after, "changed": status == 0 and after != before}
+
+
+class Scheduler:
+    def __init__(self, sources: list[Source], state_path: str = STATE_FILE,
+                 jitter: float = JITTER, rng: random.Random | None = None):
+        self.sources = {s.name: s for s in sources}
+        self.state_path = state_path
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="fetch")
+        self.inflight: dict[str, Future] = {}
+        self.state = self._load_state()
+
+    # ── state ────────────────────────────────────────────────────────────
+
+    def _load_state(self) -> dict:
+        state = {"sources": {}, "pending": [], "downstream_due": 0.0}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                state.update(json.load(f))
+        now = time.time()
+        for name in self.sources:
+            entry = state["sources"].setdefault(name, {})
+            if "next_due" not in entry:
+                entry["next_due"] = now + self.rng.uniform(0, STARTUP_SPREAD)
+            entry.setdefault("failures", 0)
+        return state
+
+    def save_state(self) -> None:
+        state = dict(self.state)
+        state["updated_at"] = _iso(time.time())
+        for entry in state["sources"].values():
+            entry["next_due_at"] = _iso(entry.get("next_due"))
+        tmp = self.state_path + ".tmp"
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        os.replace(tmp, self.state_path)
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + self.rng.uniform(-self.jitter, self.jitter))
+
+    # ── scheduling ───────────────────────────────────────────────────────
+
+    def force_all(self) -> None:
+        for entry in self.state["sources"].values():
+            entry["next_due"] = 0.0
+
+    def _collect(self, now: float) -> bool:
+        """Record finished fetches; True if anything changed."""
+        dirty = False
+        for name, future in list(self.inflight.items()):
+            if not future.done():
+                continue
+            del self.inflight[name]
+            src, entry = self.sources[name], self.state["sources"][name]
+            try:
+                result = future.result()
+            except Exception as exc:
+                result = {"status": -1, "snapshot": entry.get("snapshot"), "changed": False,
+                          "error": f"{type(exc).__name__}: {exc}"}
+            entry["last_run"] = now
+            entry["last_status"] = result["status"]
+            if result["status"] == 0:
+                entry["failures"] = 0
+                entry["snapshot"] = result["snapshot"]
+                entry["next_due"] = now + self._jittered(src.interval)
+                if result["changed"]:
+                    entry["last_change"] = now
+                    if name not in self.state["pending"]:
+                        self.state["pending"].append(name)
+                print(f"[INFO] {name}: {'changed' if result['changed'] else 'unchanged'}")
+            else:
+                entry["failures"] += 1
+                delay = min(src.interval, FAILURE_BACKOFF * 2 ** (entry["failures"] - 1))
+                entry["next_due"] = now + self._jittered(delay)
+                print(f"[WARN] {name}: exit {result['status']}"
+                      f"{' – ' + result['error'] if result.get('error') else ''}, "
+                      f"retry in {delay:.0f}s")
+            dirty = True
+        return dirty
+
+    def _submit_due(self, now: float) -> bool:
+        started = False
+        for name, src in self.sources.items():
+            if name in self.inflight or self.state["sources"][name]["next_due"] > now:
+                continue
+            print(f"[INFO] {name}: fetching")
+            self.inflight[name] = self.pool.submit(fetch_source, src)
+            started = True
+        return started
+
+    def _downstream(self, now: float) -> bool:
+        """combine + affected charts once no fetch is in flight."""
+        pending = self.state["pending"]
+        if not pending or self.inflight or self.state["downstream_due"] > now:
+            return False
+        labels = sorted(self.sources[n].label for n in pending if n in self.sources)
+        print(f"[INFO] Changed: {', '.join(labels)} – running combine + charts")
+        ok = run_script("combine.py") == 0 and \
+            run_script("generate_charts.py", "--sources", ",".join(labels)) == 0
+        if ok:
+            self.state["pending"] = []
+            self.state["last_downstream"] = now
+        else:
+            self.state["downstream_due"] = now + DOWNSTREAM_RETRY
+            print(f"[WARN] Downstream failed – retry in {DOWNSTREAM_RETRY}s")
+        return True
+
+    def tick(self, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        dirty = self._collect(now)
+        dirty |= self._submit_due(now)
+        dirty |= self._downstream(now)
+        if dirty:
+            self.save_state()
+
+    def sleep_for(self, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        if self.inflight:
+            return TICK
+        wake = [e["next_due"] for e in self.state["sources"].values()]
+        if self.state["pending"]:
+            wake.append(self.state["downstream_due"])
+        return max(0.0, min(wake) - now)
+
+    def idle(self) -> bool:
+        return not self.inflight and not self.state["pending"]
+
+    def run_once(self) -> None:
+        """Fetch every due source, wait for them, run downstream, return."""
+        self.tick()
+        while self.inflight:
+            time.sleep(min(TICK, 0.2))
+            self._collect(time.time())
+        self.state["downstream_due"] = 0.0
+        self._downstream(time.time())
+        self.save_state()
+
+    def run_forever(self) -> None:
+        while True:
+            self.tick()
+            time.sleep(min(self.sleep_for(), 60.0))
+
+    def shutdown(self) -> None:
+        for future in self.inflight.values():
+            future.cancel()
+        self.pool.shutdown(wait=True)
+        self._collect(time.time())
+        self.save_state()
+
+
+def _sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh each bank on its own interval.")
+    parser.add_argument("--once", action="store_true", help="run due sources + downstream, then exit")
+    parser.add_argument("--force", action="store_true", help="treat every source as due now")
+    parser.add_argument("--only", help="comma-separated sources (default: all)")
+    parser.add_argument("--interval", action="append", default=[], metavar="SOURCE=SECONDS")
+    parser.add_argument("--jitter", type=float, default=JITTER)
+    parser.add_argument("--state", default=STATE_FILE)
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(SOURCES)
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)}")
+    sources = [SOURCES[n] for n in names]
+    for spec in args.interval:
+        name, _, seconds = spec.partition("=")
+        if name not in SOURCES or not seconds:
+            parser.error(f"--interval expects SOURCE=SECONDS, got {spec!r}")
+        for s in sources:
+            if s.name == name:
+                s.interval = float(seconds)
+
+    scheduler = Scheduler(sources, args.state, args.jitter)
+    if args.force:
+        scheduler.force_all()
+    signal.signal(signal.SIGTERM, _sigterm)
+    try:
+        if args.once:
+            scheduler.run_once()
+        else:
+            for s in sources:
+                due = scheduler.state["sources"][s.name]["next_due"]
+                print(f"[INFO] {s.name}: every {s.interval / HOUR:g}h, next {_iso(due)}")
+            scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("[INFO] Stopping – waiting for in-flight fetches.")
+    finally:
+        scheduler.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Azerbaijani-aware Full-Text Search over partners and addresses
+Reads:  data/data.csv
+Output: data/search_index.bin  (rebuilt by combine.py on every run)
+
+Indexes `name`, `partner_name` and `address` of every row. Text is folded
+so that ə/e, ş/s, ı/i/İ/I, ç/c, ğ/g, ö/o, ü/u and any other accents match
+each other, then split into word tokens.
+
+Matching, per query token (all tokens must match, AND):
+  exact      token equals an indexed term
+  prefix     the last query token may be the start of a term ("zəri" → "zerife")
+  typo       if neither finds anything, terms one edit away (insert, delete,
+             substitute, swap) are used, via a deletion-neighbourhood map
+Rows are scored by field (name 3, partner 2, address 1) × match kind
+(exact 1.0, prefix 0.8, typo 0.5) and returned best first.
+
+On-disk format (little-endian):
+  b"AZSI" | u8 version | 32-byte snapshot sha256 | u32 docs | u32 terms
+  | u32 vocab bytes | vocab (terms, sorted, "\\n"-joined UTF-8)
+  | u32 offsets[terms + 1] | postings
+Each term's postings are varint-encoded deltas of (row << 2 | field),
+decoded lazily on first use, so loading costs one read plus a split.
+
+Usage:
+  python scripts/search.py "zerife eliyeva"
+  python scripts/search.py "nəftçilər" --limit 5
+  python scripts/search.py --rebuild
+"""
+
+import argparse
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+
+import dataio
+import instrument
+from textnorm import fold
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DATA_CSV = os.path.join(DATA_DIR, "data.csv")
+INDEX_FILE = os.path.join(DATA_DIR, "search_index.bin")
+
+MAGIC = b"AZSI"
+INDEX_VERSION = 1
+FIELDS = ("name", "partner_name", "address")
+FIELD_WEIGHT = (3.0, 2.0, 1.0)
+EXACT, PREFIX, TYPO = 1.0, 0.8, 0.5
+MIN_TYPO_LEN = 4           # shorter tokens are too ambiguous for typo matching
+DEFAULT_LIMIT = 10
+
+_TOKEN = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=65536)
+def tokenize(text: str) -> tuple[str, ...]:
+    return tuple(_TOKEN.findall(fold(text)))
+
+
+def _deletes(term: str) -> set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _varints(values: list[int]) -> bytes:
+    out = bytearray()
+    prev = 0
+    for v in values:
+        delta, prev = v - prev, v
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def _unvarints(data: bytes) -> list[int]:
+    values, cur, shift, total = [], 0, 0, 0
+    for byte in data:
+        cur |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        total += cur
+        values.append(total)
+        cur, shift = 0, 0
+    return values
+
+
+class SearchIndex:
+    def __init__(self, terms: list[str], offsets, postings: bytes,
+                 docs: int, snapshot: str | None = None):
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+        self.docs = docs
+        self.snapshot = snapshot
+        self._neighbours: dict[str, list[int]] | None = None
+        self._decoded: dict[int, list[int]] = {}
+
+    # ── build / persist ──────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls, rows: list[dict], snapshot: str | None = None) -> "SearchIndex":
+        # Codes are generated in ascending order, so each posting list stays
+        # sorted and a repeat can only be its last element.
+        inverted: dict[str, list[int]] = {}
+        for row_id, row in enumerate(rows):
+            for field_id, field in enumerate(FIELDS):
+                code = row_id << 2 | field_id
+                for token in tokenize(row.get(field) or ""):
+                    posting = inverted.get(token)
+                    if posting is None:
+                        inverted[token] = [code]
+                    elif posting[-1] != code:
+                        posting.append(code)
+        terms = sorted(inverted)
+        offsets = array("I", [0])
+        blobs = []
+        for term in terms:
+            blob = _varints(inverted[term])
+            blobs.append(blob)
+            offsets.append(offsets[-1] + len(blob))
+        return cls(terms, offsets, b"".join(blobs), len(rows), snapshot)
+
+    def save(self, path: str = INDEX_FILE) -> None:
+        vocab = "\n".join(self.terms).encode("utf-8")
+        snapshot = bytes.fromhex(self.snapshot) if self.snapshot else bytes(32)
+        offsets = array("I", self.offsets)
+        if struct.pack("=I", 1) != struct.pack("<I", 1):
+            offsets.byteswap()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + struct.pack("<B32sIII", INDEX_VERSION, snapshot,
+                                        self.docs, len(self.terms), len(vocab)))
+            f.write(vocab)
+            f.write(offsets.tobytes())
+            f.write(self.postings)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE) -> "SearchIndex":
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path}: not a search index")
+        version, snapshot, docs, n_terms, vocab_len = struct.unpack_from("<B32sIII", data, 4)
+        if version != INDEX_VERSION:
+            raise ValueError(f"{path}: unsupported search index version {version}")
+        pos = 4 + struct.calcsize("<B32sIII")
+        terms = data[pos:pos + vocab_len].decode("utf-8").split("\n") if n_terms else []
+        pos += vocab_len
+        offsets = array("I")
+        offsets.frombytes(data[pos:pos + 4 * (n_terms + 1)])
+        if struct.pack("=I", 1) != struct.pack("<I", 1):
+            offsets.byteswap()
+        pos += 4 * (n_terms + 1)
+        snapshot_hex = snapshot.hex() if any(snapshot) else None
+        return cls(terms, offsets, data[pos:], docs, snapshot_hex)
+
+    # ── query ────────────────────────────────────────────────────────────
+
+    def _postings(self, term_id: int) -> list[int]:
+        hit = self._decoded.get(term_id)
+        if hit is None:
+            hit = _unvarints(self.postings[self.offsets[term_id]:self.offsets[term_id + 1]])
+            self._decoded[term_id] = hit
+        return hit
+
+    def _term_id(self, term: str) -> int | None:
+        i = bisect_left(self.terms, term)
+        return i if i < len(self.terms) and self.terms[i] == term else None
+
+    def _prefix_ids(self, prefix: str) -> range:
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + "\U0010ffff", lo)
+        return range(lo, hi)
+
+    def _typo_ids(self, token: str) -> set[int]:
+        if self._neighbours is None:
+            neighbours: dict[str, list[int]] = {}
+            for term_id, term in enumerate(self.terms):
+                if len(term) >= MIN_TYPO_LEN - 1:
+                    for key in _deletes(term) | {term}:
+                        neighbours.setdefault(key, []).append(term_id)
+            self._neighbours = neighbours
+        ids: set[int] = set()
+        for key in _deletes(token) | {token}:
+            ids.update(self._neighbours.get(key, ()))
+        return ids
+
+    def _match(self, token: str, last: bool) -> dict[int, float]:
+        """row → best score for one query token."""
+        kinds: list[tuple[int, float]] = []
+        exact = self._term_id(token)
+        if exact is not None:
+            kinds.append((exact, EXACT))
+        if last:
+            kinds += [(t, PREFIX) for t in self._prefix_ids(token) if t != exact]
+        if not kinds and len(token) >= MIN_TYPO_LEN:
+            kinds = [(t, TYPO) for t in self._typo_ids(token)]
+
+        scores: dict[int, float] = {}
+        for term_id, kind in kinds:
+            for code in self._postings(term_id):
+                row, score = code >> 2, kind * FIELD_WEIGHT[code & 3]
+                if score > scores.get(row, 0.0):
+                    scores[row] = score
+        return scores
+
+    def search(self, query: str, limit: int | None = DEFAULT_LIMIT) -> list[tuple[int, float]]:
+        """[(row, score)] best first; rows index data.csv in file order."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        total: dict[int, float] | None = None
+        for n, token in enumerate(tokens):
+            scores = self._match(token, last=n == len(tokens) - 1)
+            if total is None:
+                total = scores
+            else:
+                total = {row: s + scores[row] for row, s in total.items() if row in scores}
+            if not total:
+                return []
+        ranked = sorted(total.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+def rebuild(data_csv: str = DATA_CSV, path: str = INDEX_FILE) -> SearchIndex:
+    index = SearchIndex.build(dataio.read_csv(data_csv), dataio.snapshot_id(data_csv))
+    index.save(path)
+    return index
+
+
+@instrument.job("search")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search partners, complexes and addresses.")
+    parser.add_argument("query", nargs="?")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from data.csv")
+    args = parser.parse_args()
+
+    if args.rebuild or not os.path.exists(INDEX_FILE):
+        with instrument.stage("search.build") as st:
+            index = rebuild()
+            st.records = len(index.terms)
+        print(f"[OK] {len(index.terms)} terms → {os.path.abspath(INDEX_FILE)}")
+    if not args.query:
+        return
+
+    with instrument.stage("search.query") as st:
+        index = SearchIndex.load()
+        hits = index.search(args.query, args.limit)
+        st.records = len(hits)
+    if index.snapshot != dataio.snapshot_id(DATA_CSV):
+        print("[WARN] data.csv changed since the index was built – run combine.py or --rebuild.")
+    if not hits:
+        print(f"[WARN] No matches for {args.query!r}.")
+        return
+
+    rows = dataio.read_csv(DATA_CSV)
+    for row_id, score in hits:
+        r = rows[row_id]
+        partner = f" ({r['partner_name']})" if r.get("partner_name") else ""
+        print(f"  {score:4.1f}  {r['source']:<11} {r['name']}{partner}")
+        if r.get("address"):
+            print(f"              {r['address']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Persistent cookie jar + session warm-up for the HTML scrapers
+State: data/sessions/<host>.json  (one jar per bank host)
+
+The bank sites sit behind WAFs that want their own cookies (TS01…,
+dtCookie, the xalqbank session token) on every request. Instead of
+pasting them from a browser, each scraper gets them itself:
+
+  first contact   one HEAD request to the site's home page; the cookies it
+                  sets are stored in data/sessions/<host>.json
+  later runs      the stored jar is reused as is (expired cookies dropped),
+                  so a normal run makes no extra request
+  403             the jar is thrown away, the warm-up repeated and the
+                  request retried once
+  failed warm-up  nothing is saved and the jar stays stale; the warm-up is
+                  tried again on a request at least WARM_UP_RETRY seconds later
+Cookies the server rotates on ordinary responses are written back, so the
+jar stays as fresh as the last successful request.
+
+Thread-safe: every thread gets its own requests.Session seeded from the
+shared jar, and concurrent 403s trigger a single warm-up.
+
+Usage:
+  STORE = sessions.SessionStore(PAGE_URL, HEADERS)
+  resp = STORE.get(PAGE_URL, timeout=30)
+"""
+
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.cookies import RequestsCookieJar, create_cookie
+
+import http_client
+
+STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "sessions")
+WARM_UP_RETRY = 60.0       # seconds before a failed warm-up is tried again
+
+
+def _key(cookie) -> tuple[str, str, str]:
+    return cookie.domain, cookie.path, cookie.name
+
+
+def _snapshot(jar) -> dict:
+    return {_key(c): c.value for c in jar}
+
+
+class SessionStore:
+    def __init__(self, site_url: str, headers: dict, path: str | None = None):
+        parts = urlsplit(site_url)
+        self.netloc = parts.netloc
+        self.home = f"{parts.scheme}://{parts.netloc}/"
+        self.headers = headers
+        self.path = path or os.path.join(STORE_DIR, f"{self.netloc}.json")
+        self.jar, self.stale = self._load()
+        self.generation = 0
+        self._failed_at = float("-inf")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # ── persistence ──────────────────────────────────────────────────────
+
+    def _load(self) -> tuple[RequestsCookieJar, bool]:
+        """(jar, stale): stale if never warmed up or every stored cookie has expired."""
+        jar = RequestsCookieJar()
+        if not os.path.exists(self.path):
+            return jar, True
+        with open(self.path, encoding="utf-8") as f:
+            stored = json.load(f).get("cookies", [])
+            for c in stored:
+                cookie = create_cookie(c["name"], c["value"], domain=c["domain"], path=c["path"],
+                                       expires=c.get("expires"), secure=c.get("secure", False),
+                                       rest=c.get("rest") or {})
+                if not cookie.is_expired():
+                    jar.set_cookie(cookie)
+        return jar, bool(stored) and not len(jar)
+
+    def save(self) -> None:
+        cookies = [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+             "expires": c.expires, "secure": c.secure, "rest": c._rest}
+            for c in self.jar
+        ]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"host": self.netloc, "cookies": cookies}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        os.replace(tmp, self.path)
+
+    # ── sessions ─────────────────────────────────────────────────────────
+
+    def session(self) -> requests.Session:
+        """This thread's session, re-seeded whenever the jar was refreshed."""
+        session = getattr(self._local, "session", None)
+        if session is None or self._local.generation != self.generation:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.cookies.update(self.jar)
+            self._local.session = session
+            self._local.generation = self.generation
+        return session
+
+    def warm_up(self, seen_generation: int | None = None) -> None:
+        """Fetch fresh cookies from the home page (once, however many threads ask)."""
+        with self._lock:
+            if seen_generation is not None and seen_generation != self.generation:
+                return  # another thread refreshed the jar meanwhile
+            session = requests.Session()
+            session.headers.update(self.headers)
+            try:
+                resp = http_client.head(self.home, session=session, timeout=30, allow_redirects=True)
+                resp.raise_for_status()
+            except requests.RequestException as exc:
+                # Keep the old jar and stay stale: the next request tries again
+                # instead of every later run going out without cookies.
+                print(f"[WARN] {self.netloc}: warm-up failed – {exc}")
+                self._failed_at = time.monotonic()
+                return
+            self.jar = session.cookies
+            self.stale = False
+            self.generation += 1
+            self.save()
+            print(f"[INFO] {self.netloc}: warm-up → {len(self.jar)} cookie(s)")
+
+    def _keep(self, session: requests.Session) -> None:
+        """Write back cookies the server set or rotated on a normal response."""
+        if _snapshot(session.cookies) == _snapshot(self.jar):
+            return
+        with self._lock:
+            self.jar.update(session.cookies)
+            self.save()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        if self.stale and time.monotonic() - self._failed_at > WARM_UP_RETRY:
+            self.warm_up(self.generation)
+        generation = self.generation
+        session = self.session()
+        resp = http_client.get(url, session=session, **kwargs)
+        if resp.status_code == 403:
+            print(f"[WARN] {self.netloc}: HTTP 403 – refreshing cookies")
+            self.warm_up(generation)
+            session = self.session()
+            resp = http_client.get(url, session=session, **kwargs)
+        if resp.ok:
+            self._keep(session)
+        return resp
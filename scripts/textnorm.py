@@ -0,0 +1,128 @@
+"""
+Text Normalization – one cleanup for every scraped field
+Used by: pashabank.py, abbhome.py, abbhome_projects.py, xalqbank.py,
+         birbank.py, combine.py (and the search / ranking keys)
+
+clean() is the single cleanup pass applied to every scraped value:
+
+  translate  one str.translate per value: NBSP, narrow / figure / ideographic
+             spaces, tabs and line breaks → " "; zero-width characters, BOM
+             and soft hyphens removed; look-alike letters → Azerbaijani
+             (Cyrillic ә / Ә and turned ǝ / Ǝ → ə / Ə); curly apostrophes → '
+  compose    NFC (only for non-ASCII values), so "s" + combining cedilla and
+             "ş" are the same string
+  collapse   one precompiled regex: runs of whitespace → one space, trimmed
+
+Results are memoised (LRU), which matters because BirBank repeats every
+partner-level field on each of the partner's complexes.
+
+The derived keys live here too, built on the same tables:
+
+  fold            search key: lower-case, ə→e, ş→s, … and accents dropped
+  normalize_key   developer / bank key: case- and accent-insensitive, legal
+                  suffix (MMC, MTK, …) and punctuation dropped
+  slug            file-name form of fold ("PASHA Bank" → "pasha-bank")
+  city_of         a record's city from its region field or address
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+CACHE_SIZE = 65536
+
+_TRANSLATE = str.maketrans({
+    # spaces: NBSP, en quad … hair space, narrow NBSP, math / ideographic space
+    "\t": " ", "\n": " ", "\r": " ", "\f": " ", "\v": " ", "\xa0": " ",
+    **{chr(c): " " for c in range(0x2000, 0x200B)},
+    "\u202f": " ", "\u205f": " ", "\u3000": " ",
+    # invisible: zero-width space / non-joiner / joiner, word joiner, BOM, soft hyphen
+    "\u200b": None, "\u200c": None, "\u200d": None, "\u2060": None,
+    "\ufeff": None, "\xad": None,
+    # Azerbaijani look-alikes: Cyrillic schwa, turned e
+    "\u04d9": "ə", "\u04d8": "Ə", "\u01dd": "ə", "\u018e": "Ə",
+    # apostrophes
+    "\u2018": "'", "\u2019": "'", "\u02bc": "'", "\u00b4": "'", "`": "'",
+})
+_SPACES = re.compile(r"\s+")
+_LEADING_PUNCT = re.compile(r"^[\s;,:]+")
+
+_FOLD = str.maketrans({
+    "ə": "e", "Ə": "e", "ş": "s", "Ş": "s", "ı": "i", "I": "i", "İ": "i",
+    "ç": "c", "Ç": "c", "ğ": "g", "Ğ": "g", "ö": "o", "Ö": "o", "ü": "u", "Ü": "u",
+})
+_LEGAL_SUFFIX = re.compile(r"\b(mmc|mtk|llc|qsc|asc|ltd)\b")
+_NON_WORD = re.compile(r"[^\w]+")
+_NON_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _clean(text: str) -> str:
+    text = text.translate(_TRANSLATE)
+    if not text.isascii():
+        text = unicodedata.normalize("NFC", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def clean(value, prefix: str = "") -> str:
+    """
+    A scraped value as a clean single-line string ("" for None). With a
+    prefix ("Ünvan:", "Tel:"), a leading label is dropped along with any
+    punctuation that follows it.
+    """
+    if value is None:
+        return ""
+    text = _clean(value if isinstance(value, str) else str(value))
+    if prefix:
+        if text[:len(prefix)].lower() == prefix.lower():
+            text = text[len(prefix):]
+        text = _LEADING_PUNCT.sub("", text)
+    return text
+
+
+# clean() for values known to be str with no prefix (CSV cells): the cached
+# function itself, without the wrapper's None / prefix handling.
+clean_str = _clean
+
+
+def tag_text(tag) -> str:
+    """clean() of a BeautifulSoup tag's text ("" for None)."""
+    return _clean(tag.get_text(" ")) if tag is not None else ""
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fold(text: str) -> str:
+    """Lower-case, Azerbaijani-folded, accent-free form of text."""
+    text = unicodedata.normalize("NFKD", text.translate(_FOLD).lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_key(name: str) -> str:
+    """Case-, accent- and punctuation-insensitive key ("PMD GROUP MMC" → "pmd group")."""
+    text = unicodedata.normalize("NFKD", name.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _LEGAL_SUFFIX.sub(" ", text)
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def slug(text: str) -> str:
+    return _NON_SLUG.sub("-", fold(text)).strip("-") or "unknown"
+
+
+def city_of(r) -> str:
+    """A record's city: the region field, else a keyword in the address ("" if unknown)."""
+    if r["region"].strip():
+        return r["region"].strip()
+    addr = r["address"].lower()
+    if "bakı" in addr or "baku" in addr or "ağ şəhər" in addr:
+        return "Bakı"
+    elif "sumqayıt" in addr or "sumgait" in addr:
+        return "Sumqayıt"
+    elif "gəncə" in addr or "ganje" in addr:
+        return "Gəncə"
+    elif "xırdalan" in addr:
+        return "Xırdalan"
+    elif "abşeron" in addr:
+        return "Abşeron"
+    return ""
@@ -0,0 +1,188 @@
+"""
+Data Quality Checks
+Reads:  the unified rows combine.py builds (or any CSV in its schema)
+Output: data/quality_report.json  (per source: rows, quarantined, failures per rule)
+        data/quarantine.csv       (rows that failed an error rule + a `failed` column)
+
+The rules are data (RULES): a name, the field(s) they read, a kind with
+its argument, and a severity.
+
+  required   the field is non-empty
+  pattern    a non-empty value fully matches a regex (phones, URLs)
+  range      a non-empty value's number lies within [lo, hi]; labels are
+             read with affordability.parse_number ("min. 8%" → 8.0)
+  box        a latitude / longitude pair lies inside a bounding box
+             (one without the other fails)
+
+An error rule quarantines the row: it is kept out of data.csv and
+everything built from it (ranking, search, rollups, charts). A warn rule
+only counts in the report, with a few example values, for values that
+are odd but still usable, such as a phone field holding two numbers.
+
+compile_rules() turns RULES into one check per row, with one precompiled
+predicate per rule, memoised per distinct value because scraped values
+repeat heavily. combine.py runs it over each source's rows as it maps
+them, so nothing is read twice.
+
+Usage:
+  python scripts/validate.py                     # check data/data.csv, print the report
+  python scripts/validate.py data/old/data.csv
+"""
+
+import argparse
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+
+import dataio
+import instrument
+from affordability import parse_number
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DATA_CSV = os.path.join(DATA_DIR, "data.csv")
+REPORT_FILE = os.path.join(DATA_DIR, "quality_report.json")
+QUARANTINE_FILE = os.path.join(DATA_DIR, "quarantine.csv")
+
+CACHE_SIZE = 65536
+EXAMPLES = 3           # example values kept per source and rule
+
+# One Azerbaijani number (+994 or 0, then 9 digits) or one short code (*1144, 121).
+PHONE = r"(\+994|0)([\s-]?\d){9}|\*?\d{3,4}"
+URL = r"(https?://)?([\w-]+\.)+[a-z]{2,}(:\d+)?(/.*)?"
+HTTP_URL = r"https?://([\w-]+\.)+[a-z]{2,}(:\d+)?/.*"
+SOCIAL = URL + r"|@?[\w.]+"
+# Latitude min / max, longitude min / max, Nakhchivan and the Caspian shore included.
+AZERBAIJAN = (38.3, 42.0, 44.7, 50.9)
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    fields: tuple[str, ...]
+    kind: str                  # required / pattern / range / box
+    arg: object = None         # regex, (lo, hi) or (lat_lo, lat_hi, lon_lo, lon_hi)
+    severity: str = "error"    # error: quarantine the row, warn: report only
+
+
+RULES = (
+    Rule("name_present", ("name",), "required"),
+    Rule("phone_format", ("phone",), "pattern", PHONE, "warn"),
+    Rule("website_url", ("website",), "pattern", URL, "warn"),
+    Rule("logo_url", ("logo_url",), "pattern", HTTP_URL, "warn"),
+    Rule("facebook_link", ("facebook",), "pattern", SOCIAL, "warn"),
+    Rule("instagram_link", ("instagram",), "pattern", SOCIAL, "warn"),
+    Rule("down_payment_range", ("down_payment",), "range", (0, 100)),
+    Rule("annual_rate_range", ("annual_rate",), "range", (0.1, 40)),
+    Rule("term_range", ("term",), "range", (1, 40)),
+    Rule("min_loan_range", ("min_loan_amount",), "range", (100, 10_000_000)),
+    Rule("max_loan_range", ("max_loan_amount",), "range", (100, 10_000_000)),
+    Rule("coordinates_in_azerbaijan", ("latitude", "longitude"), "box", AZERBAIJAN),
+)
+
+
+def _predicate(rule: Rule):
+    """value(s) → passes? Empty values pass every kind but required."""
+    if rule.kind == "required":
+        return bool
+    if rule.kind == "pattern":
+        fullmatch = re.compile(rule.arg, re.IGNORECASE).fullmatch
+        return lambda v: not v or fullmatch(v) is not None
+    if rule.kind == "range":
+        lo, hi = rule.arg
+        return lambda v: not v or lo <= parse_number(v) <= hi    # NaN fails
+    if rule.kind == "box":
+        lat_lo, lat_hi, lon_lo, lon_hi = rule.arg
+        return lambda lat, lon: ((not lat and not lon)
+                                 or (lat_lo <= parse_number(lat) <= lat_hi
+                                     and lon_lo <= parse_number(lon) <= lon_hi))
+    raise ValueError(f"{rule.name}: unknown rule kind {rule.kind!r}")
+
+
+def compile_rules(rules: tuple[Rule, ...] = RULES):
+    """A function row → list of the rules it fails."""
+    checks = []
+    for rule in rules:
+        passes = lru_cache(maxsize=CACHE_SIZE)(_predicate(rule))
+        checks.append((rule, itemgetter(*rule.fields), passes, len(rule.fields) > 1))
+
+    def check(row: dict) -> list[Rule]:
+        return [rule for rule, get, passes, spread in checks
+                if not (passes(*get(row)) if spread else passes(get(row)))]
+
+    return check
+
+
+class Validator:
+    """Checks rows source by source and collects the report and the quarantine."""
+
+    def __init__(self, rules: tuple[Rule, ...] = RULES):
+        self.check = compile_rules(rules)
+        self.sources: dict[str, dict] = {}
+        self.quarantine: list[dict] = []
+
+    def filter(self, rows: list[dict]) -> list[dict]:
+        """The rows that pass every error rule; failures go to the report / quarantine."""
+        kept = []
+        for row in rows:
+            failed = self.check(row)
+            stats = self.sources.setdefault(row["source"], {"rows": 0, "quarantined": 0, "rules": {}})
+            stats["rows"] += 1
+            if not failed:
+                kept.append(row)
+                continue
+            for rule in failed:
+                entry = stats["rules"].setdefault(
+                    rule.name, {"severity": rule.severity, "failed": 0, "examples": []})
+                entry["failed"] += 1
+                example = " / ".join(row[f] or "" for f in rule.fields)
+                if len(entry["examples"]) < EXAMPLES and example not in entry["examples"]:
+                    entry["examples"].append(example)
+            if any(rule.severity == "error" for rule in failed):
+                stats["quarantined"] += 1
+                self.quarantine.append({**row, "failed": ";".join(rule.name for rule in failed)})
+            else:
+                kept.append(row)
+        return kept
+
+    def report(self, snapshot: str | None = None) -> dict:
+        return {"snapshot": snapshot, "sources": self.sources}
+
+    def save(self, fields: list[str], snapshot: str | None = None,
+             report_path: str = REPORT_FILE, quarantine_path: str = QUARANTINE_FILE) -> None:
+        dataio.write_csv(quarantine_path, self.quarantine, list(fields) + ["failed"])
+        tmp = report_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.report(snapshot), ensure_ascii=False, indent=2))
+            f.write("\n")
+        os.replace(tmp, report_path)
+
+
+def print_report(report: dict) -> None:
+    for source, stats in report["sources"].items():
+        print(f"  {source}: {stats['rows']} rows, {stats['quarantined']} quarantined")
+        for name, entry in stats["rules"].items():
+            examples = ", ".join(repr(e) for e in entry["examples"])
+            print(f"    {name} ({entry['severity']}): {entry['failed']}  e.g. {examples}")
+
+
+@instrument.job("validate")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check a unified CSV against the data-quality rules.")
+    parser.add_argument("csv", nargs="?", default=DATA_CSV)
+    args = parser.parse_args()
+
+    with instrument.stage("validate.check") as st:
+        rows = dataio.read_csv(args.csv)
+        validator = Validator()
+        validator.filter(rows)
+        st.records = len(rows)
+
+    print(f"[INFO] {args.csv}: {len(rows)} rows, {len(validator.quarantine)} fail an error rule")
+    print_report(validator.report(dataio.snapshot_id(args.csv)))
+
+
+if __name__ == "__main__":
+    main()
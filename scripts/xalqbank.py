@@ -17,16 +17,23 @@ HTML structure per partner card:
         p[2] → <a href=website>
 """
 
-import csv
 import os
-import re
+from collections.abc import Callable
 import requests
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup
+
+import dataio
+import instrument
+import probe
+import sessions
+from textnorm import clean, tag_text
 
 PAGE_URL = (
     "https://www.xalqbank.az/az/ferdi/kreditler/ipoteka/"
     "partnyor-sirketler-uzre-ipoteka"
 )
+# Change probe: the partner cards up to the footer feed the CSV.
+PROBE_BLOCK = ('class="loan__item', "<footer")
 
 HEADERS = {
     "accept": (
@@ -48,16 +55,9 @@ HEADERS = {
     ),
 }
 
-# Update if the site returns 403 / empty partner list
-COOKIES = {
-    "xalqbank": (
-        "eyJpdiI6ImxYa244bmVMWTBHT3RsaVpIM1pHT2c9PSIsInZhbHVlIjoiRzNlT2c3MkI0dy"
-        "9TTEI0VGtuYkcvZVYzQ2dmdjZHRnNweEkwQ0NrcUg2aUtFMWxTSkxzVmF1ejBINDNnbk9U"
-        "QWRSSkRaVG1tNGIvQWluUndPVHRiaEpQeEpFbTFmR2N1cTl3MTVMU0poVXJpZll5di9OdG"
-        "Zhc09HQmxiNEI2YVIiLCJtYWMiOiJjMDNhYTQxZjdmYTZlNmI0NDg2ZTk0ODVlNWZiNzk0"
-        "ZTYzYTEwMjRlNjEyYWZmYzVjZTNlZDY5YmY2N2U3MTA5IiwidGFnIjoiIn0%3D"
-    ),
-}
+# WAF / session cookies: obtained by a warm-up request and kept in
+# data/sessions/, refreshed on 403 (see sessions.py).
+SESSION = sessions.SessionStore(PAGE_URL, HEADERS)
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "xalqbank.csv")
@@ -65,38 +65,25 @@ OUTPUT_FILE = os.path.join(OUTPUT_DIR, "xalqbank.csv")
 CSV_FIELDS = ["name", "region", "address", "phone", "website", "logo_url"]
 
 
-def fetch_page(url: str) -> BeautifulSoup | None:
-    session = requests.Session()
-    session.headers.update(HEADERS)
-    session.cookies.update(COOKIES)
+def fetch_html(url: str, headers: dict | None = None) -> requests.Response | None:
+    """GET the page; may be a 304 if headers carry the probe's validators."""
     try:
-        resp = session.get(url, timeout=30)
+        resp = SESSION.get(url, headers=headers, timeout=30)
         resp.raise_for_status()
         resp.encoding = "utf-8"
-        return BeautifulSoup(resp.text, "html.parser")
+        return resp
     except requests.RequestException as exc:
         print(f"[ERROR] {exc}")
         return None
 
 
-def _t(tag: Tag | None) -> str:
-    return tag.get_text(" ", strip=True) if tag else ""
-
-
-def _clean_text(raw: str, prefix: str = "") -> str:
-    """Strip a known prefix like 'Ünvan:' or 'Tel:' and normalise whitespace."""
-    import re as _re
-    text = raw.strip()
-    if prefix and text.lower().startswith(prefix.lower()):
-        text = text[len(prefix):].strip()
-    # Remove leading punctuation artifacts (;  ,  &nbsp; etc.)
-    text = _re.sub(r'^[\s;,\xa0\u00a0\u200b]+', '', text)
-    # Collapse inner whitespace
-    text = _re.sub(r'[\s\xa0\u00a0]+', ' ', text).strip()
-    return text
+def fetch_page(url: str) -> BeautifulSoup | None:
+    resp = fetch_html(url)
+    return BeautifulSoup(resp.text, "html.parser") if resp is not None else None
 
 
-def parse_partners(soup: BeautifulSoup) -> list[dict]:
+def parse_partners(soup: BeautifulSoup,
+                   emit: Callable[[dict], None] | None = None) -> list[dict]:
     cards = soup.find_all("div", class_="loan__item")
     print(f"[INFO] Found {len(cards)} partner cards.")
     records = []
@@ -106,33 +93,33 @@ def parse_partners(soup: BeautifulSoup) -> list[dict]:
         # --- Logo / name from img ---
         logo_img = card.select_one("span.loan__icon img")
         if logo_img:
-            record["logo_url"] = logo_img.get("src", "")
+            record["logo_url"] = clean(logo_img.get("src"))
             # name comes from alt or the p.font-600 below
-            record["name"] = logo_img.get("alt", "").strip()
+            record["name"] = clean(logo_img.get("alt"))
 
         # --- Name from font-600 paragraph (more reliable) ---
         name_p = card.select_one("p.font-600")
         if name_p:
             # The <span> inside is empty, just get the first text node
-            name_text = name_p.get_text(" ", strip=True)
+            name_text = tag_text(name_p)
             if name_text:
                 record["name"] = name_text
 
         # --- Region ---
         categ = card.select_one("span.partners__categ")
-        record["region"] = _t(categ)
+        record["region"] = tag_text(categ)
 
         # --- Text block: address, phone, website ---
         text_div = card.select_one("div.loan__text")
         if text_div:
             paragraphs = text_div.find_all("p")
             for p in paragraphs:
-                raw = p.get_text(" ", strip=True)
+                raw = tag_text(p)
                 raw_lower = raw.lower()
                 if raw_lower.startswith("ünvan"):
-                    record["address"] = _clean_text(raw, "Ünvan:")
+                    record["address"] = clean(raw, "Ünvan:")
                 elif raw_lower.startswith("tel"):
-                    record["phone"] = _clean_text(raw, "Tel:")
+                    record["phone"] = clean(raw, "Tel:")
                 else:
                     # Check for anchor link (website)
                     a = p.find("a", href=True)
@@ -142,33 +129,37 @@ def parse_partners(soup: BeautifulSoup) -> list[dict]:
                             record["website"] = href
 
         records.append(record)
+        if emit:
+            emit(record)
 
     return records
 
 
-def save_csv(records: list[dict], filepath: str) -> None:
-    if not records:
-        print("[WARN] No records to save.")
-        return
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
-        writer.writeheader()
-        writer.writerows(records)
-    print(f"[OK] Saved {len(records)} records → {os.path.abspath(filepath)}")
-
-
+@instrument.job("xalqbank")
 def main() -> None:
+    emit = dataio.ndjson_emitter("xalqbank", CSV_FIELDS)  # None unless NDJSON_OUT is set
     print(f"[INFO] Fetching {PAGE_URL}")
-    soup = fetch_page(PAGE_URL)
-    if soup is None:
+    chk = probe.Probe(OUTPUT_FILE)
+    with instrument.stage("xalqbank.fetch"):
+        resp = fetch_html(PAGE_URL, chk.headers())
+    if resp is None:
+        instrument.fail("page fetch failed")
+        return
+    fingerprint = probe.block_hash(resp.text, *PROBE_BLOCK)
+    if chk.unchanged(fingerprint, resp):
+        chk.skip(resp)
         return
+    soup = BeautifulSoup(resp.text, "html.parser")
 
     title = soup.find("title")
-    print(f"[INFO] Page: {_t(title)}")
-
-    partners = parse_partners(soup)
-    save_csv(partners, OUTPUT_FILE)
+    print(f"[INFO] Page: {tag_text(title)}")
+
+    with instrument.stage("xalqbank.parse") as st:
+        partners = parse_partners(soup, emit)
+        st.records = len(partners)
+    with instrument.stage("xalqbank.save_csv") as st:
+        st.rows = dataio.save_csv(partners, OUTPUT_FILE, CSV_FIELDS)
+    chk.save(fingerprint, resp)
 
     if partners:
         print("\n--- Preview (first 3) ---")
@@ -0,0 +1,33 @@
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from affordability import parse_number  # noqa: E402
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("min. 8%", 8.0),
+    ("10%-dən", 10.0),
+    ("20 ilədək", 20.0),
+    ("16.5", 16.5),
+    ("16,5", 16.5),
+    ("500000.0", 500000.0),
+    ("300,000 AZN", 300000.0),
+    ("300 000 AZN", 300000.0),
+    ("1 500 000", 1500000.0),
+    ("1 500 000 AZN", 1500000.0),
+    ("1.500.000 AZN", 1500000.0),
+    ("1,234,567.89", 1234567.89),
+    ("1.234.567,89", 1234567.89),
+])
+def test_parse_number(label, expected):
+    assert parse_number(label) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("label", ["", None, "razılaşma ilə", "1,2.3,4"])
+def test_parse_number_unreadable_is_nan(label):
+    assert math.isnan(parse_number(label))